@@ -0,0 +1,385 @@
+import glob
+import hashlib
+import json
+import os
+import numpy as np
+import matplotlib.cm
+import matplotlib.colors
+import matplotlib.style
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy import signal
+from scipy.stats import entropy
+from concurrent.futures import ProcessPoolExecutor
+from simulation_io import RECORDINGS, load_simulation_data
+from rolling_stats import rolling_correlation, rolling_variance, mean_pairwise_correlation
+from plot_lod import envelope, distinct_points, raster_density
+
+# load -> metrics -> figure. metrics and every derived series a figure needs are cached
+# on disk per run, keyed by run id and a hash of the recorded data, so re-plotting a run
+# only memory-maps its recordings and reads the cache. the hash is looked up by the
+# files' sizes and modification times and only recomputed when those change. figures
+# are drawn with Agg straight to PNG and need no display. long traces are drawn as
+# min/max envelopes and dense rasters as density images (plot_lod), so figure cost does
+# not grow with run length
+
+CACHE_DIR = 'analysis_cache'
+CACHE_VERSION = 2  # bumped when the cached series change
+STYLE = 'seaborn-v0_8-darkgrid'
+SAMPLING_RATE = 10.0  # Hz assumed for the power spectrum
+POTENTIAL_BINS = 50
+SYNCHRONIZATION_WINDOW = 100
+STABILITY_WINDOW = 50
+SYNCHRONIZATION_NEURONS = 5
+TRACE_NEURONS = 10
+RASTER_POINT_LIMIT = 100000  # rasters with more spikes are drawn as density images
+
+
+def calculate_rolling_metrics(data):
+    # sliding-window synchronization (mean pairwise correlation of the first sample
+    # neurons) and stability (variance of network activity); entry k covers the
+    # recorded samples k to k + window - 1
+    potentials = data['membrane_potentials']
+    return {
+        'synchronization': rolling_correlation(potentials[:, :SYNCHRONIZATION_NEURONS], SYNCHRONIZATION_WINDOW),
+        'stability': rolling_variance(data['network_activity'], STABILITY_WINDOW)
+    }
+
+
+def calculate_advanced_metrics(data, rolling=None):
+    # rolling: result of calculate_rolling_metrics(data), if it has already been computed
+    metrics = {}
+    
+    potentials = data['membrane_potentials']
+    activity = data['network_activity']
+    spike_times = data['spike_times']
+    spike_neurons = data['spike_neurons']
+    
+    # Network synchronization
+    metrics['synchronization'] = mean_pairwise_correlation(potentials)
+    
+    # Variability of synchronization and activity over time
+    if rolling is None:
+        rolling = calculate_rolling_metrics(data)
+    if len(rolling['synchronization']) > 0:
+        metrics['synchronization_variability'] = np.nanstd(rolling['synchronization'])
+    if len(rolling['stability']) > 0:
+        metrics['mean_running_variance'] = np.mean(rolling['stability'])
+    
+    # Oscillatory activity (simulate different frequency bands)
+    if len(activity) > 100:
+        signal_data = np.asarray(activity)
+        
+        # Gamma band (30-100 Hz simulation)
+        gamma_power = np.var(signal_data[::2] - signal_data[1::2])
+        metrics['gamma_power'] = gamma_power
+        
+        # Beta band (13-30 Hz simulation)
+        beta_signal = signal_data[::4]
+        metrics['beta_power'] = np.var(beta_signal) if len(beta_signal) > 10 else 0
+        
+        # Alpha band (8-13 Hz simulation)
+        alpha_signal = signal_data[::8]
+        metrics['alpha_power'] = np.var(alpha_signal) if len(alpha_signal) > 10 else 0
+    
+    # Neural complexity (approximate entropy)
+    if len(activity) > 50:
+        signal_data = np.asarray(activity)
+        # Discretize signal for entropy calculation
+        bins = np.linspace(signal_data.min(), signal_data.max(), 10)
+        digitized = np.digitize(signal_data, bins)
+        metrics['neural_entropy'] = entropy(np.bincount(digitized))
+    
+    # Spike irregularity
+    if len(spike_times) > 0:
+        # spikes are recorded in time order, so a stable sort by neuron keeps each train sorted
+        order = np.argsort(spike_neurons, kind='stable')
+        neurons_sorted = spike_neurons[order]
+        isis = np.diff(spike_times[order])[neurons_sorted[1:] == neurons_sorted[:-1]]  # Inter-spike intervals
+        if len(isis) > 0:
+            metrics['spike_irregularity'] = np.std(isis) / np.mean(isis) if np.mean(isis) > 0 else 0
+        else:
+            metrics['spike_irregularity'] = 0
+    
+    # Burst detection (over timesteps that contain at least one spike)
+    if len(spike_times) > 0:
+        spike_counts = data['spikes_per_timestep'][data['spikes_per_timestep'] > 0]
+        threshold = spike_counts.mean() + 2 * spike_counts.std(ddof=1) if len(spike_counts) > 1 else np.inf
+        burst_events = spike_counts[spike_counts > threshold]
+        metrics['burst_frequency'] = len(burst_events) / len(spike_counts)
+    else:
+        metrics['burst_frequency'] = 0
+    
+    return metrics
+
+
+def calculate_figure_series(data, rolling):
+    # everything the figure draws, reduced to what is visible at figure resolution; only
+    # rasters sparse enough to scatter are drawn from the recordings themselves
+    series = {}
+    timesteps = np.asarray(data['recorded_timesteps'])
+    
+    indices, series['potential_trace'] = envelope(data['membrane_potentials'][:, :TRACE_NEURONS])
+    series['potential_trace_timesteps'] = timesteps[indices]
+    indices, series['activity_trace'] = envelope(data['network_activity'])
+    series['activity_trace_timesteps'] = timesteps[indices]
+    series['spike_rate_timesteps'], series['spike_rate'] = distinct_points(data['spikes_per_timestep'])
+    
+    # rolling series are plotted at the timestep ending each window
+    indices, series['synchronization'] = envelope(rolling['synchronization'])
+    series['synchronization_timesteps'] = timesteps[SYNCHRONIZATION_WINDOW - 1:][indices]
+    indices, series['stability'] = envelope(rolling['stability'])
+    series['stability_timesteps'] = timesteps[STABILITY_WINDOW - 1:][indices]
+    
+    activity = np.asarray(data['network_activity'])
+    if len(activity) > 100:
+        frequencies, psd = signal.periodogram(activity, fs=SAMPLING_RATE)
+        indices, series['psd'] = envelope(psd)
+        series['psd_frequencies'] = frequencies[indices]
+    potentials = np.asarray(data['membrane_potentials']).ravel()
+    if len(potentials) > 0:
+        series['potential_counts'], series['potential_edges'] = np.histogram(potentials, bins=POTENTIAL_BINS)
+    
+    spike_neurons = data['spike_neurons']
+    if len(spike_neurons) > RASTER_POINT_LIMIT:
+        series['raster_extent'] = np.array([len(data['spikes_per_timestep']), int(spike_neurons.max()) + 1])
+        series['raster_density'] = raster_density(data['spike_times'], spike_neurons, *series['raster_extent'])
+    return series
+
+
+def run_id(data_prefix):
+    # file name of the run's cache entries; a prefix's directories become part of the name,
+    # so the entries stay in cache_dir
+    identifier = data_prefix.rstrip('_') or 'run'
+    for separator in filter(None, (os.sep, os.altsep)):
+        identifier = identifier.replace(separator, '_')
+    return identifier
+
+
+def content_hash(data_prefix=""):
+    # hash of the recording files; hashing reads them sequentially, far faster than analysing them
+    digest = hashlib.blake2b(digest_size=16)
+    for name in RECORDINGS:
+        with open(f'{data_prefix}{name}.npy', 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_signature(data_prefix=""):
+    # size and modification time of each recording file; cheap to read, and changed by any re-export
+    signature = []
+    for name in RECORDINGS:
+        stat = os.stat(f'{data_prefix}{name}.npy')
+        signature.append([name, stat.st_size, stat.st_mtime_ns])
+    return signature
+
+
+def recording_hash(data_prefix, cache_dir, identifier):
+    # content_hash of the recordings, taken from the run's signature file in cache_dir while
+    # the files' sizes and modification times are unchanged, so a warm run reads no recording.
+    # files that were touched but not changed hash to the same value and still hit the cache
+    signature = file_signature(data_prefix)
+    signature_path = os.path.join(cache_dir, f'{identifier}.signature.json')
+    if os.path.exists(signature_path):
+        with open(signature_path) as f:
+            stored = json.load(f)
+        if stored['signature'] == signature:
+            return stored['hash']
+    
+    digest = content_hash(data_prefix)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary_path = f'{signature_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w') as f:
+        json.dump({'signature': signature, 'hash': digest}, f)
+    os.replace(temporary_path, signature_path)
+    return digest
+
+
+def load_analysis(data_prefix="", cache_dir=CACHE_DIR):
+    # (recordings, metrics, series) for one run. metrics and series come from the cache
+    # when the recordings are unchanged, and are computed and cached otherwise;
+    # cache_dir=None disables the cache
+    data = load_simulation_data(data_prefix)
+    if cache_dir is None:
+        rolling = calculate_rolling_metrics(data)
+        return data, calculate_advanced_metrics(data, rolling), calculate_figure_series(data, rolling)
+    
+    identifier = run_id(data_prefix)
+    digest = recording_hash(data_prefix, cache_dir, identifier)
+    cache_path = os.path.join(cache_dir, f'{identifier}.v{CACHE_VERSION}.{digest}.npz')
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            metrics = {str(name): float(value) for name, value in zip(cached['metric_names'], cached['metric_values'])}
+            series = {name: cached[name] for name in cached.files if not name.startswith('metric_')}
+        return data, metrics, series
+    
+    rolling = calculate_rolling_metrics(data)
+    metrics = calculate_advanced_metrics(data, rolling)
+    series = calculate_figure_series(data, rolling)
+    
+    os.makedirs(cache_dir, exist_ok=True)
+    # entries for earlier recordings of the same run are stale
+    for stale in glob.glob(os.path.join(glob.escape(cache_dir), f'{glob.escape(identifier)}.*.npz')):
+        os.remove(stale)
+    # written under a temporary name so a concurrent reader never sees a partial file
+    temporary_path = f'{cache_path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'wb') as f:
+        np.savez(f, metric_names=np.array(list(metrics), dtype=str),
+                 metric_values=np.array(list(metrics.values()), dtype=np.float64), **series)
+    os.replace(temporary_path, cache_path)
+    return data, metrics, series
+
+
+def draw_raster_density(fig, ax, series):
+    # each bin takes the colour of its time, as the scattered raster does, and the opacity
+    # that the same number of overlapping 0.6 alpha points would build up
+    timesteps, neuron_count = series['raster_extent']
+    density = series['raster_density']
+    norm = matplotlib.colors.Normalize(0, timesteps)
+    cmap = matplotlib.colormaps['plasma']
+    centres = (np.arange(density.shape[1]) + 0.5) * timesteps / density.shape[1]
+    image = np.broadcast_to(cmap(norm(centres)), density.shape + (4,)).copy()
+    image[..., 3] = 1.0 - 0.4 ** density
+    ax.imshow(image, origin='lower', aspect='auto', interpolation='nearest',
+              extent=[0, timesteps, -0.5, neuron_count - 0.5])
+    # the margins a scatter plot would get
+    ax.set_xlim(-0.05 * timesteps, 1.05 * timesteps)
+    ax.set_ylim(-0.05 * neuron_count - 0.5, 1.05 * neuron_count - 0.5)
+    fig.colorbar(matplotlib.cm.ScalarMappable(norm=norm, cmap=cmap), ax=ax, label='Time', alpha=0.6)
+
+
+def draw_analysis(fig, data, series, condition_name="Standard"):
+    neuron_count = data['membrane_potentials'].shape[1]
+    # membrane potentials and network activity may be decimated
+    timesteps = data['recorded_timesteps']
+    
+    gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
+    fig.suptitle(f'Neural Network Analysis: {condition_name}', fontsize=16, fontweight='bold')
+    
+    # Membrane Potentials
+    ax1 = fig.add_subplot(gs[0, 0])
+    colors = matplotlib.colormaps['viridis'](np.linspace(0, 1, min(10, neuron_count)))
+    for i in range(min(10, neuron_count)):
+        ax1.plot(series['potential_trace_timesteps'][:, i], series['potential_trace'][:, i],
+                 alpha=0.7, color=colors[i], linewidth=1.5)
+    ax1.set_title('Membrane Potentials (Sample Neurons)', fontweight='bold')
+    ax1.set_ylabel('Potential (mV)')
+    ax1.set_facecolor('white')
+    ax1.grid(False)
+    
+    # Spike Raster
+    ax2 = fig.add_subplot(gs[0, 1])
+    if 'raster_density' in series:
+        draw_raster_density(fig, ax2, series)
+        ax2.set_title('Spike Raster Plot', fontweight='bold')
+        ax2.set_ylabel('Neuron ID')
+    elif len(data['spike_times']) > 0:
+        scatter = ax2.scatter(data['spike_times'], data['spike_neurons'],
+                           s=0.5, alpha=0.6, c=data['spike_times'], cmap='plasma')
+        ax2.set_title('Spike Raster Plot', fontweight='bold')
+        ax2.set_ylabel('Neuron ID')
+        fig.colorbar(scatter, ax=ax2, label='Time')
+    else:
+        ax2.text(0.5, 0.5, 'No Spikes Detected', ha='center', va='center', transform=ax2.transAxes)
+        ax2.set_title('Spike Raster Plot', fontweight='bold')
+    ax2.set_facecolor('white')
+    ax2.grid(False)
+    
+    # Network Activity
+    ax3 = fig.add_subplot(gs[0, 2])
+    ax3.plot(series['activity_trace_timesteps'], series['activity_trace'],
+            color='darkblue', linewidth=2)
+    ax3.set_title('Network Activity', fontweight='bold')
+    ax3.set_ylabel('Average Potential (mV)')
+    ax3.set_facecolor('white')
+    ax3.grid(False)
+    
+    # Spike Rate
+    ax4 = fig.add_subplot(gs[0, 3])
+    ax4.scatter(series['spike_rate_timesteps'], series['spike_rate'],
+               color='red', s=4, alpha=0.8)
+    ax4.set_title('Spike Rate', fontweight='bold')
+    ax4.set_ylabel('Spikes per Timestep')
+    ax4.set_xlabel('Timestep')
+    ax4.set_facecolor('white')
+    ax4.grid(False)
+    
+    # Frequency Analysis
+    ax5 = fig.add_subplot(gs[1, 0])
+    if 'psd' in series:
+        ax5.semilogy(series['psd_frequencies'], series['psd'], color='purple', linewidth=2)
+        ax5.set_title('Power Spectral Density', fontweight='bold')
+        ax5.set_xlabel('Frequency (Hz)')
+        ax5.set_ylabel('Power')
+        ax5.set_facecolor('white')
+        ax5.grid(False)
+    
+    # Synchronization Analysis
+    ax6 = fig.add_subplot(gs[1, 1])
+    if neuron_count > 2:
+        # Rolling correlation between the first neurons, plotted at the end of each window
+        ax6.plot(series['synchronization_timesteps'], series['synchronization'], color='orange', linewidth=2)
+        ax6.set_title('Network Synchronization', fontweight='bold')
+        ax6.set_ylabel('Correlation Coefficient')
+        ax6.set_xlabel('Timestep')
+        ax6.set_facecolor('white')
+        ax6.grid(False)
+    
+    # Membrane Potential Distribution
+    ax9 = fig.add_subplot(gs[1, 2])
+    if 'potential_counts' in series:
+        edges = series['potential_edges']
+        ax9.hist(edges[:-1], bins=edges, weights=series['potential_counts'],
+                 alpha=0.7, color='skyblue', edgecolor='black')
+    ax9.set_title('Membrane Potential Distribution', fontweight='bold')
+    ax9.set_xlabel('Potential (mV)')
+    ax9.set_ylabel('Frequency')
+    ax9.set_facecolor('white')
+    ax9.grid(False)
+    
+    # Stability Analysis
+    ax11 = fig.add_subplot(gs[1, 3])
+    if len(timesteps) > 50:
+        # Running variance as stability measure
+        ax11.plot(series['stability_timesteps'], series['stability'], color='brown', linewidth=2)
+        ax11.set_title('Network Stability', fontweight='bold')
+        ax11.set_ylabel('Running Variance')
+        ax11.set_xlabel('Timestep')
+        ax11.set_facecolor('white')
+        ax11.grid(False)
+    
+    fig.tight_layout()
+
+
+def figure_path(data_prefix=""):
+    return f'{data_prefix}network_analysis.png'
+
+
+def render_run(data_prefix="", condition_name="Standard", output_path=None, cache_dir=CACHE_DIR, dpi=150):
+    # draws one run's analysis figure to a PNG file with Agg; returns (output path, metrics)
+    data, metrics, series = load_analysis(data_prefix, cache_dir)
+    output_path = output_path or figure_path(data_prefix)
+    with matplotlib.style.context(STYLE):
+        fig = Figure(figsize=(20, 12))
+        FigureCanvasAgg(fig)
+        draw_analysis(fig, data, series, condition_name)
+        fig.savefig(output_path, dpi=dpi)
+    return output_path, metrics
+
+
+def _render_run(arguments):
+    return render_run(*arguments)
+
+
+def render_runs(runs, cache_dir=CACHE_DIR, dpi=150, workers=None):
+    # runs: (data prefix, condition name) pairs. figures are rendered in a process pool,
+    # since matplotlib is not thread-safe; workers=1 renders in this process.
+    # returns {data prefix: (output path, metrics)}
+    tasks = [(data_prefix, condition_name, None, cache_dir, dpi) for data_prefix, condition_name in runs]
+    if workers == 1 or len(tasks) < 2:
+        results = [render_run(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+            results = list(executor.map(_render_run, tasks))
+    return {task[0]: result for task, result in zip(tasks, results)}
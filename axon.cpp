@@ -1,38 +1,46 @@
 #include "axon.h"
 #include "synapse.h"
+#include <cmath>
 
 Axon::Axon(float len, float diam, bool myelinated, int max_syn)
-    : length(len), diameter(diam), is_myelinated(myelinated), synapse_count(0), max_synapses(max_syn) {
+    : length(len), diameter(diam), is_myelinated(myelinated), max_synapses(max_syn) {
     // calculate conduction velocity based on myelination and diameter
     if (is_myelinated) {
         conduction_velocity = 6.0f * diameter; // myelinated: 6*diameter m/s
     } else {
         conduction_velocity = 0.5f * diameter; // unmyelinated: much slower
     }
-    
-    output_synapses = new Synapse*[max_synapses];
-    for (int i = 0; i < max_synapses; ++i) {
-        output_synapses[i] = nullptr;
-    }
 }
 
 bool Axon::add_output_synapse(Synapse* synapse) {
-    if (synapse_count < max_synapses) {
-        output_synapses[synapse_count] = synapse;
-        synapse_count++;
+    if (synapse != nullptr && static_cast<int>(output_synapses.size()) < max_synapses) {
+        output_synapses.push_back(synapse);
         return true;
     }
     return false;
 }
 
 void Axon::propagate_action_potential(float amplitude) {
-    for (int i = 0; i < synapse_count; ++i) {
-        if (output_synapses[i] != nullptr) {
-            output_synapses[i]->propagate_signal(amplitude);
-        }
+    for (int i = 0; i < get_synapse_count(); ++i) {
+        output_synapses[i]->propagate_signal(amplitude);
+    }
+}
+
+void Axon::schedule_action_potential(SpikeQueue<SynapticSignal>& queue, float amplitude) {
+    for (Synapse* synapse : output_synapses) {
+        queue.schedule(synapse->get_delay(), SynapticSignal{synapse, amplitude});
     }
 }
 
+int Axon::get_conduction_delay(float timestep_ms) const {
+    // micrometers / (m/s) -> ms: length in mm divided by velocity in mm/ms
+    float delay_ms = (length / 1000.0f) / conduction_velocity;
+    int steps = static_cast<int>(std::ceil(delay_ms / timestep_ms));
+    return steps < 1 ? 1 : steps;
+}
+
 Axon::~Axon() {
-    delete[] output_synapses;
+    for (Synapse* synapse : output_synapses) {
+        delete synapse;
+    }
 }
\ No newline at end of file
@@ -1,6 +1,9 @@
 #ifndef AXON_H
 #define AXON_H
 
+#include <vector>
+#include "spike_queue.h"
+
 class Synapse;
 
 class Axon {
@@ -9,23 +12,28 @@ private:
     float diameter;            // axon diameter in micrometers
     bool is_myelinated;        // whether axon is myelinated
     float conduction_velocity; // m/s
-    Synapse** output_synapses; // synapses this axon connects to
-    int synapse_count;
+    std::vector<Synapse*> output_synapses; // synapses this axon connects to (owned)
     int max_synapses;
-    
+
 public:
     explicit Axon(float len = 10000.0f, float diam = 1.0f, bool myelinated = true, int max_syn = 1000);
     
-    // add output synapse
+    // add output synapse; the axon takes ownership of it on success
     bool add_output_synapse(Synapse* synapse);
     
     // propagate action potential through all output synapses
     void propagate_action_potential(float amplitude = 50.0f);
     
-
+    // queue the action potential for each output synapse after its delay
+    void schedule_action_potential(SpikeQueue<SynapticSignal>& queue, float amplitude = 50.0f);
+    
+    // conduction time along the axon in whole timesteps (at least one)
+    int get_conduction_delay(float timestep_ms = 1.0f) const;
+    
     inline float get_conduction_velocity() const { return conduction_velocity; }
     inline bool get_is_myelinated() const { return is_myelinated; }
-    inline int get_synapse_count() const { return synapse_count; }
+    inline int get_synapse_count() const { return static_cast<int>(output_synapses.size()); }
+    inline Synapse* get_output_synapse(int idx) const { return output_synapses[idx]; }
     inline float get_length() const { return length; }
     inline float get_diameter() const { return diameter; }
     
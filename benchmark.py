@@ -0,0 +1,222 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import neuron_simulator
+
+# throughput and scaling benchmarks. each case (network size, connection density,
+# timesteps) runs in a fresh process so its peak RSS is its own; results are written
+# as JSON and can be compared against an earlier file to catch regressions:
+#   python benchmark.py --output before.json
+#   python benchmark.py --output after.json --compare before.json
+
+BASE_CASE = {'neurons': 1000, 'connection_density': 6, 'timesteps': 4000}
+SIZES = [100, 1000, 5000]
+DENSITIES = [3, 6, 12]
+TIMESTEPS = [1000, 4000, 10000]
+QUICK_BASE_CASE = {'neurons': 200, 'connection_density': 6, 'timesteps': 1000}
+QUICK_SIZES = [100, 200]
+QUICK_DENSITIES = [6]
+QUICK_TIMESTEPS = [1000]
+SEED = 1
+# throughput figures compared by --compare; higher is better for all of them
+THROUGHPUT_FIELDS = ['standard_neuron_updates_per_second', 'standard_spikes_per_second',
+                     'metabolic_neuron_updates_per_second', 'csv_export_mb_per_second',
+                     'binary_export_mb_per_second']
+
+
+def sweep_cases(base_case, sizes, densities, timesteps, grid=False):
+    # one parameter varied at a time around base_case, or every combination with grid=True
+    if grid:
+        return [{'neurons': n, 'connection_density': d, 'timesteps': t}
+                for n in sizes for d in densities for t in timesteps]
+    cases = []
+    for name, values in (('neurons', sizes), ('connection_density', densities), ('timesteps', timesteps)):
+        for value in values:
+            case = dict(base_case, **{name: value})
+            if case not in cases:
+                cases.append(case)
+    return cases
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _directory_mb(directory, prefix):
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for name in os.listdir(directory) if name.startswith(prefix)) / (1024 * 1024)
+
+
+def _timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+
+def run_case(case, engine_name, analysis=True):
+    # all timings of one case, in seconds unless named otherwise
+    spec = neuron_simulator.PopulationSpec().scaled_to(case['neurons'])
+    spec.connection_density = case['connection_density']
+    neurons = spec.total_size()
+    timesteps = case['timesteps']
+    simulator = neuron_simulator.NeuronSimulator(spec, seed=SEED)
+    simulator.set_engine(getattr(neuron_simulator.SimulationEngine, engine_name))
+    result = dict(case, neurons=neurons, engine=engine_name)
+    
+    elapsed, _ = _timed(simulator.run_metabolic_dysfunction_simulation, simulator.create_hypoglycemia(), timesteps)
+    result['metabolic_seconds'] = elapsed
+    result['metabolic_neuron_updates_per_second'] = neurons * timesteps / elapsed
+    
+    # the standard run is last, so the remaining steps work on its recordings
+    elapsed, _ = _timed(simulator.run_standard_simulation, timesteps)
+    result['standard_seconds'] = elapsed
+    result['standard_neuron_updates_per_second'] = neurons * timesteps / elapsed
+    elapsed, data = _timed(simulator.get_simulation_data)
+    result['get_simulation_data_seconds'] = elapsed
+    result['total_spikes'] = data.total_spikes
+    result['standard_spikes_per_second'] = data.total_spikes / result['standard_seconds']
+    result['stability_metrics_seconds'], _ = _timed(simulator.calculate_stability_metrics)
+    
+    directory = tempfile.mkdtemp(prefix='neuron_benchmark_')
+    try:
+        prefix = os.path.join(directory, 'csv_')
+        result['csv_export_seconds'], _ = _timed(simulator.export_csv_data, prefix)
+        result['csv_export_mb'] = _directory_mb(directory, 'csv_')
+        result['csv_export_mb_per_second'] = result['csv_export_mb'] / result['csv_export_seconds']
+        prefix = os.path.join(directory, 'npy_')
+        result['binary_export_seconds'], _ = _timed(simulator.export_binary_data, prefix)
+        result['binary_export_mb'] = _directory_mb(directory, 'npy_')
+        result['binary_export_mb_per_second'] = result['binary_export_mb'] / result['binary_export_seconds']
+        result['simulation_peak_rss_mb'] = _peak_rss_mb()
+        
+        if analysis:
+            # imported here so the simulation peak above does not include matplotlib
+            from analysis_pipeline import calculate_advanced_metrics, render_run
+            from simulation_io import load_simulation_data
+            result['advanced_metrics_seconds'], _ = _timed(calculate_advanced_metrics, load_simulation_data(prefix))
+            # the full figure path, uncached and headless
+            result['visualization_seconds'], _ = _timed(render_run, prefix, 'Benchmark',
+                                                        os.path.join(directory, 'figure.png'), None)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    result['peak_rss_mb'] = _peak_rss_mb()
+    return result
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _best_of(repeats):
+    # fastest time and highest throughput of each field over repeated runs of a case
+    best = dict(repeats[0])
+    for result in repeats[1:]:
+        for field, value in result.items():
+            if field.endswith('_seconds'):
+                best[field] = min(best[field], value)
+            elif field.endswith('_per_second'):
+                best[field] = max(best[field], value)
+    return best
+
+
+def run_benchmarks(cases, engine_name='OBJECT', analysis=True, repeats=1, output_path=None, verbose=True):
+    # runs every case in a fresh process, repeats times; returns the results document
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for number, case in enumerate(cases, 1):
+        runs = []
+        for _ in range(repeats):
+            with context.Pool(1) as pool:
+                runs.append(pool.apply(run_case, (case, engine_name, analysis)))
+        result = _best_of(runs)
+        results.append(result)
+        if verbose:
+            print(f"[{number}/{len(cases)}] {result['neurons']} neurons, density {result['connection_density']}, "
+                  f"{result['timesteps']} timesteps: "
+                  f"{result['standard_neuron_updates_per_second'] / 1e6:.2f}M neuron updates/s, "
+                  f"{result['standard_spikes_per_second']:.0f} spikes/s, "
+                  f"CSV {result['csv_export_mb_per_second']:.1f} MB/s, peak RSS {result['peak_rss_mb']:.0f} MB")
+    
+    document = {
+        'revision': _git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'engine': engine_name,
+        'repeats': repeats,
+        'results': results
+    }
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(document, f, indent=2)
+    return document
+
+
+def _case_key(result):
+    return (result['neurons'], result['connection_density'], result['timesteps'], result['engine'])
+
+
+def compare(baseline, current, tolerance=0.1):
+    # throughput figures of matching cases that fell by more than tolerance (a fraction)
+    # relative to the baseline document, as (case, field, baseline value, current value)
+    baseline_results = {_case_key(result): result for result in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        reference = baseline_results.get(_case_key(result))
+        if reference is None:
+            continue
+        for field in THROUGHPUT_FIELDS:
+            if field in reference and field in result and result[field] < reference[field] * (1.0 - tolerance):
+                regressions.append((_case_key(result), field, reference[field], result[field]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark simulator throughput and scaling.')
+    parser.add_argument('--output', default='benchmark_results.json', help='results file (JSON)')
+    parser.add_argument('--compare', help='earlier results file to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed throughput drop against --compare, as a fraction')
+    parser.add_argument('--engine', default='OBJECT', choices=['OBJECT', 'SOA'])
+    parser.add_argument('--repeat', type=int, default=1, help='runs per case; the best timings are kept')
+    parser.add_argument('--quick', action='store_true', help='small cases only')
+    parser.add_argument('--grid', action='store_true', help='every combination instead of one parameter at a time')
+    parser.add_argument('--no-analysis', action='store_true', help='skip the Python metrics and figure timings')
+    args = parser.parse_args()
+    
+    if args.quick:
+        cases = sweep_cases(QUICK_BASE_CASE, QUICK_SIZES, QUICK_DENSITIES, QUICK_TIMESTEPS, args.grid)
+    else:
+        cases = sweep_cases(BASE_CASE, SIZES, DENSITIES, TIMESTEPS, args.grid)
+    document = run_benchmarks(cases, args.engine, not args.no_analysis, args.repeat, args.output)
+    print(f"Results written to {args.output}")
+    
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, document, args.tolerance)
+        for (neurons, density, timesteps, engine), field, before, after in regressions:
+            print(f"Regression: {neurons} neurons, density {density}, {timesteps} timesteps ({engine}): "
+                  f"{field} {before:.4g} -> {after:.4g}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
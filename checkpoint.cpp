@@ -0,0 +1,106 @@
+#include "checkpoint.h"
+#include <algorithm>
+#include <cstdio>
+#include <filesystem>
+#include <stdexcept>
+
+namespace {
+
+const char CHECKPOINT_MAGIC[8] = {'N', 'S', 'I', 'M', 'C', 'K', 'P', 'T'};
+const uint32_t CHECKPOINT_VERSION = 5;
+
+} // namespace
+
+CheckpointWriter::CheckpointWriter(const std::string& name)
+    : filename(name), temporary_filename(name + ".tmp"),
+      file(temporary_filename, std::ios::binary | std::ios::trunc) {
+    if (!file.is_open()) {
+        throw std::runtime_error("Checkpoint: cannot write '" + temporary_filename + "'");
+    }
+    file.write(CHECKPOINT_MAGIC, sizeof(CHECKPOINT_MAGIC));
+    write(CHECKPOINT_VERSION);
+}
+
+void CheckpointWriter::write_string(const std::string& value) {
+    write<uint64_t>(value.size());
+    file.write(value.data(), value.size());
+}
+
+void CheckpointWriter::close() {
+    file.close();
+    if (file.fail() || std::rename(temporary_filename.c_str(), filename.c_str()) != 0) {
+        std::remove(temporary_filename.c_str());
+        throw std::runtime_error("Checkpoint: cannot write '" + filename + "'");
+    }
+}
+
+CheckpointReader::CheckpointReader(const std::string& name) : filename(name), file(name, std::ios::binary) {
+    if (!file.is_open()) {
+        throw std::runtime_error("Checkpoint: cannot open '" + filename + "'");
+    }
+    char magic[sizeof(CHECKPOINT_MAGIC)];
+    file.read(magic, sizeof(magic));
+    check();
+    if (!std::equal(magic, magic + sizeof(magic), CHECKPOINT_MAGIC) || read<uint32_t>() != CHECKPOINT_VERSION) {
+        throw std::runtime_error("Checkpoint: '" + filename + "' is not a checkpoint of this simulator version");
+    }
+}
+
+void CheckpointReader::check() {
+    if (!file) {
+        throw std::runtime_error("Checkpoint: '" + filename + "' is truncated");
+    }
+}
+
+std::string CheckpointReader::read_string() {
+    std::string value(read<uint64_t>(), '\0');
+    file.read(&value[0], value.size());
+    check();
+    return value;
+}
+
+CheckpointJournal::CheckpointJournal() : length(0) {}
+
+void CheckpointJournal::start(const std::string& name) {
+    close();
+    filename = name;
+}
+
+void CheckpointJournal::resume(const std::string& name, uint64_t resume_length) {
+    close();
+    filename = name;
+    length = resume_length;
+}
+
+void CheckpointJournal::close() {
+    file.close();
+    filename.clear();
+    length = 0;
+}
+
+void CheckpointJournal::open() {
+    if (file.is_open()) return;
+    if (length == 0) {
+        file.open(filename, std::ios::binary | std::ios::trunc);
+        file.write(CHECKPOINT_MAGIC, sizeof(CHECKPOINT_MAGIC));
+        file.write(reinterpret_cast<const char*>(&CHECKPOINT_VERSION), sizeof(CHECKPOINT_VERSION));
+        length = sizeof(CHECKPOINT_MAGIC) + sizeof(CHECKPOINT_VERSION);
+    } else {
+        // drop appends whose checkpoint was never written
+        std::error_code error;
+        std::filesystem::resize_file(filename, length, error);
+        if (!error) file.open(filename, std::ios::binary | std::ios::app);
+    }
+    if (!file.is_open()) {
+        throw std::runtime_error("Checkpoint: cannot write '" + filename + "'");
+    }
+}
+
+uint64_t CheckpointJournal::commit() {
+    open();
+    file.flush();
+    if (file.fail()) {
+        throw std::runtime_error("Checkpoint: cannot write '" + filename + "'");
+    }
+    return length;
+}
@@ -0,0 +1,127 @@
+#ifndef CHECKPOINT_H
+#define CHECKPOINT_H
+
+#include <string>
+#include <vector>
+#include <fstream>
+#include <cstdint>
+#include <type_traits>
+
+// binary snapshot files of simulator state. values are written in native layout, so a
+// checkpoint is read back by the same build on the same platform; the header carries
+// a format version that is checked on reading
+
+// written to filename + ".tmp" and renamed over filename by close(), so an interrupted
+// write leaves the previous checkpoint intact
+class CheckpointWriter {
+private:
+    std::string filename;
+    std::string temporary_filename;
+    std::ofstream file;
+
+public:
+    explicit CheckpointWriter(const std::string& filename);
+    
+    template <typename T>
+    void write(const T& value) {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        file.write(reinterpret_cast<const char*>(&value), sizeof(T));
+    }
+    
+    template <typename T>
+    void write_vector(const std::vector<T>& values) {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        write<uint64_t>(values.size());
+        file.write(reinterpret_cast<const char*>(values.data()), values.size() * sizeof(T));
+    }
+    
+    void write_string(const std::string& value);
+    // finish the file and move it into place; throws std::runtime_error on failure
+    void close();
+};
+
+// reads what CheckpointWriter wrote, in the same order; throws std::runtime_error
+// on a missing, truncated or incompatible file
+class CheckpointReader {
+private:
+    std::string filename;
+    std::ifstream file;
+    
+    void check();
+
+public:
+    explicit CheckpointReader(const std::string& filename);
+    
+    template <typename T>
+    T read() {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        T value;
+        file.read(reinterpret_cast<char*>(&value), sizeof(T));
+        check();
+        return value;
+    }
+    
+    template <typename T>
+    void read_vector(std::vector<T>& values) {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        values.resize(read<uint64_t>());
+        file.read(reinterpret_cast<char*>(values.data()), values.size() * sizeof(T));
+        check();
+    }
+    
+    std::string read_string();
+    
+    // read a vector written by write_vector() or CheckpointJournal::append() onto the end of values
+    template <typename T>
+    void read_append(std::vector<T>& values) {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        const size_t offset = values.size();
+        values.resize(offset + read<uint64_t>());
+        file.read(reinterpret_cast<char*>(values.data() + offset), (values.size() - offset) * sizeof(T));
+        check();
+    }
+};
+
+// append-only companion file of a checkpoint, for data that only grows during a run (the
+// in-memory recordings). each checkpoint appends what was added since the previous one
+// and stores the journal's length, so the checkpoints of a run write the data once in
+// total instead of once per checkpoint. the file starts with the checkpoint header and
+// is read back with CheckpointReader::read_append(); anything past the length a
+// checkpoint stored is dropped when the journal is continued from that checkpoint.
+// the file is only touched on the first append
+class CheckpointJournal {
+private:
+    std::string filename;
+    std::ofstream file;
+    uint64_t length;
+    
+    void open();
+
+public:
+    CheckpointJournal();
+    
+    // start a new, empty journal at name
+    void start(const std::string& name);
+    // continue the journal at name after its first length bytes
+    void resume(const std::string& name, uint64_t length);
+    // detach from the file; the next journal is started from scratch
+    void close();
+    
+    // append values[from:] in the layout of CheckpointWriter::write_vector()
+    template <typename T>
+    void append(const std::vector<T>& values, size_t from) {
+        static_assert(std::is_trivially_copyable<T>::value, "checkpoint values must be trivially copyable");
+        open();
+        const uint64_t count = values.size() - from;
+        file.write(reinterpret_cast<const char*>(&count), sizeof(count));
+        file.write(reinterpret_cast<const char*>(values.data() + from), count * sizeof(T));
+        length += sizeof(count) + count * sizeof(T);
+    }
+    // push the appended data to the file and return its length; throws
+    // std::runtime_error on failure
+    uint64_t commit();
+    
+    inline const std::string& get_filename() const { return filename; }
+};
+
+#endif
@@ -2,21 +2,14 @@
 #include "synapse.h"
 #include "neuron.h"
 
-Dendrite::Dendrite(float len, float diam, int spines, Neuron* parent) 
+Dendrite::Dendrite(float len, float diam, int spines, Neuron* parent)
     : length(len), diameter(diam), spine_count(spines), membrane_potential(-70.0f),
-      synapse_count(0), max_synapses(spines), is_active(false), parent_neuron(parent) {
-    synapses = new Synapse*[max_synapses];
-    for (int i = 0; i < max_synapses; ++i) {
-        synapses[i] = nullptr;
-    }
-}
+      max_synapses(spines), is_active(false), parent_neuron(parent) {}
 
 float Dendrite::integrate_synaptic_inputs() {
     float total_input = 0.0f;
-    for (int i = 0; i < synapse_count; ++i) {
-        if (synapses[i] != nullptr) {
-            total_input += synapses[i]->get_synaptic_contribution();
-        }
+    for (const Synapse* synapse : synapses) {
+        total_input += synapse->get_synaptic_contribution();
     }
     return total_input;
 }
@@ -39,22 +32,18 @@ void Dendrite::update_membrane_potential() {
 }
 
 bool Dendrite::add_synapse(Synapse* synapse) {
-    if (synapse_count < max_synapses) {
-        synapses[synapse_count] = synapse;
-        synapse_count++;
+    if (synapse != nullptr && static_cast<int>(synapses.size()) < max_synapses) {
+        synapses.push_back(synapse);
         return true;
     }
     return false;
 }
 
 bool Dendrite::remove_synapse(Synapse* synapse) {
-    for (int i = 0; i < synapse_count; ++i) {
+    for (int i = 0; i < get_synapse_count(); ++i) {
         if (synapses[i] == synapse) {
-            for (int j = i; j < synapse_count - 1; ++j) {
-                synapses[j] = synapses[j + 1];
-            }
-            synapse_count--;
-            synapses[synapse_count] = nullptr;
+            synapses[i] = synapses.back();
+            synapses.pop_back();
             return true;
         }
     }
@@ -62,5 +51,8 @@ bool Dendrite::remove_synapse(Synapse* synapse) {
 }
 
 Dendrite::~Dendrite() {
-    delete[] synapses;
+    // synapses are owned by the presynaptic axon and may outlive this dendrite
+    for (Synapse* synapse : synapses) {
+        synapse->forget_dendrite(this);
+    }
 }
\ No newline at end of file
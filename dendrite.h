@@ -1,6 +1,8 @@
 #ifndef DENDRITE_H
 #define DENDRITE_H
 
+#include <vector>
+
 class Synapse;
 class Neuron;
 
@@ -10,12 +12,11 @@ private:
     float diameter;           // diameter in micrometers
     int spine_count;          // number of dendritic spines
     float membrane_potential; // current membrane potential in mV
-    Synapse** synapses;       // array of connected synapses
-    int synapse_count;        // current number of synapses
+    std::vector<Synapse*> synapses; // connected synapses, sized by actual connections
     int max_synapses;         // maximum synapses (based on spine count)
     bool is_active;           // whether dendrite is currently active
     Neuron* parent_neuron;    // reference to parent neuron
-    
+
 public:
     explicit Dendrite(float len = 300.0f, float diam = 2.0f, int spines = 5000, Neuron* parent = nullptr);
     
@@ -24,11 +25,12 @@ public:
     
     void update_membrane_potential();
     bool add_synapse(Synapse* synapse);
+    // constant time after lookup; the last synapse takes the removed one's place
     bool remove_synapse(Synapse* synapse);
     
     inline float get_membrane_potential() const { return membrane_potential; }
     inline bool get_is_active() const { return is_active; }
-    inline int get_synapse_count() const { return synapse_count; }
+    inline int get_synapse_count() const { return static_cast<int>(synapses.size()); }
     inline Neuron* get_parent_neuron() const { return parent_neuron; }
     inline float get_length() const { return length; }
     inline float get_diameter() const { return diameter; }
@@ -42,7 +44,7 @@ public:
     
     // get synaptic density (synapses per unit area)
     inline float get_synaptic_density() const {
-        return static_cast<float>(synapse_count) / get_surface_area();
+        return static_cast<float>(synapses.size()) / get_surface_area();
     }
     
     virtual ~Dendrite();
@@ -0,0 +1,28 @@
+#include "event_log.h"
+#include <algorithm>
+
+LogLevel EventLog::level_of(EventType type) {
+    switch (type) {
+        case EventType::RUN_START:
+        case EventType::RUN_RESUMED:
+        case EventType::DYSFUNCTION_ONSET:
+            return LogLevel::RUN;
+        case EventType::REDUCED_EXCITABILITY:
+        case EventType::DEPOLARIZATION_BLOCK:
+            return LogLevel::CONDITION;
+        case EventType::HYPERGLYCEMIC_BURST:
+        case EventType::HYPOXIC_CASCADE:
+            return LogLevel::NEURON;
+    }
+    return LogLevel::NEURON;
+}
+
+void EventLog::clear() {
+    timesteps.clear();
+    neurons.clear();
+    types.clear();
+}
+
+size_t EventLog::count(EventType type) const {
+    return std::count(types.begin(), types.end(), static_cast<int32_t>(type));
+}
@@ -0,0 +1,58 @@
+#ifndef EVENT_LOG_H
+#define EVENT_LOG_H
+
+#include <vector>
+#include <cstddef>
+#include <cstdint>
+
+enum class EventType : int32_t {
+    RUN_START,            // a run began at this timestep
+    RUN_RESUMED,          // a resumed run continued at this timestep
+    DYSFUNCTION_ONSET,    // the metabolic condition took effect
+    REDUCED_EXCITABILITY, // hypoglycemia reduced excitability
+    DEPOLARIZATION_BLOCK, // a neuron went into depolarization block
+    HYPERGLYCEMIC_BURST,  // a neuron was stimulated by a hyperglycemic burst
+    HYPOXIC_CASCADE       // a neuron was stimulated by a hypoxic cascade
+};
+
+// which events are recorded; each level includes the ones before it
+enum class LogLevel {
+    OFF,
+    RUN,       // run start, resume and dysfunction onset
+    CONDITION, // plus the effects of the condition: excitability changes and blocks
+    NEURON     // plus every neuron stimulated by a burst or cascade
+};
+
+// typed events of a run, kept in memory as parallel arrays. recording an event is an
+// append, so the simulation loop does no I/O; neuron is -1 for network-wide events
+class EventLog {
+private:
+    LogLevel level = LogLevel::CONDITION;
+    std::vector<int32_t> timesteps;
+    std::vector<int32_t> neurons;
+    std::vector<int32_t> types;
+
+public:
+    static LogLevel level_of(EventType type);
+    
+    void set_level(LogLevel value) { level = value; }
+    LogLevel get_level() const { return level; }
+    inline bool records(EventType type) const { return level_of(type) <= level; }
+    
+    inline void record(EventType type, int timestep, int neuron_id = -1) {
+        if (!records(type)) return;
+        timesteps.push_back(timestep);
+        neurons.push_back(neuron_id);
+        types.push_back(static_cast<int32_t>(type));
+    }
+    void clear();
+    
+    size_t size() const { return types.size(); }
+    const std::vector<int32_t>& get_timesteps() const { return timesteps; }
+    const std::vector<int32_t>& get_neurons() const { return neurons; }
+    const std::vector<int32_t>& get_types() const { return types; }
+    // number of recorded events of type
+    size_t count(EventType type) const;
+};
+
+#endif
@@ -0,0 +1,123 @@
+#include "metabolic_state.h"
+#include <algorithm>
+
+namespace {
+
+const float NORMAL_GLUCOSE = 90.0f;           // mg/dL; lower levels limit the ATP supply
+const float MAX_PROGRESSION = 3.0f;           // severity factor a progressive condition reaches
+const float PROGRESSION_RATE = 0.001f;        // severity increase per timestep after onset
+
+// relaxation rates per 1 ms timestep
+const float ATP_RATE = 0.01f;
+const float PUMP_RATE = 0.02f;
+const float TRANSMITTER_RATE = 0.005f;
+const float SPIKE_ATP_COST = 0.002f;          // fraction of the ATP pool used by one spike
+
+const float PUMP_DEPOLARIZATION_MV = 15.0f;   // resting potential shift with the pumps stopped
+const float LEAK_DEPOLARIZATION_MV = 10.0f;   // resting potential shift with no membrane integrity
+const float LOW_ENERGY_THRESHOLD_MV = 5.0f;   // threshold shift with no ATP left
+const float OXIDATIVE_THRESHOLD_MV = 0.5f;    // threshold drop per unit of oxidative stress
+// beyond this depolarization sodium channels stay inactivated and the neuron cannot fire
+const float DEPOLARIZATION_BLOCK_MV = 10.0f;
+const float BLOCKED_THRESHOLD_MV = 1000.0f;
+
+} // namespace
+
+MetabolicState::MetabolicState() : course(1), onset_timestep(-1) {}
+
+void MetabolicState::reset(int neuron_count) {
+    atp.assign(neuron_count, 1.0f);
+    ion_pump.assign(neuron_count, 1.0f);
+    transmitter.assign(neuron_count, 1.0f);
+    rest_shift.assign(neuron_count, 0.0f);
+    threshold_shift.assign(neuron_count, 0.0f);
+    efficacy.assign(neuron_count, 1.0f);
+    blocked.assign(neuron_count, 0);
+    block_onsets.clear();
+    course.assign(1, MetabolicLevels());
+    onset_timestep = -1;
+}
+
+void MetabolicState::set_condition(const MetabolicCondition& condition) {
+    // same progression as NeuronSimulator::apply_metabolic_dysfunction()
+    const int steps = condition.progressive ?
+        static_cast<int>((MAX_PROGRESSION - 1.0f) / PROGRESSION_RATE) + 1 : 1;
+    const float glucose_factor = std::min(condition.glucose_level / NORMAL_GLUCOSE, 1.0f);
+    
+    course.resize(steps);
+    for (int i = 0; i < steps; ++i) {
+        const float severity = std::min(1.0f + i * PROGRESSION_RATE, MAX_PROGRESSION);
+        MetabolicLevels& levels = course[i];
+        levels.atp_supply = std::min(condition.atp_efficiency * glucose_factor, 1.0f) / severity;
+        levels.ion_pump = condition.ion_pump_function / severity;
+        levels.synthesis = condition.neurotransmitter_synthesis / severity;
+        levels.membrane_integrity = condition.membrane_integrity / severity;
+        levels.oxidative_stress = condition.oxidative_stress * severity;
+    }
+    onset_timestep = condition.onset_timestep;
+}
+
+const MetabolicLevels& MetabolicState::get_levels(int timestep) const {
+    static const MetabolicLevels healthy;
+    if (onset_timestep < 0 || timestep < onset_timestep) return healthy;
+    return course[std::min<size_t>(timestep - onset_timestep, course.size() - 1)];
+}
+
+void MetabolicState::step(int timestep, const std::vector<int>& spiked_neurons) {
+    const MetabolicLevels& levels = get_levels(timestep);
+    block_onsets.clear();
+    for (int neuron_id : spiked_neurons) {
+        atp[neuron_id] -= SPIKE_ATP_COST;
+    }
+    
+    const int n = size();
+    const float leak_shift = LEAK_DEPOLARIZATION_MV * (1.0f - levels.membrane_integrity);
+    const float stress_shift = OXIDATIVE_THRESHOLD_MV * levels.oxidative_stress;
+    float* __restrict energy = atp.data();
+    float* __restrict pump = ion_pump.data();
+    float* __restrict pool = transmitter.data();
+    float* __restrict rest = rest_shift.data();
+    float* __restrict threshold = threshold_shift.data();
+    float* __restrict scale = efficacy.data();
+    unsigned char* __restrict block = blocked.data();
+    for (int i = 0; i < n; ++i) {
+        const float available = std::max(energy[i] + (levels.atp_supply - energy[i]) * ATP_RATE, 0.0f);
+        energy[i] = available;
+        pump[i] += (levels.ion_pump * available - pump[i]) * PUMP_RATE;
+        pool[i] += (levels.synthesis * available - pool[i]) * TRANSMITTER_RATE;
+        const float depolarization = PUMP_DEPOLARIZATION_MV * (1.0f - pump[i]) + leak_shift;
+        const bool in_block = depolarization > DEPOLARIZATION_BLOCK_MV;
+        if (in_block && !block[i]) {
+            block_onsets.push_back(i);
+        }
+        rest[i] = depolarization;
+        threshold[i] = LOW_ENERGY_THRESHOLD_MV * (1.0f - available) - stress_shift
+                       + (in_block ? BLOCKED_THRESHOLD_MV : 0.0f);
+        scale[i] = pool[i];
+        block[i] = in_block;
+    }
+}
+
+void MetabolicState::save(CheckpointWriter& writer) const {
+    writer.write_vector(atp);
+    writer.write_vector(ion_pump);
+    writer.write_vector(transmitter);
+    writer.write_vector(rest_shift);
+    writer.write_vector(threshold_shift);
+    writer.write_vector(efficacy);
+}
+
+void MetabolicState::load(CheckpointReader& reader) {
+    reader.read_vector(atp);
+    reader.read_vector(ion_pump);
+    reader.read_vector(transmitter);
+    reader.read_vector(rest_shift);
+    reader.read_vector(threshold_shift);
+    reader.read_vector(efficacy);
+    blocked.resize(rest_shift.size());
+    for (size_t i = 0; i < rest_shift.size(); ++i) {
+        blocked[i] = rest_shift[i] > DEPOLARIZATION_BLOCK_MV;
+    }
+    course.assign(1, MetabolicLevels());
+    onset_timestep = -1;
+}
@@ -0,0 +1,85 @@
+#ifndef METABOLIC_STATE_H
+#define METABOLIC_STATE_H
+
+#include <string>
+#include <vector>
+#include "checkpoint.h"
+
+struct MetabolicCondition {
+    std::string name;
+    float glucose_level;
+    float atp_efficiency;
+    float ion_pump_function;
+    float neurotransmitter_synthesis;
+    float membrane_integrity;
+    float oxidative_stress;
+    bool progressive;
+    int onset_timestep;
+};
+
+// condition levels at one timestep; 1 is healthy for all but oxidative stress
+struct MetabolicLevels {
+    float atp_supply = 1.0f;
+    float ion_pump = 1.0f;
+    float synthesis = 1.0f;
+    float membrane_integrity = 1.0f;
+    float oxidative_stress = 0.0f;
+};
+
+// per-neuron energy state of the SOA engine under a metabolic condition. ATP relaxes
+// toward the supply the condition allows and is used up by spikes; ion pumps and the
+// neurotransmitter pool follow the available ATP. from these, one flat pass per timestep
+// derives each neuron's shift of resting potential (failing pumps and leaky membranes
+// depolarize, and too much depolarization blocks firing), shift of threshold (low energy
+// raises it, oxidative stress lowers it) and synaptic efficacy (the transmitter pool
+// scales the neuron's synaptic input).
+// the condition's time course is precomputed, one entry per timestep from onset until
+// it stops changing, so a step costs the same however the condition is defined
+class MetabolicState {
+private:
+    std::vector<float> atp;
+    std::vector<float> ion_pump;
+    std::vector<float> transmitter;
+    
+    std::vector<float> rest_shift;
+    std::vector<float> threshold_shift;
+    std::vector<float> efficacy;
+    std::vector<unsigned char> blocked;
+    std::vector<int> block_onsets; // neurons that went into depolarization block in the last step
+    
+    std::vector<MetabolicLevels> course; // levels at onset + i; the last entry holds from then on
+    int onset_timestep;
+
+public:
+    MetabolicState();
+    
+    // healthy pools for neuron_count neurons, no condition
+    void reset(int neuron_count);
+    // precompute the time course of condition; the pools are kept
+    void set_condition(const MetabolicCondition& condition);
+    const MetabolicLevels& get_levels(int timestep) const;
+    
+    // advance the pools by one timestep and update the shifts and efficacy
+    void step(int timestep, const std::vector<int>& spiked_neurons);
+    
+    inline int size() const { return static_cast<int>(atp.size()); }
+    inline const std::vector<float>& get_atp() const { return atp; }
+    inline const std::vector<float>& get_ion_pump() const { return ion_pump; }
+    inline const std::vector<float>& get_transmitter() const { return transmitter; }
+    inline const float* get_rest_shift() const { return rest_shift.data(); }
+    inline const float* get_threshold_shift() const { return threshold_shift.data(); }
+    inline const float* get_efficacy() const { return efficacy.data(); }
+    // per neuron, 1 if in depolarization block; the threshold shift of a blocked
+    // neuron also puts its threshold out of reach
+    inline const unsigned char* get_blocked() const { return blocked.data(); }
+    inline const std::vector<int>& get_block_onsets() const { return block_onsets; }
+    // whether neuron_id is in depolarization block and cannot fire, not even when
+    // stimulated; false for neurons the state does not cover
+    inline bool is_blocked(int neuron_id) const { return neuron_id < size() && blocked[neuron_id]; }
+    
+    // pools and derived values, for checkpoints; the condition is set again on resuming
+    void save(CheckpointWriter& writer) const;
+    void load(CheckpointReader& reader);
+};
+
+#endif
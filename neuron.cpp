@@ -7,7 +7,7 @@ Neuron::Neuron(float soma_diam, int max_dend, bool excitatory, int type_id)
     : soma_diameter(soma_diam), membrane_potential(-70.0f), resting_potential(-70.0f),
       threshold_potential(-50.0f), is_spiking(false), refractory_period(0.0f),
       spike_amplitude(50.0f), dendrite_count(0), max_dendrites(max_dend),
-      is_excitatory(excitatory), neuron_type_id(type_id) {
+      spike_queue(nullptr), is_excitatory(excitatory), neuron_type_id(type_id) {
     
     dendrites = new Dendrite*[max_dendrites];
     for (int i = 0; i < max_dendrites; ++i) {
@@ -70,11 +70,15 @@ void Neuron::spike() {
     
     // propagate through axon
     if (axon != nullptr) {
-        axon->propagate_action_potential(spike_amplitude);
+        if (spike_queue != nullptr) {
+            axon->schedule_action_potential(*spike_queue, spike_amplitude);
+        } else {
+            axon->propagate_action_potential(spike_amplitude);
+        }
     }
 }
 
-bool Neuron::connect_to_neuron(Neuron* target_neuron, int target_dendrite_idx, 
+bool Neuron::connect_to_neuron(Neuron* target_neuron, int target_dendrite_idx,
                                float synapse_weight, bool inhibitory) {
     if (target_neuron == nullptr || target_dendrite_idx >= target_neuron->dendrite_count) {
         return false;
@@ -82,6 +86,7 @@ bool Neuron::connect_to_neuron(Neuron* target_neuron, int target_dendrite_idx,
     
     // create synapse
     Synapse* new_synapse = new Synapse(synapse_weight, -50.0f, inhibitory);
+    new_synapse->set_delay(axon->get_conduction_delay());
     
     // connect axon to synapse
     if (axon->add_output_synapse(new_synapse)) {
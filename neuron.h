@@ -1,6 +1,8 @@
 #ifndef NEURON_H
 #define NEURON_H
 
+#include "spike_queue.h"
+
 class Dendrite;
 class Axon;
 
@@ -20,11 +22,12 @@ protected:
     int max_dendrites;
     
     Axon* axon;                 // aingle axon (most neurons have one)
+    SpikeQueue<SynapticSignal>* spike_queue; // delayed delivery of spikes, if attached
     
     // neuron type classification
     bool is_excitatory;         // true for excitatory, false for inhibitory
     int neuron_type_id;         // specific neuron subtype identifier
-    
+
 public:
     explicit Neuron(float soma_diam = 20.0f, int max_dend = 10, bool excitatory = true, int type_id = 0);
     
@@ -32,7 +35,11 @@ public:
     virtual float integrate_inputs();
     virtual bool update_and_check_spike();
     virtual void spike();
-    bool connect_to_neuron(Neuron* target_neuron, int target_dendrite_idx = 0, 
+    
+    // with a queue attached, spikes are delivered after the synaptic delay instead of
+    // propagating immediately through the axon
+    inline void set_spike_queue(SpikeQueue<SynapticSignal>* queue) { spike_queue = queue; }
+    bool connect_to_neuron(Neuron* target_neuron, int target_dendrite_idx = 0,
                           float synapse_weight = 1.0f, bool inhibitory = false);
     
     inline float get_membrane_potential() const { return membrane_potential; }
@@ -43,6 +50,8 @@ public:
     inline Axon* get_axon() const { return axon; }
     inline float get_soma_diameter() const { return soma_diameter; }
     inline float get_threshold_potential() const { return threshold_potential; }
+    inline float get_resting_potential() const { return resting_potential; }
+    inline float get_refractory_period() const { return refractory_period; }
     inline float get_spike_amplitude() const { return spike_amplitude; }
     
     virtual ~Neuron();
@@ -0,0 +1,212 @@
+#include "neuron_models.h"
+#include <algorithm>
+#include <cmath>
+
+namespace {
+
+// substeps per 1 ms timestep of the AdEx kernel; its exponential term is too steep for
+// one Euler step near threshold
+constexpr int ADEX_SUBSTEPS = 4;
+// cap on the AdEx exponent; the potential has passed v_peak long before it is reached
+constexpr float ADEX_MAX_EXPONENT = 20.0f;
+// roots of 0.04 v^2 + 5 v + 140, the resting and threshold potentials of the Izhikevich
+// model without recovery
+constexpr float IZHIKEVICH_REST = -82.65564f;
+constexpr float IZHIKEVICH_THRESHOLD = -42.34436f;
+
+// metabolic shift of neuron i from its unmodulated value, 0 without modulation
+inline float shift(const float* __restrict value, const float* __restrict base, int i) {
+    return base ? value[i] - base[i] : 0.0f;
+}
+
+// whether neuron i is in depolarization block, false without modulation
+inline bool in_block(const unsigned char* __restrict blocked, int i) {
+    return blocked && blocked[i];
+}
+
+// the LEGACY update is split in two flat passes so that neither contains floating point
+// arithmetic on only one side of a condition, which keeps both auto-vectorizable.
+// first pass: candidate potentials and the per-neuron outcome
+// (state > 0: spikes, state == 0: passive decay, state < 0: refractory)
+void integrate_potentials(int n, const float* __restrict rest, const float* __restrict threshold,
+                          const float* __restrict input, const float* __restrict refractory,
+                          float* __restrict next_potential, float* __restrict next_refractory,
+                          int* __restrict state) {
+    for (int i = 0; i < n; ++i) {
+        float potential = rest[i] + input[i];
+        next_potential[i] = rest[i] + (potential - rest[i]) * 0.9f;
+        next_refractory[i] = refractory[i] - 1.0f;
+        state[i] = (potential >= threshold[i]) - 2 * (refractory[i] > 0.0f);
+    }
+}
+
+// second pass: pick the final potential and refractory counter by outcome
+void resolve_updates(int n, const float* __restrict rest, const float* __restrict amplitude,
+                     const float* __restrict refractory, float* __restrict next_potential,
+                     float* __restrict next_refractory, const int* __restrict state) {
+    for (int i = 0; i < n; ++i) {
+        int outcome = state[i];
+        float resting = rest[i];
+        float spike_potential = amplitude[i];
+        float decayed = next_potential[i];
+        float refractory_left = refractory[i];
+        float refractory_decremented = next_refractory[i];
+        float quiet_potential = outcome < 0 ? resting : decayed;
+        float quiet_refractory = outcome < 0 ? refractory_decremented : refractory_left;
+        next_potential[i] = outcome > 0 ? spike_potential : quiet_potential;
+        next_refractory[i] = outcome > 0 ? 2.0f : quiet_refractory;
+    }
+}
+
+void update_legacy(const DynamicsModel&, int begin, int end, const ModelArrays& a) {
+    const int n = end - begin;
+    integrate_potentials(n, a.rest + begin, a.threshold + begin, a.input + begin, a.refractory + begin,
+                         a.next_potential + begin, a.next_refractory + begin, a.state + begin);
+    resolve_updates(n, a.rest + begin, a.amplitude + begin, a.refractory + begin,
+                    a.next_potential + begin, a.next_refractory + begin, a.state + begin);
+}
+
+// the models below record a spike as a one-timestep peak and apply the reset on the
+// following (refractory) timestep, so spikes show in the recorded potentials as they
+// do for LEGACY neurons
+
+// tau_m dv/dt = v_rest - v + R*I, integrated exactly over the timestep
+void update_lif(const DynamicsModel& dynamics, int begin, int end, const ModelArrays& a) {
+    const LifParameters& p = dynamics.lif;
+    const float decay = std::exp(-1.0f / p.tau_m);
+    const float refractory_steps = std::max(p.refractory_ms, 1.0f);
+    const float* __restrict rest = a.rest;
+    const float* __restrict threshold = a.threshold;
+    const float* __restrict amplitude = a.amplitude;
+    const float* __restrict input = a.input;
+    const float* __restrict potential = a.potential;
+    const float* __restrict refractory = a.refractory;
+    float* __restrict next_potential = a.next_potential;
+    float* __restrict next_refractory = a.next_refractory;
+    int* __restrict state = a.state;
+    for (int i = begin; i < end; ++i) {
+        bool held = refractory[i] > 0.0f;
+        float steady = rest[i] + p.input_gain * input[i];
+        float v = steady + (potential[i] - steady) * decay;
+        bool spikes = !held && v >= threshold[i];
+        float quiet_potential = held ? p.v_reset : v;
+        next_potential[i] = spikes ? amplitude[i] : quiet_potential;
+        next_refractory[i] = spikes ? refractory_steps : std::max(refractory[i] - 1.0f, 0.0f);
+        state[i] = spikes;
+    }
+}
+
+// dv/dt = 0.04 v^2 + 5 v + 140 - u + I, du/dt = a (b v - u); v in two half steps
+// as in Izhikevich (2003). metabolic shifts move the roots of the quadratic, written as
+// 0.04 (v - v_r) (v - v_t) in the form of Izhikevich (2007), and the spike cutoff moves
+// with the threshold. a blocked neuron is held at its resting potential and does not spike
+void update_izhikevich(const DynamicsModel& dynamics, int begin, int end, const ModelArrays& a) {
+    const IzhikevichParameters& p = dynamics.izhikevich;
+    const float* __restrict rest = a.rest;
+    const float* __restrict threshold = a.threshold;
+    const float* __restrict base_rest = a.base_rest;
+    const float* __restrict base_threshold = a.base_threshold;
+    const unsigned char* __restrict blocked = a.blocked;
+    const float* __restrict input = a.input;
+    const float* __restrict potential = a.potential;
+    const float* __restrict refractory = a.refractory;
+    float* __restrict recovery = a.recovery;
+    float* __restrict next_potential = a.next_potential;
+    float* __restrict next_refractory = a.next_refractory;
+    int* __restrict state = a.state;
+    for (int i = begin; i < end; ++i) {
+        bool held = refractory[i] > 0.0f;
+        bool silent = in_block(blocked, i);
+        // the threshold of a blocked neuron is out of reach, not a shift of its dynamics
+        float rest_shift = silent ? 0.0f : shift(rest, base_rest, i);
+        float threshold_shift = silent ? 0.0f : shift(threshold, base_threshold, i);
+        float u = recovery[i];
+        float current = p.input_gain * input[i];
+        float v = potential[i];
+        // 0.04 (v - v_r - rest_shift) (v - v_t - threshold_shift) expanded around the unshifted form
+        float shifted = 0.04f * (threshold_shift * (v - IZHIKEVICH_REST) + rest_shift * (v - IZHIKEVICH_THRESHOLD)
+                                 - rest_shift * threshold_shift);
+        v += 0.5f * (0.04f * v * v + 5.0f * v + 140.0f - shifted - u + current);
+        shifted = 0.04f * (threshold_shift * (v - IZHIKEVICH_REST) + rest_shift * (v - IZHIKEVICH_THRESHOLD)
+                           - rest_shift * threshold_shift);
+        v += 0.5f * (0.04f * v * v + 5.0f * v + 140.0f - shifted - u + current);
+        v = silent ? rest[i] : v;
+        float next_u = u + p.a * (p.b * v - u);
+        float v_peak = p.v_peak + threshold_shift;
+        bool spikes = !held && !silent && v >= v_peak;
+        float quiet_potential = held ? p.c : v;
+        float quiet_recovery = held ? u : next_u;
+        next_potential[i] = spikes ? v_peak : quiet_potential;
+        recovery[i] = spikes ? next_u + p.d : quiet_recovery;
+        next_refractory[i] = spikes ? 1.0f : std::max(refractory[i] - 1.0f, 0.0f);
+        state[i] = spikes;
+    }
+}
+
+// C dv/dt = -g_l (v - e_l) + g_l delta_t exp((v - v_t) / delta_t) - w + I,
+// tau_w dw/dt = a (v - e_l) - w; forward Euler over ADEX_SUBSTEPS substeps. metabolic
+// shifts move e_l with the resting potential, and v_t and v_peak with the threshold.
+// a blocked neuron is held at its resting potential and does not spike
+void update_adex(const DynamicsModel& dynamics, int begin, int end, const ModelArrays& a) {
+    const AdExParameters& p = dynamics.adex;
+    const float dt = 1.0f / ADEX_SUBSTEPS;
+    const float* __restrict rest = a.rest;
+    const float* __restrict threshold = a.threshold;
+    const float* __restrict base_rest = a.base_rest;
+    const float* __restrict base_threshold = a.base_threshold;
+    const unsigned char* __restrict blocked = a.blocked;
+    const float* __restrict input = a.input;
+    const float* __restrict potential = a.potential;
+    const float* __restrict refractory = a.refractory;
+    float* __restrict recovery = a.recovery;
+    float* __restrict next_potential = a.next_potential;
+    float* __restrict next_refractory = a.next_refractory;
+    int* __restrict state = a.state;
+    for (int i = begin; i < end; ++i) {
+        bool held = refractory[i] > 0.0f;
+        bool silent = in_block(blocked, i);
+        float threshold_shift = silent ? 0.0f : shift(threshold, base_threshold, i);
+        float e_l = p.e_l + shift(rest, base_rest, i);
+        float v_t = p.v_t + threshold_shift;
+        float v_peak = p.v_peak + threshold_shift;
+        float w = recovery[i];
+        float current = p.input_gain * input[i];
+        float v = held ? p.v_reset : potential[i];
+        for (int step = 0; step < ADEX_SUBSTEPS; ++step) {
+            float exponent = std::min((v - v_t) / p.delta_t, ADEX_MAX_EXPONENT);
+            float dv = (-p.g_l * (v - e_l) + p.g_l * p.delta_t * std::exp(exponent) - w + current) / p.c_m;
+            float dw = (p.a * (v - e_l) - w) / p.tau_w;
+            v = silent ? e_l : std::min(v + dt * dv, v_peak);
+            w += dt * dw;
+        }
+        bool spikes = !held && !silent && v >= v_peak;
+        float quiet_potential = held ? p.v_reset : v;
+        next_potential[i] = spikes ? v_peak : quiet_potential;
+        recovery[i] = spikes ? w + p.b : w;
+        next_refractory[i] = spikes ? 1.0f : std::max(refractory[i] - 1.0f, 0.0f);
+        state[i] = spikes;
+    }
+}
+
+using ModelKernel = void (*)(const DynamicsModel&, int, int, const ModelArrays&);
+
+// kernels by NeuronModel, in declaration order
+const ModelKernel MODEL_KERNELS[] = {
+    update_legacy,
+    update_lif,
+    update_izhikevich,
+    update_adex
+};
+
+} // namespace
+
+void update_group(const NeuronGroup& group, const ModelArrays& arrays) {
+    MODEL_KERNELS[static_cast<int>(group.dynamics.model)](group.dynamics, group.begin, group.end, arrays);
+}
+
+float initial_recovery(const DynamicsModel& dynamics, float potential) {
+    if (dynamics.model == NeuronModel::IZHIKEVICH) {
+        return dynamics.izhikevich.b * potential;
+    }
+    return 0.0f;
+}
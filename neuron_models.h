@@ -0,0 +1,98 @@
+#ifndef NEURON_MODELS_H
+#define NEURON_MODELS_H
+
+// neuron dynamics models of the SOA engine. every neuron type of a PopulationSpec
+// takes its model and parameters from a DynamicsModel, and the neurons of one type
+// are contiguous, so each type is updated by one kernel call per timestep: a flat
+// loop over its block of the state arrays, with no per-neuron dispatch.
+// timesteps are 1 ms; synaptic input is in mV, scaled by input_gain into the units
+// of each model. to add a model, add it to NeuronModel, give it a parameter struct
+// in DynamicsModel and register its kernel in neuron_models.cpp
+
+enum class NeuronModel {
+    LEGACY,     // the object model's update: rest + input, threshold, 0.9 decay
+    LIF,        // leaky integrate-and-fire with a membrane time constant
+    IZHIKEVICH, // Izhikevich (2003) quadratic model with a recovery variable
+    ADEX        // adaptive exponential integrate-and-fire (Brette & Gerstner 2005)
+};
+
+struct LifParameters {
+    float tau_m = 20.0f;         // membrane time constant (ms)
+    float v_reset = -70.0f;      // potential after a spike (mV)
+    float refractory_ms = 2.0f;  // held at v_reset for this long after a spike
+    float input_gain = 1.0f;     // synaptic input to R*I (mV)
+};
+
+// defaults are the regular spiking cell
+struct IzhikevichParameters {
+    float a = 0.02f;             // recovery time scale
+    float b = 0.2f;              // recovery sensitivity to v
+    float c = -65.0f;            // reset potential (mV)
+    float d = 8.0f;              // recovery increment after a spike
+    float v_peak = 30.0f;        // spike cutoff (mV)
+    float input_gain = 1.0f;     // synaptic input to I
+};
+
+// defaults are the cortical pyramidal cell fit of Brette & Gerstner
+struct AdExParameters {
+    float c_m = 281.0f;          // membrane capacitance (pF)
+    float g_l = 30.0f;           // leak conductance (nS)
+    float e_l = -70.6f;          // leak reversal potential (mV)
+    float v_t = -50.4f;          // threshold slope potential (mV)
+    float delta_t = 2.0f;        // slope factor (mV)
+    float tau_w = 144.0f;        // adaptation time constant (ms)
+    float a = 4.0f;              // subthreshold adaptation (nS)
+    float b = 80.5f;             // spike-triggered adaptation (pA)
+    float v_reset = -70.6f;      // potential after a spike (mV)
+    float v_peak = 20.0f;        // spike cutoff (mV)
+    float input_gain = 30.0f;    // synaptic input (mV) to current (pA); g_l makes input a steady-state offset
+};
+
+// model of one neuron type; only the parameters of the selected model are used
+struct DynamicsModel {
+    NeuronModel model = NeuronModel::LEGACY;
+    LifParameters lif;
+    IzhikevichParameters izhikevich;
+    AdExParameters adex;
+};
+
+// contiguous block of neurons [begin, end) sharing one model
+struct NeuronGroup {
+    int begin;
+    int end;
+    DynamicsModel dynamics;
+};
+
+// state arrays of the whole population, indexed by neuron id. a kernel reads the
+// current state and writes the next potential, refractory time and outcome
+// (state > 0: spiked) of its group; recovery (Izhikevich u, AdEx w) is updated in place
+struct ModelArrays {
+    const float* rest;
+    const float* threshold;
+    // rest and threshold before metabolic modulation, null if the population is not
+    // modulated; the Izhikevich and AdEx kernels apply the difference as shifts of their
+    // own resting and threshold potentials
+    const float* base_rest;
+    const float* base_threshold;
+    // per neuron, nonzero in depolarization block, null if not modulated. the threshold
+    // of a blocked neuron is out of reach, which silences LEGACY and LIF neurons; the
+    // Izhikevich and AdEx kernels hold blocked neurons at their resting potential instead
+    // of shifting their dynamics by it
+    const unsigned char* blocked;
+    const float* amplitude;
+    const float* input;
+    const float* potential;
+    const float* refractory;
+    float* recovery;
+    float* next_potential;
+    float* next_refractory;
+    int* state;
+};
+
+// one timestep of a group with its model's kernel
+void update_group(const NeuronGroup& group, const ModelArrays& arrays);
+
+// recovery variable of a neuron starting at the given potential
+float initial_recovery(const DynamicsModel& dynamics, float potential);
+
+#endif
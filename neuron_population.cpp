@@ -0,0 +1,327 @@
+#include "neuron_population.h"
+#include "neuron.h"
+#include <stdexcept>
+
+NeuronPopulation::NeuronPopulation() : integration(SynapticIntegration::STATIC) {}
+
+void NeuronPopulation::clear() {
+    membrane_potential.clear();
+    resting_potential.clear();
+    threshold_potential.clear();
+    refractory_period.clear();
+    spike_amplitude.clear();
+    synaptic_input.clear();
+    static_input.clear();
+    excitatory_input.clear();
+    inhibitory_input.clear();
+    recovery.clear();
+    legacy_dynamics.clear();
+    groups.clear();
+    base_resting_potential.clear();
+    base_threshold_potential.clear();
+    input_efficacy.clear();
+    depolarization_block.clear();
+    synapses.clear();
+    spike_queue.reset(2);
+    delivering.clear();
+    plasticity.clear();
+    transmitted.clear();
+    fired.clear();
+    forced.clear();
+    input_changes.clear();
+    scratch_potential.clear();
+    scratch_refractory.clear();
+    update_state.clear();
+}
+
+void NeuronPopulation::build_from_neurons(const std::vector<Neuron*>& neurons, SynapticIntegration mode,
+                                          const std::vector<NeuronGroup>& neuron_groups) {
+    clear();
+    const int n = static_cast<int>(neurons.size());
+    integration = mode;
+    
+    groups = neuron_groups;
+    if (groups.empty() && n > 0) {
+        groups.push_back(NeuronGroup{0, n, DynamicsModel()});
+    }
+    int covered = 0;
+    for (const NeuronGroup& group : groups) {
+        if (group.begin != covered || group.end < group.begin) {
+            throw std::invalid_argument("neuron groups must cover the population in order");
+        }
+        covered = group.end;
+    }
+    if (covered != n) {
+        throw std::invalid_argument("neuron groups must cover the population in order");
+    }
+    
+    membrane_potential.resize(n);
+    resting_potential.resize(n);
+    threshold_potential.resize(n);
+    refractory_period.resize(n);
+    spike_amplitude.resize(n);
+    static_input.resize(n);
+    
+    for (int i = 0; i < n; ++i) {
+        const Neuron* neuron = neurons[i];
+        membrane_potential[i] = neuron->get_membrane_potential();
+        resting_potential[i] = neuron->get_resting_potential();
+        threshold_potential[i] = neuron->get_threshold_potential();
+        refractory_period[i] = neuron->get_refractory_period();
+        spike_amplitude[i] = neuron->get_spike_amplitude();
+        // summed once here, in the same order as Neuron::integrate_inputs()
+        static_input[i] = neurons[i]->integrate_inputs();
+    }
+    synapses.build_from_neurons(neurons);
+    
+    synaptic_input = (integration == SynapticIntegration::STATIC) ? static_input : std::vector<float>(n, 0.0f);
+    excitatory_input.assign(n, 0.0f);
+    inhibitory_input.assign(n, 0.0f);
+    scratch_potential.resize(n);
+    scratch_refractory.resize(n);
+    update_state.resize(n, 0);
+    spike_queue.reset(synapses.get_max_delay() + 1);
+    
+    recovery.assign(n, 0.0f);
+    legacy_dynamics.assign(n, 0);
+    for (const NeuronGroup& group : groups) {
+        for (int i = group.begin; i < group.end; ++i) {
+            recovery[i] = initial_recovery(group.dynamics, membrane_potential[i]);
+            legacy_dynamics[i] = group.dynamics.model == NeuronModel::LEGACY;
+        }
+    }
+}
+
+bool NeuronPopulation::step_neuron(int neuron_id) {
+    // scalar form of Neuron::update_and_check_spike(), without propagation
+    if (refractory_period[neuron_id] > 0.0f) {
+        refractory_period[neuron_id] -= 1.0f;
+        membrane_potential[neuron_id] = resting_potential[neuron_id];
+        return false;
+    }
+    
+    float rest = resting_potential[neuron_id];
+    float potential = rest + synaptic_input[neuron_id];
+    if (potential >= threshold_potential[neuron_id]) {
+        membrane_potential[neuron_id] = spike_amplitude[neuron_id];
+        refractory_period[neuron_id] = 2.0f;
+        return true;
+    }
+    
+    if (potential != rest) {
+        potential = rest + (potential - rest) * 0.9f;
+    }
+    membrane_potential[neuron_id] = potential;
+    return false;
+}
+
+void NeuronPopulation::schedule_row(int neuron_id) {
+    float amplitude = spike_amplitude[neuron_id];
+    for (int idx = synapses.row_begin(neuron_id); idx < synapses.row_end(neuron_id); ++idx) {
+        spike_queue.schedule(synapses.get_delay(idx), IndexedSignal{idx, amplitude});
+    }
+}
+
+void NeuronPopulation::spike(int neuron_id) {
+    membrane_potential[neuron_id] = spike_amplitude[neuron_id];
+    refractory_period[neuron_id] = 2.0f;
+    if (plasticity.enabled()) forced.push_back(neuron_id);
+    schedule_row(neuron_id);
+}
+
+void NeuronPopulation::deliver_spikes(int timestep) {
+    spike_queue.advance_to(timestep);
+    spike_queue.take_due(delivering);
+    
+    for (const IndexedSignal& signal : delivering) {
+        int idx = signal.synapse;
+        if (!synapses.transmits(idx, signal.amplitude)) continue;
+        if (plasticity.enabled()) transmitted.push_back(signal);
+        int target = synapses.get_target(idx);
+        
+        if (integration == SynapticIntegration::EVENT_DRIVEN) {
+            if (synapses.is_inhibitory(idx)) {
+                inhibitory_input[target] += synapses.get_weight(idx);
+            } else {
+                excitatory_input[target] += synapses.get_weight(idx);
+            }
+        } else if (legacy_dynamics[target] && step_neuron(target)) {
+            // Dendrite::update_membrane_potential() updates the parent on every delivery
+            if (plasticity.enabled()) fired.push_back(target);
+            schedule_row(target);
+        }
+    }
+}
+
+void NeuronPopulation::collect_event_input() {
+    const int n = size();
+    float* input = synaptic_input.data();
+    float* excitatory = excitatory_input.data();
+    float* inhibitory = inhibitory_input.data();
+    if (input_efficacy.empty()) {
+        for (int i = 0; i < n; ++i) {
+            input[i] = excitatory[i] - inhibitory[i];
+            excitatory[i] = 0.0f;
+            inhibitory[i] = 0.0f;
+        }
+    } else {
+        const float* efficacy = input_efficacy.data();
+        for (int i = 0; i < n; ++i) {
+            input[i] = (excitatory[i] - inhibitory[i]) * efficacy[i];
+            excitatory[i] = 0.0f;
+            inhibitory[i] = 0.0f;
+        }
+    }
+}
+
+void NeuronPopulation::modulate(const float* rest_shift, const float* threshold_shift, const unsigned char* blocked,
+                                const float* efficacy) {
+    const int n = size();
+    if (base_resting_potential.empty()) {
+        base_resting_potential = resting_potential;
+        base_threshold_potential = threshold_potential;
+    }
+    input_efficacy.assign(efficacy, efficacy + n);
+    depolarization_block.assign(blocked, blocked + n);
+    
+    float* __restrict rest = resting_potential.data();
+    float* __restrict threshold = threshold_potential.data();
+    const float* __restrict base_rest = base_resting_potential.data();
+    const float* __restrict base_threshold = base_threshold_potential.data();
+    for (int i = 0; i < n; ++i) {
+        rest[i] = base_rest[i] + rest_shift[i];
+        threshold[i] = base_threshold[i] + threshold_shift[i];
+    }
+    // event-driven input is scaled as it is collected
+    if (integration == SynapticIntegration::STATIC) {
+        float* __restrict input = synaptic_input.data();
+        const float* __restrict fixed_input = static_input.data();
+        for (int i = 0; i < n; ++i) {
+            input[i] = fixed_input[i] * efficacy[i];
+        }
+    }
+}
+
+void NeuronPopulation::enable_plasticity(const PlasticityParameters& parameters) {
+    plasticity.reset(parameters, synapses);
+    transmitted.clear();
+    fired.clear();
+    forced.clear();
+}
+
+void NeuronPopulation::apply_plasticity(int timestep) {
+    // STATIC input is the sum of the weights; event-driven deliveries read them directly
+    const bool static_integration = integration == SynapticIntegration::STATIC;
+    input_changes.clear();
+    plasticity.update(timestep, transmitted, fired, forced, synapses, static_integration ? &input_changes : nullptr);
+    transmitted.clear();
+    fired.clear();
+    forced.clear();
+    
+    if (static_integration) {
+        for (const InputChange& input : input_changes) {
+            static_input[input.neuron] += input.change;
+            synaptic_input[input.neuron] += input_efficacy.empty() ? input.change
+                                                                   : input.change * input_efficacy[input.neuron];
+        }
+    }
+}
+
+int NeuronPopulation::update_and_check_spikes(std::vector<int>& spiked_neurons) {
+    spiked_neurons.clear();
+    const int n = size();
+    
+    if (integration == SynapticIntegration::EVENT_DRIVEN) {
+        collect_event_input();
+    }
+    
+    // spikes only take effect after their synaptic delay, so every neuron
+    // updates independently of the others within a timestep
+    const bool modulated = !base_resting_potential.empty();
+    const ModelArrays arrays{resting_potential.data(), threshold_potential.data(),
+                             modulated ? base_resting_potential.data() : nullptr,
+                             modulated ? base_threshold_potential.data() : nullptr,
+                             modulated ? depolarization_block.data() : nullptr, spike_amplitude.data(),
+                             synaptic_input.data(), membrane_potential.data(), refractory_period.data(),
+                             recovery.data(), scratch_potential.data(), scratch_refractory.data(),
+                             update_state.data()};
+    for (const NeuronGroup& group : groups) {
+        update_group(group, arrays);
+    }
+    
+    membrane_potential.swap(scratch_potential);
+    refractory_period.swap(scratch_refractory);
+    
+    for (int i = 0; i < n; ++i) {
+        if (update_state[i] > 0) {
+            spiked_neurons.push_back(i);
+            schedule_row(i);
+        }
+    }
+    if (plasticity.enabled()) {
+        fired.insert(fired.end(), spiked_neurons.begin(), spiked_neurons.end());
+    }
+    
+    return static_cast<int>(spiked_neurons.size());
+}
+
+void NeuronPopulation::save(CheckpointWriter& writer) const {
+    writer.write(integration);
+    writer.write_vector(membrane_potential);
+    writer.write_vector(resting_potential);
+    writer.write_vector(threshold_potential);
+    writer.write_vector(refractory_period);
+    writer.write_vector(spike_amplitude);
+    writer.write_vector(synaptic_input);
+    writer.write_vector(static_input);
+    writer.write_vector(excitatory_input);
+    writer.write_vector(inhibitory_input);
+    writer.write_vector(recovery);
+    writer.write_vector(legacy_dynamics);
+    writer.write_vector(groups);
+    writer.write_vector(base_resting_potential);
+    writer.write_vector(base_threshold_potential);
+    writer.write_vector(input_efficacy);
+    writer.write_vector(depolarization_block);
+    synapses.save(writer);
+    spike_queue.save(writer);
+    writer.write(plasticity.enabled());
+    if (plasticity.enabled()) {
+        plasticity.save(writer);
+        writer.write_vector(fired);
+        writer.write_vector(forced);
+    }
+}
+
+void NeuronPopulation::load(CheckpointReader& reader) {
+    clear();
+    integration = reader.read<SynapticIntegration>();
+    reader.read_vector(membrane_potential);
+    reader.read_vector(resting_potential);
+    reader.read_vector(threshold_potential);
+    reader.read_vector(refractory_period);
+    reader.read_vector(spike_amplitude);
+    reader.read_vector(synaptic_input);
+    reader.read_vector(static_input);
+    reader.read_vector(excitatory_input);
+    reader.read_vector(inhibitory_input);
+    reader.read_vector(recovery);
+    reader.read_vector(legacy_dynamics);
+    reader.read_vector(groups);
+    reader.read_vector(base_resting_potential);
+    reader.read_vector(base_threshold_potential);
+    reader.read_vector(input_efficacy);
+    reader.read_vector(depolarization_block);
+    synapses.load(reader);
+    spike_queue.load(reader);
+    if (reader.read<bool>()) {
+        plasticity.load(reader, synapses);
+        reader.read_vector(fired);
+        reader.read_vector(forced);
+    }
+    
+    const int n = size();
+    scratch_potential.resize(n);
+    scratch_refractory.resize(n);
+    update_state.resize(n, 0);
+}
@@ -0,0 +1,126 @@
+#ifndef NEURON_POPULATION_H
+#define NEURON_POPULATION_H
+
+#include <vector>
+#include "synapse_matrix.h"
+#include "spike_queue.h"
+#include "neuron_models.h"
+#include "plasticity.h"
+
+class Neuron;
+
+enum class SynapticIntegration {
+    STATIC,      // every attached synapse contributes on every update, as in Dendrite
+    EVENT_DRIVEN // only synapses whose presynaptic neuron spiked deliver input
+};
+
+// structure-of-arrays neuron engine: the state of every neuron lives in contiguous
+// arrays indexed by neuron id, so the per-timestep update is one flat loop instead
+// of a virtual call per neuron object. spikes are queued per synapse and delivered
+// after the synaptic delay, in the same order as the object model's SpikeQueue.
+// with STATIC integration a delivery updates its target like Dendrite does, so the
+// dynamics match the object model exactly. with EVENT_DRIVEN integration a delivery
+// adds the synapse weight to the input channels of its target, which are consumed
+// by the next update, so the cost per timestep scales with active synapses only.
+// each group of neurons is updated by the kernel of its dynamics model (see
+// neuron_models.h); only LEGACY neurons are updated by STATIC deliveries.
+// with plasticity enabled, the weights of the synapse matrix change with the spikes of
+// each timestep (see SynapticPlasticity), and STATIC input follows the weights.
+class NeuronPopulation {
+private:
+    // per-neuron state
+    std::vector<float> membrane_potential;  // current membrane potential in mV
+    std::vector<float> resting_potential;   // resting membrane potential in mV
+    std::vector<float> threshold_potential; // action potential threshold in mV
+    std::vector<float> refractory_period;   // time until next spike possible (ms)
+    std::vector<float> spike_amplitude;     // action potential amplitude in mV
+    std::vector<float> synaptic_input;      // input used by the next update
+    std::vector<float> static_input;        // summed contribution of all incoming synapses
+    std::vector<float> excitatory_input;    // event-driven input accumulated since the last update
+    std::vector<float> inhibitory_input;
+    std::vector<float> recovery;            // Izhikevich u / AdEx w
+    std::vector<unsigned char> legacy_dynamics;
+    
+    std::vector<NeuronGroup> groups;
+    
+    // metabolic modulation; empty until modulate() is first called
+    std::vector<float> base_resting_potential;
+    std::vector<float> base_threshold_potential;
+    std::vector<float> input_efficacy;
+    std::vector<unsigned char> depolarization_block;
+    
+    SynapseMatrix synapses;
+    SynapticIntegration integration;
+    
+    SpikeQueue<IndexedSignal> spike_queue;
+    std::vector<IndexedSignal> delivering;
+    
+    SynapticPlasticity plasticity;
+    // arrivals of the timestep that transmitted, for plasticity
+    std::vector<IndexedSignal> transmitted;
+    // spikes of the timestep for plasticity: evoked by input, and forced by spike()
+    std::vector<int> fired;
+    std::vector<int> forced;
+    std::vector<InputChange> input_changes;
+    
+    // the vectorized update passes write into these, which are then swapped with the state arrays
+    std::vector<float> scratch_potential;
+    std::vector<float> scratch_refractory;
+    std::vector<int> update_state;
+    
+    bool step_neuron(int neuron_id);
+    void schedule_row(int neuron_id);
+    void collect_event_input();
+
+public:
+    NeuronPopulation();
+    
+    // compile state and connectivity from an object-model network. groups must cover
+    // the neurons in order; without groups every neuron uses the LEGACY model
+    void build_from_neurons(const std::vector<Neuron*>& neurons,
+                            SynapticIntegration mode = SynapticIntegration::STATIC,
+                            const std::vector<NeuronGroup>& neuron_groups = {});
+    void clear();
+    
+    // complete state, pending spikes included, for checkpoints
+    void save(CheckpointWriter& writer) const;
+    void load(CheckpointReader& reader);
+    
+    // shift resting and threshold potentials from their built values, scale the synaptic
+    // input of each neuron and mark the neurons in depolarization block (see
+    // MetabolicState); takes effect from the next delivery or update
+    void modulate(const float* rest_shift, const float* threshold_shift, const unsigned char* blocked,
+                  const float* efficacy);
+    
+    // learn from the spikes of every timestep from now on; throws std::invalid_argument
+    // on invalid parameters
+    void enable_plasticity(const PlasticityParameters& parameters);
+    // apply the weight changes of this timestep; call once per timestep after updating
+    void apply_plasticity(int timestep);
+    
+    // force an action potential, queueing it on every outgoing synapse like Neuron::spike()
+    void spike(int neuron_id);
+    
+    // deliver the spikes that arrive at this timestep; call once per timestep before updating
+    void deliver_spikes(int timestep);
+    
+    // update every neuron once, as the object model's main loop does;
+    // ids of neurons that spiked are written to spiked_neurons in ascending order
+    int update_and_check_spikes(std::vector<int>& spiked_neurons);
+    
+    inline int size() const { return static_cast<int>(membrane_potential.size()); }
+    inline int get_synapse_count() const { return synapses.get_synapse_count(); }
+    inline const SynapseMatrix& get_synapses() const { return synapses; }
+    inline size_t get_pending_spike_count() const { return spike_queue.get_pending_count(); }
+    // deliveries made by the last deliver_spikes() call
+    inline size_t get_delivered_count() const { return delivering.size(); }
+    inline size_t get_queue_capacity() const { return spike_queue.get_buffer_capacity() + delivering.capacity(); }
+    inline SynapticIntegration get_synaptic_integration() const { return integration; }
+    inline const std::vector<NeuronGroup>& get_groups() const { return groups; }
+    inline bool has_plasticity() const { return plasticity.enabled(); }
+    inline const PlasticityParameters& get_plasticity_parameters() const { return plasticity.get_parameters(); }
+    inline float get_membrane_potential(int neuron_id) const { return membrane_potential[neuron_id]; }
+    inline const std::vector<float>& get_membrane_potentials() const { return membrane_potential; }
+};
+
+#endif
@@ -1,128 +1,459 @@
 #include "neuron_simulator.h"
 #include "neuron_types.h"
+#include "axon.h"
+#include "synapse.h"
+#include "npy_writer.h"
+#include "checkpoint.h"
 #include <iostream>
 #include <fstream>
 #include <algorithm>
 #include <numeric>
 #include <cmath>
-#include <cstdlib>
 #include <iomanip>
+#include <stdexcept>
+#include <thread>
+#include <atomic>
+#include <exception>
+#include <functional>
+#include <limits>
 
-NeuronSimulator::NeuronSimulator() {
-    for (int i = 0; i < NEURON_COUNT; ++i) {
-        neurons[i] = nullptr;
+namespace {
+
+// appended to a periodic checkpoint's path for the journal of its in-memory recordings
+const char RECORDING_JOURNAL_SUFFIX[] = ".recording";
+
+void validate_population_spec(const PopulationSpec& spec) {
+    if (spec.pyramidal_count < 0 || spec.interneuron_count < 0 || spec.purkinje_count < 0 ||
+        spec.motor_count < 0 || spec.sensory_count < 0) {
+        throw std::invalid_argument("PopulationSpec: neuron counts must be non-negative");
+    }
+    if (spec.total_size() < 1) {
+        throw std::invalid_argument("PopulationSpec: network needs at least one neuron");
+    }
+    if (spec.connection_density < 0) {
+        throw std::invalid_argument("PopulationSpec: connection_density must be non-negative");
+    }
+    for (const NeuronGroup& group : spec.neuron_groups()) {
+        const DynamicsModel& dynamics = group.dynamics;
+        if (dynamics.lif.tau_m <= 0.0f) {
+            throw std::invalid_argument("PopulationSpec: LIF tau_m must be positive");
+        }
+        if (dynamics.adex.c_m <= 0.0f || dynamics.adex.delta_t <= 0.0f || dynamics.adex.tau_w <= 0.0f) {
+            throw std::invalid_argument("PopulationSpec: AdEx c_m, delta_t and tau_w must be positive");
+        }
+    }
+}
+
+// calls task(0) ... task(count - 1) on a pool of workers threads (0: one per core);
+// the first exception is rethrown once all workers have stopped
+void run_parallel(size_t count, int workers, const std::function<void(size_t)>& task) {
+    std::atomic<size_t> next(0);
+    std::exception_ptr failure;
+    std::atomic<bool> failed(false);
+    auto worker = [&]() {
+        for (size_t i = next++; i < count && !failed; i = next++) {
+            try {
+                task(i);
+            } catch (...) {
+                if (!failed.exchange(true)) {
+                    failure = std::current_exception();
+                }
+            }
+        }
+    };
+    
+    if (workers <= 0) {
+        workers = static_cast<int>(std::max(1u, std::thread::hardware_concurrency()));
+    }
+    workers = static_cast<int>(std::min<size_t>(workers, count));
+    std::vector<std::thread> pool;
+    for (int w = 1; w < workers; ++w) {
+        pool.emplace_back(worker);
+    }
+    worker();
+    for (std::thread& thread : pool) {
+        thread.join();
+    }
+    
+    if (failure) {
+        std::rethrow_exception(failure);
     }
-    sim_data.total_timesteps = 0;
-    sim_data.total_spikes = 0;
+}
+
+} // namespace
+
+std::vector<BatchResult> NeuronSimulator::batch_results(const std::vector<MetabolicCondition>& conditions,
+                                                        const std::vector<uint64_t>& seeds,
+                                                        const std::vector<int>& max_timesteps) const {
+    if (seeds.empty()) {
+        throw std::invalid_argument("batch: at least one seed is required");
+    }
+    if (max_timesteps.size() != 1 && max_timesteps.size() != conditions.size()) {
+        throw std::invalid_argument("batch: max_timesteps needs one entry per condition or a single entry");
+    }
+    
+    std::vector<BatchResult> results(conditions.size() * seeds.size());
+    for (size_t c = 0; c < conditions.size(); ++c) {
+        for (size_t s = 0; s < seeds.size(); ++s) {
+            BatchResult& result = results[c * seeds.size() + s];
+            result.condition = conditions[c];
+            result.seed = seeds[s];
+            result.max_timesteps = max_timesteps.size() == 1 ? max_timesteps[0] : max_timesteps[c];
+        }
+    }
+    return results;
+}
+
+RecordingOptions NeuronSimulator::batch_recording_options() const {
+    // streamed runs would all write to the same sink
+    RecordingOptions options = recorder.get_options();
+    options.output_prefix.clear();
+    return options;
+}
+
+PopulationSpec PopulationSpec::scaled_to(int total_size) const {
+    int current_total = this->total_size();
+    if (total_size < 1 || current_total < 1) {
+        throw std::invalid_argument("PopulationSpec: total size must be positive");
+    }
+    
+    // largest remainder: each type gets the floor of its exact share, and the neurons
+    // left over go one each to the types with the largest fractional parts (the earlier
+    // type on ties). a type with no neurons has no share and gets none
+    PopulationSpec scaled = *this;
+    int* counts[] = {&scaled.pyramidal_count, &scaled.interneuron_count, &scaled.purkinje_count,
+                     &scaled.motor_count, &scaled.sensory_count};
+    std::vector<std::pair<int64_t, int>> remainders; // (share remainder, type)
+    int assigned = 0;
+    for (int type = 0; type < 5; ++type) {
+        const int64_t share = static_cast<int64_t>(*counts[type]) * total_size;
+        *counts[type] = static_cast<int>(share / current_total);
+        assigned += *counts[type];
+        remainders.emplace_back(share % current_total, type);
+    }
+    std::stable_sort(remainders.begin(), remainders.end(),
+                     [](const auto& a, const auto& b) { return a.first > b.first; });
+    for (int i = 0; i < total_size - assigned; ++i) {
+        (*counts[remainders[i].second])++;
+    }
+    return scaled;
+}
+
+std::vector<NeuronGroup> PopulationSpec::neuron_groups() const {
+    const std::pair<int, const DynamicsModel*> blocks[] = {
+        {pyramidal_count, &pyramidal_dynamics},
+        {interneuron_count, &interneuron_dynamics},
+        {purkinje_count, &purkinje_dynamics},
+        {motor_count, &motor_dynamics},
+        {sensory_count, &sensory_dynamics}
+    };
+    std::vector<NeuronGroup> groups;
+    int begin = 0;
+    for (const auto& block : blocks) {
+        if (block.first > 0) {
+            groups.push_back(NeuronGroup{begin, begin + block.first, *block.second});
+            begin += block.first;
+        }
+    }
+    return groups;
+}
+
+bool PopulationSpec::uses_legacy_dynamics() const {
+    for (const NeuronGroup& group : neuron_groups()) {
+        if (group.dynamics.model != NeuronModel::LEGACY) return false;
+    }
+    return true;
+}
+
+NeuronSimulator::NeuronSimulator() {}
+
+NeuronSimulator::NeuronSimulator(const PopulationSpec& spec, uint64_t seed) : NeuronSimulator() {
+    set_population_spec(spec);
+    set_seed(seed);
 }
 
 NeuronSimulator::~NeuronSimulator() {
     cleanup_neurons();
 }
 
+void NeuronSimulator::set_population_spec(const PopulationSpec& spec) {
+    validate_population_spec(spec);
+    population = spec;
+}
+
 void NeuronSimulator::initialize_neurons() {
     cleanup_neurons();
-    neurons[0] = new PyramidalNeuron();
-    neurons[1] = new PyramidalNeuron();
-    neurons[2] = new PyramidalNeuron();
-    neurons[3] = new PyramidalNeuron();
-    neurons[4] = new Interneuron();
-    neurons[5] = new PurkinjeNeuron();
-    neurons[6] = new MotorNeuron();
-    neurons[7] = new MotorNeuron();
-    neurons[8] = new SensoryNeuron();
-    neurons[9] = new SensoryNeuron();
+    neurons.reserve(population.total_size());
+    
+    // neurons are laid out in contiguous blocks per type
+    for (int i = 0; i < population.pyramidal_count; ++i) neurons.push_back(new PyramidalNeuron());
+    for (int i = 0; i < population.interneuron_count; ++i) neurons.push_back(new Interneuron());
+    for (int i = 0; i < population.purkinje_count; ++i) neurons.push_back(new PurkinjeNeuron());
+    for (int i = 0; i < population.motor_count; ++i) neurons.push_back(new MotorNeuron());
+    for (int i = 0; i < population.sensory_count; ++i) neurons.push_back(new SensoryNeuron());
 }
 
 void NeuronSimulator::cleanup_neurons() {
-    for (int i = 0; i < NEURON_COUNT; ++i) {
-        delete neurons[i];
-        neurons[i] = nullptr;
+    for (Neuron* neuron : neurons) {
+        delete neuron;
     }
+    neurons.clear();
 }
 
 void NeuronSimulator::create_random_connections(int connection_density) {
-    for (int i = 0; i < NEURON_COUNT; ++i) {
+    const int neuron_count = static_cast<int>(neurons.size());
+    for (int i = 0; i < neuron_count; ++i) {
         for (int j = 0; j < connection_density; ++j) {
-            int target = rand() % NEURON_COUNT;
+            int target = rng.next_int(neuron_count);
             if (target != i && neurons[target]->get_dendrite_count() > 0) {
-                int target_dendrite = rand() % neurons[target]->get_dendrite_count();
-                float weight = 1.5f + static_cast<float>(rand()) / RAND_MAX * 3.0f;
-                bool inhibitory = !neurons[i]->get_is_excitatory() || (rand() % 8 == 0);
+                int target_dendrite = rng.next_int(neurons[target]->get_dendrite_count());
+                float weight = 1.5f + rng.next_float() * 3.0f;
+                bool inhibitory = !neurons[i]->get_is_excitatory() || (rng.next_int(8) == 0);
                 neurons[i]->connect_to_neuron(neurons[target], target_dendrite, weight, inhibitory);
             }
         }
     }
 }
 
-void NeuronSimulator::collect_membrane_data() {
-    std::vector<float> potentials;
-    float total_potential = 0.0f;
+void NeuronSimulator::build_network() {
+    PhaseTimer timer(profile(perf.build_seconds));
+    if (engine == SimulationEngine::OBJECT && integration != SynapticIntegration::STATIC) {
+        throw std::invalid_argument("event-driven synaptic integration requires the SOA engine");
+    }
+    if (engine == SimulationEngine::OBJECT && !population.uses_legacy_dynamics()) {
+        throw std::invalid_argument("neuron models other than LEGACY require the SOA engine");
+    }
+    if (engine == SimulationEngine::OBJECT && checkpoint_interval > 0) {
+        throw std::invalid_argument("checkpoints require the SOA engine");
+    }
+    if (engine == SimulationEngine::OBJECT && metabolic_model_enabled) {
+        throw std::invalid_argument("the metabolic model requires the SOA engine");
+    }
+    if (engine == SimulationEngine::OBJECT && plasticity_enabled) {
+        throw std::invalid_argument("plasticity requires the SOA engine");
+    }
+    
+    rng.reseed(seed);
+    next_timestep = 0;
+    metabolism.reset(metabolic_model_enabled ? population.total_size() : 0);
+    
+    // pending deliveries point into the network that is about to be replaced
+    spike_queue.reset(2);
+    initialize_neurons();
+    create_random_connections(population.connection_density);
     
-    for (int i = 0; i < NEURON_COUNT; ++i) {
-        float potential = neurons[i]->get_membrane_potential();
-        potentials.push_back(potential);
-        total_potential += potential;
+    if (engine == SimulationEngine::SOA) {
+        // compile the object graph into flat arrays, then drop the objects
+        soa_neurons.build_from_neurons(neurons, integration, population.neuron_groups());
+        cleanup_neurons();
+        if (plasticity_enabled) {
+            soa_neurons.enable_plasticity(plasticity_parameters);
+        }
+    } else {
+        soa_neurons.clear();
+        int max_delay = 1;
+        for (Neuron* neuron : neurons) {
+            neuron->set_spike_queue(&spike_queue);
+            if (neuron->get_axon() != nullptr) {
+                max_delay = std::max(max_delay, neuron->get_axon()->get_conduction_delay());
+            }
+        }
+        spike_queue.reset(max_delay + 1);
+    }
+}
+
+void NeuronSimulator::stimulate_neuron(int neuron_id) {
+    if (metabolic_model_enabled && metabolism.is_blocked(neuron_id)) return;
+    if (engine == SimulationEngine::SOA) {
+        soa_neurons.spike(neuron_id);
+    } else {
+        neurons[neuron_id]->spike();
+    }
+}
+
+void NeuronSimulator::deliver_spikes(int timestep) {
+    PhaseTimer timer(profile(perf.delivery_seconds));
+    if (engine == SimulationEngine::SOA) {
+        soa_neurons.deliver_spikes(timestep);
+        return;
     }
     
-    sim_data.membrane_potentials.push_back(potentials);
-    sim_data.network_activity.push_back(total_potential / NEURON_COUNT);
+    // spikes arriving now may trigger new ones, which are queued for later timesteps
+    spike_queue.advance_to(timestep);
+    spike_queue.take_due(delivering);
+    for (const SynapticSignal& signal : delivering) {
+        signal.synapse->propagate_signal(signal.amplitude);
+    }
+}
+
+int NeuronSimulator::update_neurons(int timestep) {
+    PhaseTimer timer(profile(perf.update_seconds));
+    int spike_count = 0;
+    
+    if (engine == SimulationEngine::SOA) {
+        spike_count = soa_neurons.update_and_check_spikes(spiked_neurons);
+        for (int neuron_id : spiked_neurons) {
+            record_spike_event(timestep, neuron_id);
+        }
+    } else {
+        const int neuron_count = get_neuron_count();
+        for (int i = 0; i < neuron_count; ++i) {
+            if (neurons[i]->update_and_check_spike()) {
+                spike_count++;
+                record_spike_event(timestep, i);
+            }
+        }
+    }
+    
+    return spike_count;
+}
+
+void NeuronSimulator::collect_membrane_data(int timestep) {
+    const bool record = recorder.wants_potentials(timestep);
+    if (!record && !online_metrics_enabled) return;
+    PhaseTimer timer(profile(perf.recording_seconds));
+    
+    const int neuron_count = get_neuron_count();
+    const float* potentials = nullptr;
+    
+    if (engine == SimulationEngine::SOA) {
+        potentials = soa_neurons.get_membrane_potentials().data();
+    } else {
+        membrane_scratch.resize(neuron_count);
+        for (int i = 0; i < neuron_count; ++i) {
+            membrane_scratch[i] = neurons[i]->get_membrane_potential();
+        }
+        potentials = membrane_scratch.data();
+    }
+    
+    float total_potential = 0.0f;
+    for (int i = 0; i < neuron_count; ++i) {
+        total_potential += potentials[i];
+    }
+    const float network_activity = total_potential / neuron_count;
+    if (record) {
+        recorder.record_potentials(timestep, potentials, network_activity);
+    }
+    if (online_metrics_enabled) {
+        online_metrics.record_potentials(potentials, network_activity);
+    }
 }
 
 void NeuronSimulator::record_spike_event(int timestep, int neuron_id) {
-    sim_data.spike_events.push_back(std::make_pair(timestep, neuron_id));
+    recorder.record_spike(timestep, neuron_id);
+    if (online_metrics_enabled) {
+        online_metrics.record_spike(timestep, neuron_id);
+    }
+}
+
+void NeuronSimulator::begin_recording(int max_timesteps) {
+    recorder.begin(get_neuron_count(), max_timesteps);
+    if (online_metrics_enabled) {
+        online_metrics.begin(get_neuron_count());
+    }
+    buffer_capacity = profiling_enabled ? get_buffer_capacity() : 0;
+}
+
+void NeuronSimulator::end_timestep(int spike_count) {
+    PhaseTimer timer(profile(perf.recording_seconds));
+    recorder.end_timestep(spike_count);
+    if (online_metrics_enabled) {
+        online_metrics.end_timestep(spike_count);
+    }
+    if (profiling_enabled) {
+        count_timestep(spike_count);
+    }
+}
+
+size_t NeuronSimulator::get_buffer_capacity() const {
+    size_t capacity = recorder.get_buffer_capacity() + spiked_neurons.capacity() + membrane_scratch.capacity();
+    if (engine == SimulationEngine::SOA) {
+        return capacity + soa_neurons.get_queue_capacity();
+    }
+    return capacity + spike_queue.get_buffer_capacity() + delivering.capacity();
+}
+
+void NeuronSimulator::count_timestep(int spike_count) {
+    // deliveries only happen at the start of a timestep, so the queue is at its
+    // fullest now, and everything ever scheduled has been delivered or is pending
+    const bool soa = engine == SimulationEngine::SOA;
+    const size_t pending = soa ? soa_neurons.get_pending_spike_count() : spike_queue.get_pending_count();
+    perf.timesteps++;
+    perf.spikes += spike_count;
+    perf.propagation_events += soa ? soa_neurons.get_delivered_count() : delivering.size();
+    perf.scheduled_events = perf.propagation_events + pending;
+    perf.max_queue_depth = std::max(perf.max_queue_depth, pending);
+    
+    // buffers only give up capacity when a new run or chunk starts
+    const size_t capacity = get_buffer_capacity();
+    if (capacity > buffer_capacity) {
+        perf.buffer_allocations++;
+    }
+    buffer_capacity = capacity;
 }
 
 void NeuronSimulator::apply_background_activity(float noise_probability) {
-    for (int i = 0; i < NEURON_COUNT; ++i) {
-        if (static_cast<float>(rand()) / RAND_MAX < noise_probability) {
-            if (static_cast<float>(rand()) / RAND_MAX < 0.25f) {
-                neurons[i]->spike();
+    PhaseTimer timer(profile(perf.stimulation_seconds));
+    const int neuron_count = get_neuron_count();
+    for (int i = 0; i < neuron_count; ++i) {
+        if (rng.next_float() < noise_probability) {
+            if (rng.next_float() < 0.25f) {
+                stimulate_neuron(i);
             }
         }
     }
 }
 
 void NeuronSimulator::run_standard_simulation(int max_timesteps) {
-    // clear previous data
-    sim_data.membrane_potentials.clear();
-    sim_data.spike_events.clear();
-    sim_data.network_activity.clear();
-    
-    initialize_neurons();
-    create_random_connections();
-    
-    int timestep = 0;
-    int total_spikes = 0;
+    perf = PerfCounters();
+    PhaseTimer run_timer(profile(perf.run_seconds));
+    build_network();
+    begin_recording(max_timesteps);
+    begin_events(EventType::RUN_START, 0);
+    run_standard_timesteps(0, max_timesteps);
+    recorder.finish();
+}
+
+void NeuronSimulator::resume_standard_simulation(int max_timesteps) {
+    check_resumable();
+    perf = PerfCounters();
+    PhaseTimer run_timer(profile(perf.run_seconds));
+    buffer_capacity = profiling_enabled ? get_buffer_capacity() : 0;
+    begin_events(EventType::RUN_RESUMED, next_timestep);
+    run_standard_timesteps(next_timestep, max_timesteps);
+    recorder.finish();
+}
+
+void NeuronSimulator::run_standard_timesteps(int first_timestep, int max_timesteps) {
+    const int neuron_count = get_neuron_count();
+    int timestep = first_timestep;
     
     while (timestep < max_timesteps) {
-        collect_membrane_data();
+        deliver_spikes(timestep);
+        collect_membrane_data(timestep);
         
         if (timestep % 2 == 0) {
-            int stimulated_neuron = rand() % NEURON_COUNT;
-            neurons[stimulated_neuron]->spike();
+            int stimulated_neuron = rng.next_int(neuron_count);
+            stimulate_neuron(stimulated_neuron);
         }
         
         apply_background_activity(0.6f);
         
-        int spike_count = 0;
-        for (int i = 0; i < NEURON_COUNT; ++i) {
-            if (neurons[i]->update_and_check_spike()) {
-                spike_count++;
-                total_spikes++;
-                record_spike_event(timestep, i);
-            }
+        end_timestep(update_neurons(timestep));
+        if (plasticity_enabled) {
+            update_plasticity(timestep);
         }
         
         timestep++;
+        advance_to(timestep);
     }
-    
-    sim_data.total_timesteps = timestep;
-    sim_data.total_spikes = total_spikes;
 }
 
 void NeuronSimulator::apply_metabolic_dysfunction(const MetabolicCondition& condition, int current_timestep) {
     if (current_timestep < condition.onset_timestep) return;
+    PhaseTimer timer(profile(perf.stimulation_seconds));
+    
+    const int neuron_count = get_neuron_count();
     
     float time_factor = 1.0f;
     if (condition.progressive) {
@@ -130,84 +461,332 @@ void NeuronSimulator::apply_metabolic_dysfunction(const MetabolicCondition& cond
         time_factor = std::min(time_factor, 3.0f);
     }
     
-    // not used currently
-    float atp_factor = condition.atp_efficiency * condition.ion_pump_function / time_factor;
-    
     // apply metabolic effects based on condition severity
-    if (condition.glucose_level < 50.0f && rand() % 20 == 0) {
+    if (condition.glucose_level < 50.0f && rng.next_int(20) == 0) {
         // Hypoglycemia effects
         if (time_factor < 2.0f) {
-            std::cout << "Hypoglycemia: Reduced excitability" << std::endl;
-        } else if (rand() % 10 == 0) {
-            int blocked = rand() % NEURON_COUNT;
-            neurons[blocked]->spike();
-            std::cout << "Severe hypoglycemia: Depolarization block!" << std::endl;
+            events.record(EventType::REDUCED_EXCITABILITY, current_timestep);
+        } else if (rng.next_int(10) == 0) {
+            int blocked = rng.next_int(neuron_count);
+            stimulate_neuron(blocked);
+            events.record(EventType::DEPOLARIZATION_BLOCK, current_timestep, blocked);
         }
     }
     
-    if (condition.glucose_level > 250.0f && rand() % 15 == 0) {
+    if (condition.glucose_level > 250.0f && rng.next_int(15) == 0) {
         // hyperglycemia effects
         for (int burst = 0; burst < 3; ++burst) {
-            int affected = rand() % NEURON_COUNT;
-            neurons[affected]->spike();
+            int affected = rng.next_int(neuron_count);
+            stimulate_neuron(affected);
+            events.record(EventType::HYPERGLYCEMIC_BURST, current_timestep, affected);
         }
     }
     
-    if (condition.atp_efficiency < 0.2f && rand() % 5 == 0) {
+    if (condition.atp_efficiency < 0.2f && rng.next_int(5) == 0) {
         // severe hypoxia
         for (int cascade = 0; cascade < 5; ++cascade) {
-            int affected = rand() % NEURON_COUNT;
-            neurons[affected]->spike();
+            int affected = rng.next_int(neuron_count);
+            stimulate_neuron(affected);
+            events.record(EventType::HYPOXIC_CASCADE, current_timestep, affected);
         }
     }
 }
 
 void NeuronSimulator::run_metabolic_dysfunction_simulation(const MetabolicCondition& condition, int max_timesteps) {
-    sim_data.membrane_potentials.clear();
-    sim_data.spike_events.clear();
-    sim_data.network_activity.clear();
-    
-    initialize_neurons();
-    create_random_connections();
-    
-    std::cout << "Running " << condition.name << " simulation..." << std::endl;
-    
-    int timestep = 0;
-    bool dysfunction_phase = false;
+    perf = PerfCounters();
+    PhaseTimer run_timer(profile(perf.run_seconds));
+    build_network();
+    begin_recording(max_timesteps);
+    begin_events(EventType::RUN_START, 0);
+    begin_metabolism(condition);
+    run_metabolic_timesteps(condition, 0, max_timesteps);
+    recorder.finish();
+}
+
+void NeuronSimulator::resume_metabolic_dysfunction_simulation(const MetabolicCondition& condition,
+                                                              int max_timesteps) {
+    check_resumable();
+    perf = PerfCounters();
+    PhaseTimer run_timer(profile(perf.run_seconds));
+    buffer_capacity = profiling_enabled ? get_buffer_capacity() : 0;
+    begin_events(EventType::RUN_RESUMED, next_timestep);
+    begin_metabolism(condition);
+    run_metabolic_timesteps(condition, next_timestep, max_timesteps);
+    recorder.finish();
+}
+
+void NeuronSimulator::run_metabolic_timesteps(const MetabolicCondition& condition, int first_timestep,
+                                              int max_timesteps) {
+    const int neuron_count = get_neuron_count();
+    int timestep = first_timestep;
+    // a run resumed after the onset is already in the dysfunction phase
+    bool dysfunction_phase = condition.onset_timestep >= 0 && condition.onset_timestep < first_timestep;
     
     while (timestep < max_timesteps) {
+        deliver_spikes(timestep);
+        
         if (timestep == condition.onset_timestep && !dysfunction_phase) {
-            std::cout << "Metabolic dysfunction onset at timestep " << timestep << std::endl;
+            events.record(EventType::DYSFUNCTION_ONSET, timestep);
             dysfunction_phase = true;
         }
         
-        if (dysfunction_phase) {
+        if (dysfunction_phase && !metabolic_model_enabled) {
             apply_metabolic_dysfunction(condition, timestep);
         }
         
-        collect_membrane_data();
+        collect_membrane_data(timestep);
         
-        float stimulation_probability = dysfunction_phase ? 
+        float stimulation_probability = dysfunction_phase ?
             std::max(0.1f, 0.5f * condition.atp_efficiency) : 0.5f;
         
-        if (static_cast<float>(rand()) / RAND_MAX < stimulation_probability) {
-            int stimulated = rand() % NEURON_COUNT;
-            neurons[stimulated]->spike();
+        if (rng.next_float() < stimulation_probability) {
+            int stimulated = rng.next_int(neuron_count);
+            stimulate_neuron(stimulated);
         }
         
-        int timestep_spikes = 0;
-        for (int i = 0; i < NEURON_COUNT; ++i) {
-            if (neurons[i]->update_and_check_spike()) {
-                timestep_spikes++;
-                record_spike_event(timestep, i);
-            }
+        end_timestep(update_neurons(timestep));
+        if (plasticity_enabled) {
+            update_plasticity(timestep);
+        }
+        if (metabolic_model_enabled) {
+            update_metabolism(timestep);
         }
         
         timestep++;
+        advance_to(timestep);
     }
+}
+
+void NeuronSimulator::begin_events(EventType first_event, int timestep) {
+    events.clear();
+    events.record(first_event, timestep);
+}
+
+void NeuronSimulator::begin_metabolism(const MetabolicCondition& condition) {
+    if (!metabolic_model_enabled) return;
+    if (metabolism.size() != get_neuron_count()) {
+        metabolism.reset(get_neuron_count());
+    }
+    metabolism.set_condition(condition);
+}
+
+void NeuronSimulator::update_metabolism(int timestep) {
+    PhaseTimer timer(profile(perf.stimulation_seconds));
+    metabolism.step(timestep, spiked_neurons);
+    for (int neuron_id : metabolism.get_block_onsets()) {
+        events.record(EventType::DEPOLARIZATION_BLOCK, timestep, neuron_id);
+    }
+    soa_neurons.modulate(metabolism.get_rest_shift(), metabolism.get_threshold_shift(), metabolism.get_blocked(),
+                         metabolism.get_efficacy());
+}
+
+void NeuronSimulator::update_plasticity(int timestep) {
+    PhaseTimer timer(profile(perf.plasticity_seconds));
+    soa_neurons.apply_plasticity(timestep);
+}
+
+void NeuronSimulator::set_plasticity_parameters(const PlasticityParameters& parameters) {
+    SynapticPlasticity::validate(parameters);
+    plasticity_parameters = parameters;
+}
+
+void NeuronSimulator::advance_to(int timestep) {
+    next_timestep = timestep;
+    if (checkpoint_interval > 0 && timestep % checkpoint_interval == 0) {
+        write_checkpoint(checkpoint_path, true);
+    }
+}
+
+void NeuronSimulator::set_checkpointing(const std::string& path, int interval) {
+    if (interval < 0) {
+        throw std::invalid_argument("checkpoint interval must be non-negative");
+    }
+    if (interval > 0 && path.empty()) {
+        throw std::invalid_argument("checkpointing needs a path");
+    }
+    checkpoint_path = path;
+    checkpoint_interval = interval;
+}
+
+void NeuronSimulator::check_resumable() const {
+    if (engine != SimulationEngine::SOA || soa_neurons.size() == 0) {
+        throw std::invalid_argument("resuming needs a checkpoint loaded or an SOA run before it");
+    }
+}
+
+void NeuronSimulator::save_checkpoint(const std::string& path) {
+    write_checkpoint(path, false);
+}
+
+void NeuronSimulator::write_checkpoint(const std::string& path, bool journal) {
+    if (soa_neurons.size() == 0) {
+        throw std::invalid_argument("checkpoints require a network built by the SOA engine");
+    }
+    PhaseTimer timer(profile(perf.export_seconds));
+    CheckpointWriter writer(path);
+    writer.write(population);
+    writer.write(seed);
+    writer.write(next_timestep);
+    writer.write(rng.get_state());
+    writer.write(rng.get_increment());
+    soa_neurons.save(writer);
+    recorder.save(writer, journal ? path + RECORDING_JOURNAL_SUFFIX : "");
+    writer.write(online_metrics_enabled);
+    if (online_metrics_enabled) {
+        online_metrics.save(writer);
+    }
+    writer.write(metabolic_model_enabled);
+    if (metabolic_model_enabled) {
+        metabolism.save(writer);
+    }
+    writer.close();
+}
+
+void NeuronSimulator::load_checkpoint(const std::string& path) {
+    CheckpointReader reader(path);
+    PopulationSpec spec = reader.read<PopulationSpec>();
+    validate_population_spec(spec);
+    const uint64_t checkpoint_seed = reader.read<uint64_t>();
+    const int timestep = reader.read<int>();
+    const uint64_t state = reader.read<uint64_t>();
+    const uint64_t increment = reader.read<uint64_t>();
+    soa_neurons.load(reader);
+    if (soa_neurons.size() != spec.total_size()) {
+        throw std::runtime_error("Checkpoint: '" + path + "' is inconsistent");
+    }
+    recorder.load(reader, path + RECORDING_JOURNAL_SUFFIX);
+    online_metrics_enabled = reader.read<bool>();
+    if (online_metrics_enabled) {
+        online_metrics.load(reader);
+    }
+    plasticity_enabled = soa_neurons.has_plasticity();
+    if (plasticity_enabled) {
+        plasticity_parameters = soa_neurons.get_plasticity_parameters();
+    }
+    metabolic_model_enabled = reader.read<bool>();
+    metabolism.reset(0);
+    if (metabolic_model_enabled) {
+        metabolism.load(reader);
+    }
+    
+    population = spec;
+    seed = checkpoint_seed;
+    next_timestep = timestep;
+    rng.set_state(state, increment);
+    engine = SimulationEngine::SOA;
+    integration = soa_neurons.get_synaptic_integration();
+    cleanup_neurons();
+    spike_queue.reset(2);
+}
+
+std::vector<BatchResult> NeuronSimulator::run_metabolic_dysfunction_batch(
+        const std::vector<MetabolicCondition>& conditions, const std::vector<uint64_t>& seeds,
+        const std::vector<int>& max_timesteps, int workers) const {
+    std::vector<BatchResult> results = batch_results(conditions, seeds, max_timesteps);
+    const RecordingOptions options = batch_recording_options();
+    
+    run_parallel(results.size(), workers, [&](size_t i) {
+        BatchResult& result = results[i];
+        NeuronSimulator simulator(population, result.seed);
+        simulator.set_engine(engine);
+        simulator.set_synaptic_integration(integration);
+        simulator.set_recording_options(options);
+        simulator.set_online_metrics(online_metrics_enabled);
+        simulator.set_metabolic_model(metabolic_model_enabled);
+        simulator.set_plasticity(plasticity_enabled);
+        simulator.set_plasticity_parameters(plasticity_parameters);
+        simulator.set_lyapunov_parameters(lyapunov_parameters);
+        simulator.set_log_level(events.get_level());
+        simulator.run_metabolic_dysfunction_simulation(result.condition, result.max_timesteps);
+        result.metrics = online_metrics_enabled ? simulator.get_running_metrics()
+                                                : simulator.calculate_stability_metrics();
+        result.data = simulator.recorder.get_data();
+        result.events = std::move(simulator.events);
+    });
+    return results;
+}
+
+std::vector<BatchResult> NeuronSimulator::run_metabolic_dysfunction_fork(
+        const std::vector<MetabolicCondition>& conditions, const std::vector<uint64_t>& seeds,
+        const std::vector<int>& max_timesteps, int workers) const {
+    if (engine != SimulationEngine::SOA) {
+        throw std::invalid_argument("forking requires the SOA engine");
+    }
+    std::vector<BatchResult> results = batch_results(conditions, seeds, max_timesteps);
+    if (results.empty()) return results;
+    const RecordingOptions options = batch_recording_options();
+    
+    // every condition runs the same baseline before its onset, so all of them can
+    // branch off at the earliest onset (or the end of the shortest run)
+    int fork_timestep = std::numeric_limits<int>::max();
+    for (const BatchResult& result : results) {
+        const int onset = result.condition.onset_timestep;
+        const int shared = onset >= 0 ? std::min(onset, result.max_timesteps) : result.max_timesteps;
+        fork_timestep = std::min(fork_timestep, std::max(shared, 0));
+    }
+    
+    std::vector<std::unique_ptr<NeuronSimulator>> baselines(seeds.size());
+    run_parallel(seeds.size(), workers, [&](size_t s) {
+        std::unique_ptr<NeuronSimulator> baseline(new NeuronSimulator(population, seeds[s]));
+        baseline->set_engine(engine);
+        baseline->set_synaptic_integration(integration);
+        baseline->set_recording_options(options);
+        baseline->set_online_metrics(online_metrics_enabled);
+        baseline->set_metabolic_model(metabolic_model_enabled);
+        baseline->set_plasticity(plasticity_enabled);
+        baseline->set_plasticity_parameters(plasticity_parameters);
+        baseline->set_log_level(events.get_level());
+        baseline->build_network();
+        baseline->begin_recording(fork_timestep);
+        baseline->begin_events(EventType::RUN_START, 0);
+        // before the fork every condition is at its healthy levels
+        baseline->begin_metabolism(results[s].condition);
+        baseline->run_metabolic_timesteps(results[s].condition, 0, fork_timestep);
+        baseline->recorder.finish();
+        baselines[s] = std::move(baseline);
+    });
     
-    sim_data.total_timesteps = timestep;
-    sim_data.total_spikes = sim_data.spike_events.size();
+    run_parallel(results.size(), workers, [&](size_t i) {
+        BatchResult& result = results[i];
+        const NeuronSimulator& baseline = *baselines[i % seeds.size()];
+        NeuronSimulator branch;
+        branch.fork_from(baseline, result.max_timesteps);
+        branch.begin_metabolism(result.condition);
+        branch.run_metabolic_timesteps(result.condition, fork_timestep, result.max_timesteps);
+        branch.recorder.finish();
+        
+        result.baseline = baseline.recorder.get_data();
+        result.data = branch.recorder.get_data();
+        result.events = std::move(branch.events);
+        if (online_metrics_enabled) {
+            result.metrics = branch.get_running_metrics();
+        } else {
+            result.metrics = compute_stability_metrics(join_recordings(*result.baseline, *result.data),
+                                                       lyapunov_parameters);
+        }
+    });
+    return results;
+}
+
+void NeuronSimulator::fork_from(const NeuronSimulator& baseline, int max_timesteps) {
+    population = baseline.population;
+    engine = baseline.engine;
+    integration = baseline.integration;
+    seed = baseline.seed;
+    rng = baseline.rng;
+    soa_neurons = baseline.soa_neurons;
+    next_timestep = baseline.next_timestep;
+    recorder.set_options(baseline.recorder.get_options());
+    recorder.continue_from(baseline.recorder, max_timesteps);
+    online_metrics_enabled = baseline.online_metrics_enabled;
+    if (online_metrics_enabled) {
+        online_metrics.copy_from(baseline.online_metrics);
+    }
+    metabolic_model_enabled = baseline.metabolic_model_enabled;
+    metabolism = baseline.metabolism;
+    plasticity_enabled = baseline.plasticity_enabled;
+    plasticity_parameters = baseline.plasticity_parameters;
+    events = baseline.events;
 }
 
 MetabolicCondition NeuronSimulator::create_hypoglycemia() {
@@ -227,62 +806,46 @@ MetabolicCondition NeuronSimulator::create_mitochondrial_dysfunction() {
 }
 
 StabilityMetrics NeuronSimulator::calculate_stability_metrics() const {
-    StabilityMetrics metrics = {0};
-    
-    // simplified implementations for core metrics
-    if (!sim_data.spike_events.empty()) {
-        // calculate coefficient of variation
-        std::vector<float> intervals;
-        for (int neuron_id = 0; neuron_id < NEURON_COUNT; ++neuron_id) {
-            std::vector<int> neuron_spikes;
-            for (const auto& spike : sim_data.spike_events) {
-                if (spike.second == neuron_id) {
-                    neuron_spikes.push_back(spike.first);
-                }
-            }
-            for (size_t i = 1; i < neuron_spikes.size(); ++i) {
-                intervals.push_back(neuron_spikes[i] - neuron_spikes[i-1]);
-            }
-        }
-        
-        if (!intervals.empty()) {
-            float mean = std::accumulate(intervals.begin(), intervals.end(), 0.0f) / intervals.size();
-            float variance = 0.0f;
-            for (float interval : intervals) {
-                variance += (interval - mean) * (interval - mean);
-            }
-            variance /= intervals.size();
-            metrics.coefficient_of_variation = (mean > 0) ? std::sqrt(variance) / mean : 0.0f;
-        }
+    StabilityMetrics metrics = compute_stability_metrics(get_simulation_data(), lyapunov_parameters);
+    if (online_metrics_enabled && !recorder.keeps_full_trace()) {
+        // the online metrics cover what the recording leaves out, as in batches and forks;
+        // only coherence and the lyapunov exponent need the recorded trace
+        StabilityMetrics running = get_running_metrics();
+        running.network_coherence = metrics.network_coherence;
+        running.lyapunov_exponent = metrics.lyapunov_exponent;
+        return running;
     }
-    
-    // calculate homeostatic deviation
-    if (!sim_data.network_activity.empty()) {
-        float mean_activity = std::accumulate(sim_data.network_activity.begin(), 
-                                            sim_data.network_activity.end(), 0.0f) / sim_data.network_activity.size();
-        metrics.homeostatic_deviation = std::abs(mean_activity - (-65.0f));
-    }
-    
     return metrics;
 }
 
+void NeuronSimulator::set_lyapunov_parameters(const LyapunovParameters& parameters) {
+    validate_lyapunov_parameters(parameters);
+    lyapunov_parameters = parameters;
+}
+
 void NeuronSimulator::export_csv_data(const std::string& prefix) {
+    PhaseTimer timer(profile(perf.export_seconds));
+    const SimulationData& data = get_simulation_data();
+    
     // export membrane potentials
     std::ofstream mem_file(prefix + "membrane_potentials.csv");
     if (mem_file.is_open()) {
+        const size_t column_count = data.recorded_neurons.size();
         mem_file << "Timestep";
-        for (int i = 0; i < NEURON_COUNT; ++i) {
-            mem_file << ",Neuron_" << i;
+        for (size_t i = 0; i < column_count; ++i) {
+            mem_file << ",Neuron_" << data.recorded_neurons[i];
         }
         mem_file << "\n";
         
-        for (size_t t = 0; t < sim_data.membrane_potentials.size(); ++t) {
-            mem_file << t;
-            for (int i = 0; i < NEURON_COUNT; ++i) {
-                mem_file << "," << sim_data.membrane_potentials[t][i];
+        for (size_t t = 0; t < data.recorded_timesteps.size(); ++t) {
+            const float* potentials = data.membrane_potentials.data() + t * column_count;
+            mem_file << data.recorded_timesteps[t];
+            for (size_t i = 0; i < column_count; ++i) {
+                mem_file << "," << potentials[i];
             }
             mem_file << "\n";
         }
+        if (profiling_enabled) perf.export_bytes += mem_file.tellp();
         mem_file.close();
     }
     
@@ -290,9 +853,10 @@ void NeuronSimulator::export_csv_data(const std::string& prefix) {
     std::ofstream spike_file(prefix + "spike_raster.csv");
     if (spike_file.is_open()) {
         spike_file << "Timestep,Neuron_ID\n";
-        for (const auto& spike : sim_data.spike_events) {
-            spike_file << spike.first << "," << spike.second << "\n";
+        for (size_t k = 0; k < data.spike_times.size(); ++k) {
+            spike_file << data.spike_times[k] << "," << data.spike_neurons[k] << "\n";
         }
+        if (profiling_enabled) perf.export_bytes += spike_file.tellp();
         spike_file.close();
     }
     
@@ -301,21 +865,41 @@ void NeuronSimulator::export_csv_data(const std::string& prefix) {
     if (activity_file.is_open()) {
         activity_file << "Timestep,Average_Potential,Spike_Count\n";
         
-        std::vector<int> spikes_per_timestep(sim_data.total_timesteps, 0);
-        for (const auto& spike : sim_data.spike_events) {
-            if (spike.first < sim_data.total_timesteps) {
-                spikes_per_timestep[spike.first]++;
-            }
-        }
-        
-        for (size_t t = 0; t < sim_data.network_activity.size(); ++t) {
+        const std::vector<int>& spikes_per_timestep = data.spikes_per_timestep;
+        for (size_t k = 0; k < data.network_activity.size(); ++k) {
+            size_t t = data.recorded_timesteps[k] - data.first_timestep;
             int spike_count = (t < spikes_per_timestep.size()) ? spikes_per_timestep[t] : 0;
-            activity_file << t << "," << sim_data.network_activity[t] << "," << spike_count << "\n";
+            activity_file << data.recorded_timesteps[k] << "," << data.network_activity[k] << "," << spike_count << "\n";
         }
+        if (profiling_enabled) perf.export_bytes += activity_file.tellp();
         activity_file.close();
     }
 }
 
+void NeuronSimulator::export_binary_data(const std::string& prefix) {
+    PhaseTimer timer(profile(perf.export_seconds));
+    const SimulationData& data = get_simulation_data();
+    
+    write_npy(prefix + "membrane_potentials.npy", "f4", data.membrane_potentials.data(), sizeof(float),
+              {data.recorded_timesteps.size(), data.recorded_neurons.size()});
+    write_npy(prefix + "recorded_timesteps.npy", "i4", data.recorded_timesteps.data(), sizeof(int),
+              {data.recorded_timesteps.size()});
+    write_npy(prefix + "recorded_neurons.npy", "i4", data.recorded_neurons.data(), sizeof(int),
+              {data.recorded_neurons.size()});
+    write_npy(prefix + "spike_times.npy", "i4", data.spike_times.data(), sizeof(int), {data.spike_times.size()});
+    write_npy(prefix + "spike_neurons.npy", "i4", data.spike_neurons.data(), sizeof(int), {data.spike_neurons.size()});
+    write_npy(prefix + "network_activity.npy", "f4", data.network_activity.data(), sizeof(float),
+              {data.network_activity.size()});
+    write_npy(prefix + "spikes_per_timestep.npy", "i4", data.spikes_per_timestep.data(), sizeof(int),
+              {data.spikes_per_timestep.size()});
+    if (profiling_enabled) {
+        perf.export_bytes += sizeof(float) * (data.membrane_potentials.size() + data.network_activity.size()) +
+                             sizeof(int) * (data.recorded_timesteps.size() + data.recorded_neurons.size() +
+                                            data.spike_times.size() + data.spike_neurons.size() +
+                                            data.spikes_per_timestep.size());
+    }
+}
+
 void NeuronSimulator::run_metabolic_dysfunction_studies() {
     std::vector<MetabolicCondition> conditions = {
         create_hypoglycemia(),
@@ -334,9 +918,10 @@ void NeuronSimulator::run_metabolic_dysfunction_studies() {
         std::string safe_name = conditions[i].name;
         std::replace(safe_name.begin(), safe_name.end(), ' ', '_');
         export_csv_data(safe_name + "_");
+        export_binary_data(safe_name + "_");
         
         StabilityMetrics metrics = calculate_stability_metrics();
-        std::cout << "CV: " << metrics.coefficient_of_variation 
+        std::cout << "CV: " << metrics.coefficient_of_variation
                   << ", Homeostatic deviation: " << metrics.homeostatic_deviation << std::endl;
     }
     
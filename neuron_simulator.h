@@ -2,50 +2,147 @@
 #include <vector>
 #include <string>
 #include <utility>
+#include <memory>
+#include "neuron_population.h"
+#include "spike_queue.h"
+#include "recorder.h"
+#include "random_generator.h"
+#include "stability_metrics.h"
+#include "perf_counters.h"
+#include "metabolic_state.h"
+#include "event_log.h"
 
 class Neuron;
 
-struct SimulationData {
-    std::vector<std::vector<float>> membrane_potentials;
-    std::vector<std::pair<int, int>> spike_events;
-    std::vector<int> spikes_per_timestep;
-    std::vector<float> network_activity;
-    int total_timesteps;
-    int total_spikes;
+enum class SimulationEngine {
+    OBJECT, // one heap-allocated Neuron object per cell, virtual dispatch
+    SOA     // structure-of-arrays state, same dynamics
 };
 
-struct StabilityMetrics {
-    float coefficient_of_variation;
-    float burst_coefficient;
-    float synchrony_index;
-    float entropy;
-    float lyapunov_exponent;
-    float homeostatic_deviation;
-    float network_coherence;
-    float critical_branching_ratio;
+struct PopulationSpec {
+    // neuron counts per type; the defaults reproduce the original 10-neuron network
+    int pyramidal_count = 4;
+    int interneuron_count = 1;
+    int purkinje_count = 1;
+    int motor_count = 2;
+    int sensory_count = 2;
+    int connection_density = 6; // outgoing connection attempts per neuron
+    
+    // dynamics model per type; anything but LEGACY requires the SOA engine
+    DynamicsModel pyramidal_dynamics;
+    DynamicsModel interneuron_dynamics;
+    DynamicsModel purkinje_dynamics;
+    DynamicsModel motor_dynamics;
+    DynamicsModel sensory_dynamics;
+    
+    int total_size() const {
+        return pyramidal_count + interneuron_count + purkinje_count + motor_count + sensory_count;
+    }
+    
+    // same type proportions, scaled to the requested total number of neurons; counts are
+    // rounded by largest remainder, and types without neurons stay empty
+    PopulationSpec scaled_to(int total_size) const;
+    
+    // one group per non-empty type, in the order the neurons are laid out
+    std::vector<NeuronGroup> neuron_groups() const;
+    bool uses_legacy_dynamics() const;
 };
 
-struct MetabolicCondition {
-    std::string name;
-    float glucose_level;
-    float atp_efficiency;
-    float ion_pump_function;
-    float neurotransmitter_synthesis;
-    float membrane_integrity;
-    float oxidative_stress;
-    bool progressive;
-    int onset_timestep;
+// outcome of one (condition, seed) run of a batch
+struct BatchResult {
+    MetabolicCondition condition;
+    uint64_t seed;
+    int max_timesteps;
+    StabilityMetrics metrics;
+    std::shared_ptr<SimulationData> data;
+    // forked runs only: recordings before the fork, shared by every condition of the
+    // seed; data then holds the recordings from data->first_timestep on
+    std::shared_ptr<SimulationData> baseline;
+    EventLog events;
 };
 
 class NeuronSimulator {
 public:
     NeuronSimulator();
+    explicit NeuronSimulator(const PopulationSpec& spec, uint64_t seed = RandomGenerator::DEFAULT_SEED);
     ~NeuronSimulator();
     
+    // network size and composition
+    void set_population_spec(const PopulationSpec& spec);
+    const PopulationSpec& get_population_spec() const { return population; }
+    int get_neuron_count() const { return population.total_size(); }
+    
+    // engine used by the next simulation run
+    void set_engine(SimulationEngine new_engine) { engine = new_engine; }
+    SimulationEngine get_engine() const { return engine; }
+    
+    // every run restarts the generator from this seed, so a run is reproduced by
+    // repeating it with the same seed, spec and settings
+    void set_seed(uint64_t new_seed) { seed = new_seed; }
+    uint64_t get_seed() const { return seed; }
+    
+    // synaptic input model; EVENT_DRIVEN requires the SOA engine
+    void set_synaptic_integration(SynapticIntegration mode) { integration = mode; }
+    SynapticIntegration get_synaptic_integration() const { return integration; }
+    
+    // per-neuron ATP, ion pump and neurotransmitter state (see MetabolicState) driving
+    // resting potential, threshold and synaptic efficacy in metabolic runs, in place of
+    // the random stimulation of apply_metabolic_dysfunction(); requires the SOA engine
+    void set_metabolic_model(bool enabled) { metabolic_model_enabled = enabled; }
+    bool get_metabolic_model() const { return metabolic_model_enabled; }
+    // STDP and homeostatic scaling of excitatory weights during runs; requires the SOA
+    // engine and takes effect when the network is built
+    void set_plasticity(bool enabled) { plasticity_enabled = enabled; }
+    bool get_plasticity() const { return plasticity_enabled; }
+    void set_plasticity_parameters(const PlasticityParameters& parameters);
+    const PlasticityParameters& get_plasticity_parameters() const { return plasticity_parameters; }
+    // weight magnitude of every synapse of the SOA network, in CSR order
+    const std::vector<float>& get_synaptic_weights() const { return soa_neurons.get_synapses().get_weights(); }
+    // state at the end of the last metabolic run, per neuron
+    const std::vector<float>& get_atp_levels() const { return metabolism.get_atp(); }
+    const std::vector<float>& get_ion_pump_levels() const { return metabolism.get_ion_pump(); }
+    const std::vector<float>& get_transmitter_levels() const { return metabolism.get_transmitter(); }
+    
     // core simulation methods
     void run_standard_simulation(int max_timesteps = 5000);
     void run_metabolic_dysfunction_simulation(const MetabolicCondition& condition, int max_timesteps = 3000);
     void run_metabolic_dysfunction_studies();
+    // runs every condition with every seed on a pool of worker threads, each run on a fresh
+    // network with this simulator's spec, engine, recording, online metrics and metabolic
+    // model settings
+    // (streaming settings excepted); with online metrics the results hold the running
+    // metrics. max_timesteps holds one entry per condition, or a single entry for all.
+    // results are ordered by condition, then seed. workers = 0 uses all cores
+    std::vector<BatchResult> run_metabolic_dysfunction_batch(const std::vector<MetabolicCondition>& conditions,
+                                                            const std::vector<uint64_t>& seeds,
+                                                            const std::vector<int>& max_timesteps,
+                                                            int workers = 0) const;
+    // same runs and results as run_metabolic_dysfunction_batch(), but the baseline before
+    // the earliest onset is simulated once per seed and every condition continues from a
+    // copy of it. requires the SOA engine
+    std::vector<BatchResult> run_metabolic_dysfunction_fork(const std::vector<MetabolicCondition>& conditions,
+                                                           const std::vector<uint64_t>& seeds,
+                                                           const std::vector<int>& max_timesteps,
+                                                           int workers = 0) const;
+    
+    // checkpoints hold the complete state of an SOA-engine run: network, pending spikes,
+    // random generator, recorder position and online metrics. resuming a checkpoint
+    // gives the same results as the uninterrupted run, and one checkpoint can be
+    // resumed any number of times, e.g. with different conditions after a shared prefix
+    void save_checkpoint(const std::string& path);
+    // restores the spec, seed, integration and recording options of the checkpoint and
+    // selects the SOA engine; continue with one of the resume_*() methods
+    void load_checkpoint(const std::string& path);
+    // write a checkpoint to path every interval timesteps of a run; 0 disables. in-memory
+    // recordings go to an append-only journal, path + ".recording", which is kept with it
+    void set_checkpointing(const std::string& path, int interval);
+    int get_checkpoint_interval() const { return checkpoint_interval; }
+    // next timestep of the current run (its length once it has finished)
+    int get_timestep() const { return next_timestep; }
+    // continue the current run (loaded, or the last SOA run) up to max_timesteps,
+    // without rebuilding the network
+    void resume_standard_simulation(int max_timesteps = 5000);
+    void resume_metabolic_dysfunction_simulation(const MetabolicCondition& condition, int max_timesteps = 3000);
     
     // predefined metabolic conditions
     MetabolicCondition create_hypoglycemia();
@@ -53,24 +150,112 @@ public:
     MetabolicCondition create_hypoxia();
     MetabolicCondition create_mitochondrial_dysfunction();
     
-    // results
-    SimulationData get_simulation_data() const { return sim_data; }
+    // what is recorded and where it goes; takes effect at the next run
+    void set_recording_options(const RecordingOptions& options) { recorder.set_options(options); }
+    const RecordingOptions& get_recording_options() const { return recorder.get_options(); }
+    void set_recording_callback(RecordingCallback callback) { recorder.set_callback(std::move(callback)); }
+    
+    // accumulate stability metrics while runs execute, without needing recorded traces.
+    // get_running_metrics() may be polled from another thread during a run
+    void set_online_metrics(bool enabled) { online_metrics_enabled = enabled; }
+    bool get_online_metrics() const { return online_metrics_enabled; }
+    StabilityMetrics get_running_metrics() const { return online_metrics.snapshot(); }
+    long long get_running_timesteps() const { return online_metrics.get_timesteps(); }
+    
+    // per-phase timings and event counts of the last run (and of exports since);
+    // off by default, and free when off
+    void set_profiling(bool enabled) { profiling_enabled = enabled; }
+    bool get_profiling() const { return profiling_enabled; }
+    const PerfCounters& get_perf_counters() const { return perf; }
+    
+    // typed events of the last run (condition effects, onset, blocks), kept in memory
+    // instead of being printed; set_log_level() chooses which are recorded
+    void set_log_level(LogLevel level) { events.set_level(level); }
+    LogLevel get_log_level() const { return events.get_level(); }
+    const EventLog& get_events() const { return events; }
+    
+    // results; each run starts a new SimulationData, so earlier results stay valid.
+    // when streaming, only the run totals are kept here
+    const SimulationData& get_simulation_data() const { return *recorder.get_data(); }
+    std::shared_ptr<const SimulationData> get_simulation_data_ptr() const { return recorder.get_data(); }
+    // metrics of the recorded run; with online metrics enabled and a recording that leaves
+    // out spikes or potentials, the fields it cannot give come from get_running_metrics()
     StabilityMetrics calculate_stability_metrics() const;
+    // embedding and fit of the lyapunov estimate in calculate_stability_metrics() and batches
+    void set_lyapunov_parameters(const LyapunovParameters& parameters);
+    const LyapunovParameters& get_lyapunov_parameters() const { return lyapunov_parameters; }
     
     // Visualization helpers
     void generate_python_visualization(const std::string& filename);
     void export_csv_data(const std::string& prefix = "");
-    
+    // one .npy file per recording, readable with np.load(..., mmap_mode='r')
+    void export_binary_data(const std::string& prefix = "");
+
 private:
-    static const int NEURON_COUNT = 10;
-    Neuron* neurons[NEURON_COUNT];
-    SimulationData sim_data;
+    PopulationSpec population;
+    SimulationEngine engine = SimulationEngine::OBJECT;
+    SynapticIntegration integration = SynapticIntegration::STATIC;
+    uint64_t seed = RandomGenerator::DEFAULT_SEED;
+    RandomGenerator rng; // all stochastic decisions of a run
+    std::vector<Neuron*> neurons;
+    NeuronPopulation soa_neurons;
+    SpikeQueue<SynapticSignal> spike_queue; // pending deliveries of the OBJECT engine
+    std::vector<SynapticSignal> delivering;
+    std::vector<int> spiked_neurons;
+    std::vector<float> membrane_scratch; // OBJECT engine potentials gathered for recording
+    Recorder recorder;
+    bool online_metrics_enabled = false;
+    OnlineMetrics online_metrics;
+    bool profiling_enabled = false;
+    PerfCounters perf;
+    size_t buffer_capacity = 0; // hot-path buffer capacity at the end of the last timestep
+    bool metabolic_model_enabled = false;
+    MetabolicState metabolism;
+    LyapunovParameters lyapunov_parameters;
+    bool plasticity_enabled = false;
+    PlasticityParameters plasticity_parameters;
+    EventLog events;
+    std::string checkpoint_path;
+    int checkpoint_interval = 0;
+    int next_timestep = 0;
+    
+    // timer target for a phase; null (no timing) unless profiling
+    inline double* profile(double& seconds) { return profiling_enabled ? &seconds : nullptr; }
+    void count_timestep(int spike_count);
+    size_t get_buffer_capacity() const;
     
     void initialize_neurons();
     void cleanup_neurons();
+    void build_network();
+    void stimulate_neuron(int neuron_id);
+    void deliver_spikes(int timestep);
+    int update_neurons(int timestep);
     void create_random_connections(int connection_density = 6);
-    void collect_membrane_data();
+    void begin_recording(int max_timesteps);
+    void collect_membrane_data(int timestep);
     void record_spike_event(int timestep, int neuron_id);
+    void end_timestep(int spike_count);
     void apply_background_activity(float noise_probability = 0.3f);
     void apply_metabolic_dysfunction(const MetabolicCondition& condition, int current_timestep);
+    // clear the event log for a new run or resume, which starts with first_event
+    void begin_events(EventType first_event, int timestep);
+    // start the metabolic state of a run under condition, keeping the pools of a resumed run
+    void begin_metabolism(const MetabolicCondition& condition);
+    void update_metabolism(int timestep);
+    void update_plasticity(int timestep);
+    void check_resumable() const;
+    std::vector<BatchResult> batch_results(const std::vector<MetabolicCondition>& conditions,
+                                           const std::vector<uint64_t>& seeds,
+                                           const std::vector<int>& max_timesteps) const;
+    RecordingOptions batch_recording_options() const;
+    // copy of the run state of baseline, recording on from where it stopped
+    void fork_from(const NeuronSimulator& baseline, int max_timesteps);
+    // main loops from first_timestep up to max_timesteps
+    void run_standard_timesteps(int first_timestep, int max_timesteps);
+    void run_metabolic_timesteps(const MetabolicCondition& condition, int first_timestep, int max_timesteps);
+    // the run has reached timestep; writes the periodic checkpoint when one is due
+    void advance_to(int timestep);
+    // save_checkpoint(), with in-memory recordings appended to the journal next to path
+    // instead of written whole, so periodic checkpoints do not rewrite the recording
+    void write_checkpoint(const std::string& path, bool journal);
 };
\ No newline at end of file
@@ -0,0 +1,116 @@
+#include "npy_writer.h"
+#include <algorithm>
+#include <filesystem>
+#include <system_error>
+
+namespace {
+
+// every stream header is padded to this size so it can be rewritten in place
+const size_t STREAM_HEADER_SIZE = 128;
+
+// magic string, version, header length and the header dict describing the array.
+// the total is padded to a multiple of 64 bytes, or to exactly fixed_size if given
+std::string npy_header(const std::string& type_code, const std::vector<size_t>& shape, size_t fixed_size = 0) {
+    const unsigned short probe = 1;
+    const char byte_order = (*reinterpret_cast<const unsigned char*>(&probe) == 1) ? '<' : '>';
+    
+    std::string dict = std::string("{'descr': '") + byte_order + type_code + "', 'fortran_order': False, 'shape': (";
+    for (size_t dim : shape) {
+        dict += std::to_string(dim) + ", ";
+    }
+    if (shape.size() > 1) dict.erase(dict.size() - 1); // (T, N) but (K,)
+    dict += "), }";
+    
+    // magic + version + length field take 10 bytes; pad so the data starts aligned
+    const size_t preamble = 10;
+    size_t total = preamble + dict.size() + 1;
+    size_t padded = fixed_size > 0 ? fixed_size : (total + 63) / 64 * 64;
+    dict.append(padded > total ? padded - total : 0, ' ');
+    dict += '\n';
+    
+    const unsigned short dict_length = static_cast<unsigned short>(dict.size());
+    std::string header = "\x93NUMPY";
+    header += static_cast<char>(1);
+    header += static_cast<char>(0);
+    header += static_cast<char>(dict_length & 0xff);
+    header += static_cast<char>(dict_length >> 8);
+    return header + dict;
+}
+
+} // namespace
+
+void write_npy(const std::string& filename, const char* type_code, const void* data,
+               size_t element_size, const std::vector<size_t>& shape) {
+    std::ofstream file(filename, std::ios::binary);
+    if (!file.is_open()) return;
+    
+    size_t element_count = 1;
+    for (size_t dim : shape) {
+        element_count *= dim;
+    }
+    std::string header = npy_header(type_code, shape);
+    file.write(header.data(), header.size());
+    file.write(static_cast<const char*>(data), element_count * element_size);
+}
+
+NpyStreamWriter::NpyStreamWriter() : element_size(0), row_width(0), rows(0) {}
+
+bool NpyStreamWriter::open(const std::string& filename, const char* code, size_t size, size_t width) {
+    close();
+    file.open(filename, std::ios::binary | std::ios::trunc);
+    type_code = code;
+    element_size = size;
+    row_width = width;
+    rows = 0;
+    if (!file.is_open()) return false;
+    write_header();
+    return true;
+}
+
+bool NpyStreamWriter::reopen(const std::string& filename, const char* code, size_t size, size_t width,
+                             size_t row_count) {
+    close();
+    type_code = code;
+    element_size = size;
+    row_width = width;
+    rows = row_count;
+    
+    std::error_code error;
+    const uintmax_t length = STREAM_HEADER_SIZE + rows * std::max<size_t>(row_width, 1) * element_size;
+    const uintmax_t written = std::filesystem::file_size(filename, error);
+    if (error || written < length) return false;
+    std::filesystem::resize_file(filename, length, error);
+    if (error) return false;
+    file.open(filename, std::ios::binary | std::ios::in | std::ios::out);
+    if (!file.is_open()) return false;
+    file.seekp(0, std::ios::end);
+    return true;
+}
+
+void NpyStreamWriter::write_header() {
+    std::vector<size_t> shape = {rows};
+    if (row_width > 0) shape.push_back(row_width);
+    std::string header = npy_header(type_code, shape, STREAM_HEADER_SIZE);
+    file.write(header.data(), header.size());
+}
+
+void NpyStreamWriter::append(const void* data, size_t element_count) {
+    if (!file.is_open() || element_count == 0) return;
+    file.write(static_cast<const char*>(data), element_count * element_size);
+    rows += row_width > 0 ? element_count / row_width : element_count;
+}
+
+void NpyStreamWriter::flush() {
+    if (file.is_open()) file.flush();
+}
+
+void NpyStreamWriter::close() {
+    if (!file.is_open()) return;
+    file.seekp(0);
+    write_header();
+    file.close();
+}
+
+NpyStreamWriter::~NpyStreamWriter() {
+    close();
+}
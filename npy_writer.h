@@ -0,0 +1,45 @@
+#ifndef NPY_WRITER_H
+#define NPY_WRITER_H
+
+#include <string>
+#include <vector>
+#include <fstream>
+
+// write a C-ordered array in NumPy .npy format (version 1.0), which np.load can memory-map;
+// type_code is the dtype without byte order, e.g. "f4" or "i4"
+void write_npy(const std::string& filename, const char* type_code, const void* data,
+               size_t element_size, const std::vector<size_t>& shape);
+
+// appends rows to a .npy file whose length is not known in advance. the header is
+// reserved up front and rewritten with the final row count by close()
+class NpyStreamWriter {
+private:
+    std::ofstream file;
+    std::string type_code;
+    size_t element_size;
+    size_t row_width;   // elements per row; 0 for a one-dimensional array
+    size_t rows;
+    
+    void write_header();
+
+public:
+    NpyStreamWriter();
+    
+    // row_width 0 writes a 1-D array, otherwise a (rows, row_width) matrix
+    bool open(const std::string& filename, const char* type_code, size_t element_size, size_t row_width = 0);
+    // continue a stream after its first rows, dropping anything written after them
+    bool reopen(const std::string& filename, const char* type_code, size_t element_size, size_t row_width,
+                size_t rows);
+    // element_count must be a multiple of row_width for 2-D arrays
+    void append(const void* data, size_t element_count);
+    void close();
+    // push appended rows to the file, without finishing the header
+    void flush();
+    
+    inline bool is_open() const { return file.is_open(); }
+    inline size_t get_rows() const { return rows; }
+    
+    ~NpyStreamWriter();
+};
+
+#endif
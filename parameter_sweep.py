@@ -0,0 +1,230 @@
+import itertools
+import json
+import os
+import time
+import numpy as np
+import neuron_simulator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from simulation_io import RECORDINGS
+
+CONDITION_FIELDS = ['glucose_level', 'atp_efficiency', 'ion_pump_function', 'neurotransmitter_synthesis',
+                    'membrane_integrity', 'oxidative_stress', 'progressive', 'onset_timestep']
+STABILITY_METRICS = ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy',
+                     'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']
+SPEC_FIELDS = ['pyramidal_count', 'interneuron_count', 'purkinje_count', 'motor_count', 'sensory_count',
+               'connection_density']
+DYNAMICS_FIELDS = ['pyramidal_dynamics', 'interneuron_dynamics', 'purkinje_dynamics', 'motor_dynamics',
+                   'sensory_dynamics']
+MODEL_PARAMETERS = {
+    'lif': ['tau_m', 'v_reset', 'refractory_ms', 'input_gain'],
+    'izhikevich': ['a', 'b', 'c', 'd', 'v_peak', 'input_gain'],
+    'adex': ['c_m', 'g_l', 'e_l', 'v_t', 'delta_t', 'tau_w', 'a', 'b', 'v_reset', 'v_peak', 'input_gain'],
+}
+
+# one simulator per worker process, created by _init_worker
+_worker = {}
+
+
+def condition_to_dict(condition):
+    fields = {field: getattr(condition, field) for field in CONDITION_FIELDS}
+    fields['name'] = condition.name
+    return fields
+
+
+def condition_from_dict(fields):
+    condition = neuron_simulator.MetabolicCondition()
+    for field, value in fields.items():
+        setattr(condition, field, value)
+    return condition
+
+
+def spec_to_dict(spec):
+    # every field of a PopulationSpec, including the dynamics model of each type, as plain values
+    fields = {field: getattr(spec, field) for field in SPEC_FIELDS}
+    for field in DYNAMICS_FIELDS:
+        dynamics = getattr(spec, field)
+        fields[field] = {'model': dynamics.model.name}
+        for model, names in MODEL_PARAMETERS.items():
+            parameters = getattr(dynamics, model)
+            fields[field][model] = {name: getattr(parameters, name) for name in names}
+    return fields
+
+
+def spec_from_dict(fields):
+    spec = neuron_simulator.PopulationSpec()
+    for field in SPEC_FIELDS:
+        setattr(spec, field, fields[field])
+    for field in DYNAMICS_FIELDS:
+        dynamics = neuron_simulator.DynamicsModel(getattr(neuron_simulator.NeuronModel, fields[field]['model']))
+        for model, names in MODEL_PARAMETERS.items():
+            parameters = getattr(dynamics, model)
+            for name in names:
+                setattr(parameters, name, fields[field][model][name])
+        setattr(spec, field, dynamics)
+    return spec
+
+
+def _check_fields(names):
+    unknown = set(names) - set(CONDITION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown MetabolicCondition fields: {sorted(unknown)}")
+
+
+def grid_points(grid):
+    # every combination of the listed values, e.g. {'atp_efficiency': [0.2, 0.5], 'oxidative_stress': [0.1, 0.6]}
+    _check_fields(grid)
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_points(ranges, samples, seed=0):
+    # uniform samples within (low, high) for each field
+    _check_fields(ranges)
+    rng = np.random.default_rng(seed)
+    columns = {name: rng.uniform(low, high, samples) for name, (low, high) in ranges.items()}
+    return [{name: float(columns[name][i]) for name in ranges} for i in range(samples)]
+
+
+def _run_key(point, seed, max_timesteps):
+    return json.dumps({'point': point, 'seed': seed, 'max_timesteps': max_timesteps}, sort_keys=True)
+
+
+def _init_worker(spec_fields, engine_name, analysis):
+    spec = spec_from_dict(spec_fields)
+    if spec_to_dict(spec) != spec_fields:
+        raise RuntimeError("Worker population spec does not match the sweep's spec")
+    simulator = neuron_simulator.NeuronSimulator(spec)
+    simulator.set_engine(getattr(neuron_simulator.SimulationEngine, engine_name))
+    _worker['simulator'] = simulator
+    _worker['analysis'] = analysis
+
+
+def _run_point(key, base_fields, point, seed, max_timesteps):
+    simulator = _worker['simulator']
+    condition = condition_from_dict({**base_fields, **point})
+    simulator.set_seed(seed)
+    simulator.run_metabolic_dysfunction_simulation(condition, max_timesteps)
+    data = simulator.get_simulation_data()
+    metrics = simulator.calculate_stability_metrics()
+    
+    row = {'run_key': key, **point, 'seed': seed, 'max_timesteps': max_timesteps,
+           'total_spikes': data.total_spikes,
+           'spike_rate': data.total_spikes / data.total_timesteps if data.total_timesteps > 0 else 0.0}
+    for name in STABILITY_METRICS:
+        row[name] = float(getattr(metrics, name))
+    if _worker['analysis'] is not None:
+        recordings = {name: getattr(data, name) for name in RECORDINGS}
+        for name, value in _worker['analysis'](recordings).items():
+            row[name] = float(value)
+    return row
+
+
+def _sweep_settings(base_fields, spec_fields, engine, analysis):
+    # everything besides the run key that a row depends on; written as the first line of the
+    # results file, so a file is only resumed by the sweep that wrote it
+    analysis_name = None
+    if analysis is not None:
+        analysis_name = f"{getattr(analysis, '__module__', '')}.{getattr(analysis, '__qualname__', repr(analysis))}"
+    settings = {'base_condition': base_fields, 'spec': spec_fields, 'engine': engine.name,
+                'analysis': analysis_name}
+    return json.loads(json.dumps(settings))
+
+
+def _read_settings(results_path):
+    # the settings line of a results file, None for a missing or empty file
+    if not results_path or not os.path.exists(results_path):
+        return None
+    with open(results_path) as f:
+        for line in f:
+            if line.strip():
+                first = json.loads(line)
+                if 'sweep' not in first:
+                    raise ValueError(f"{results_path} has no sweep settings line; it cannot be resumed")
+                return first['sweep']
+    return None
+
+
+def _check_settings(results_path, settings):
+    stored = _read_settings(results_path)
+    if stored is None:
+        return False
+    different = sorted(name for name in set(stored) | set(settings) if stored.get(name) != settings.get(name))
+    if different:
+        raise ValueError(f"{results_path} was written by a sweep with different {', '.join(different)}; "
+                         "use a new results_path")
+    return True
+
+
+def load_results(results_path):
+    rows = []
+    if results_path and os.path.exists(results_path):
+        with open(results_path) as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [row for row in rows if 'sweep' not in row]
+
+
+def to_table(rows):
+    # tidy table: one entry per run, one NumPy column per parameter or metric
+    # (pandas.DataFrame(table) if a DataFrame is wanted)
+    columns = []
+    for row in rows:
+        columns.extend(name for name in row if name not in columns)
+    return {name: np.array([row.get(name, np.nan) for row in rows]) for name in columns}
+
+
+def run_sweep(base_condition, points, seeds=(0,), max_timesteps=3000, spec=None,
+              engine=neuron_simulator.SimulationEngine.OBJECT, analysis=None,
+              results_path=None, workers=None, verbose=True):
+    # runs base_condition with each point's fields overridden, once per seed, in a process
+    # pool. analysis(recordings) -> dict adds per-run metrics (e.g. calculate_advanced_metrics).
+    # completed runs are appended to results_path as JSON lines, and runs already in the
+    # file are skipped, so an interrupted sweep resumes where it stopped. the file starts with
+    # the base condition, spec, engine and analysis it was written with, and a sweep with
+    # different ones raises ValueError instead of resuming from it
+    for point in points:
+        _check_fields(point)
+    spec = spec if spec is not None else neuron_simulator.PopulationSpec()
+    spec_fields = spec_to_dict(spec)
+    base_fields = condition_to_dict(base_condition)
+    settings = _sweep_settings(base_fields, spec_fields, engine, analysis)
+    resuming = _check_settings(results_path, settings)
+    
+    rows = load_results(results_path)
+    done = {row['run_key'] for row in rows}
+    tasks = []
+    for point in points:
+        for seed in seeds:
+            key = _run_key(point, seed, max_timesteps)
+            if key not in done:
+                tasks.append((key, point, seed))
+    
+    total = len(tasks)
+    if verbose:
+        print(f"Parameter sweep: {total} runs to do, {len(done)} already done")
+    if total == 0:
+        return to_table(rows)
+    
+    results_file = open(results_path, 'a') if results_path else None
+    if results_file and not resuming:
+        results_file.write(json.dumps({'sweep': settings}) + '\n')
+        results_file.flush()
+    start = time.time()
+    try:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                                 initargs=(spec_fields, engine.name, analysis)) as executor:
+            futures = [executor.submit(_run_point, key, base_fields, point, seed, max_timesteps)
+                       for key, point, seed in tasks]
+            for completed, future in enumerate(as_completed(futures), 1):
+                row = future.result()
+                rows.append(row)
+                if results_file:
+                    results_file.write(json.dumps(row) + '\n')
+                    results_file.flush()
+                if verbose:
+                    elapsed = time.time() - start
+                    remaining = elapsed / completed * (total - completed)
+                    print(f"[{completed}/{total}] {elapsed:.0f}s elapsed, about {remaining:.0f}s remaining")
+    finally:
+        if results_file:
+            results_file.close()
+    return to_table(rows)
@@ -0,0 +1,48 @@
+#ifndef PERF_COUNTERS_H
+#define PERF_COUNTERS_H
+
+#include <chrono>
+#include <cstddef>
+
+// where the time of the last run went. phases are timed once per call, and events are
+// counted once per timestep from queue sizes, so nothing is added per spike or per
+// synapse; with profiling disabled every timer gets a null target and does nothing
+struct PerfCounters {
+    double run_seconds = 0.0;         // whole run, including network construction
+    double build_seconds = 0.0;       // network construction (and SOA compilation)
+    double delivery_seconds = 0.0;    // delivering due spikes through synapses
+    double stimulation_seconds = 0.0; // background activity and metabolic dysfunction
+    double update_seconds = 0.0;      // neuron updates and spike detection
+    double plasticity_seconds = 0.0;  // STDP and homeostatic weight updates
+    double recording_seconds = 0.0;   // gathering potentials, recording, online metrics
+    double export_seconds = 0.0;      // CSV and .npy exports since the run
+    
+    long long timesteps = 0;
+    long long spikes = 0;
+    long long propagation_events = 0;  // spikes delivered to a synapse
+    long long scheduled_events = 0;    // spikes queued on a synapse for later delivery
+    size_t max_queue_depth = 0;        // most deliveries pending at once
+    long long buffer_allocations = 0;  // timesteps in which a hot-path buffer had to grow
+    long long export_bytes = 0;
+};
+
+// adds the lifetime of the timer to *total_seconds, unless total_seconds is null
+class PhaseTimer {
+private:
+    double* total_seconds;
+    std::chrono::steady_clock::time_point start;
+
+public:
+    explicit PhaseTimer(double* total) : total_seconds(total) {
+        if (total_seconds) start = std::chrono::steady_clock::now();
+    }
+    ~PhaseTimer() {
+        if (total_seconds) {
+            *total_seconds += std::chrono::duration<double>(std::chrono::steady_clock::now() - start).count();
+        }
+    }
+    PhaseTimer(const PhaseTimer&) = delete;
+    PhaseTimer& operator=(const PhaseTimer&) = delete;
+};
+
+#endif
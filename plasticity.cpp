@@ -0,0 +1,163 @@
+#include "plasticity.h"
+#include <algorithm>
+#include <cmath>
+#include <stdexcept>
+
+namespace {
+
+const float TRACE_WINDOW_TAUS = 10.0f; // traces are cut off after this many time constants
+
+std::vector<float> decay_table(float tau) {
+    std::vector<float> table(static_cast<size_t>(std::ceil(TRACE_WINDOW_TAUS * tau)) + 1);
+    for (size_t i = 0; i < table.size(); ++i) {
+        table[i] = std::exp(-static_cast<float>(i) / tau);
+    }
+    return table;
+}
+
+inline float decayed(const Trace& trace, int timestep, const std::vector<float>& table) {
+    const int elapsed = timestep - trace.timestep;
+    return elapsed < static_cast<int>(table.size()) ? trace.value * table[elapsed] : 0.0f;
+}
+
+// add one spike at timestep to trace
+inline void bump(Trace& trace, int timestep, const std::vector<float>& table) {
+    trace.value = decayed(trace, timestep, table) + 1.0f;
+    trace.timestep = timestep;
+}
+
+} // namespace
+
+void SynapticPlasticity::validate(const PlasticityParameters& values) {
+    if (values.a_plus < 0.0f || values.a_minus < 0.0f) {
+        throw std::invalid_argument("STDP amplitudes must be non-negative");
+    }
+    if (values.tau_plus <= 0.0f || values.tau_minus <= 0.0f) {
+        throw std::invalid_argument("STDP time constants must be positive");
+    }
+    if (values.target_rate <= 0.0f) {
+        throw std::invalid_argument("homeostatic target rate must be positive");
+    }
+    if (values.scaling_rate < 0.0f || values.scaling_rate >= 1.0f) {
+        throw std::invalid_argument("homeostatic scaling rate must be in [0, 1)");
+    }
+    if (values.scaling_interval < 0) {
+        throw std::invalid_argument("homeostatic scaling interval must be non-negative");
+    }
+}
+
+void SynapticPlasticity::build_index(const SynapseMatrix& synapses) {
+    const int n = synapses.get_neuron_count();
+    incoming_offsets.assign(n + 1, 0);
+    for (int idx = 0; idx < synapses.get_synapse_count(); ++idx) {
+        if (!synapses.is_inhibitory(idx)) incoming_offsets[synapses.get_target(idx) + 1]++;
+    }
+    for (int i = 0; i < n; ++i) {
+        incoming_offsets[i + 1] += incoming_offsets[i];
+    }
+    incoming.resize(incoming_offsets[n]);
+    std::vector<int> fill(incoming_offsets.begin(), incoming_offsets.end() - 1);
+    for (int idx = 0; idx < synapses.get_synapse_count(); ++idx) {
+        if (!synapses.is_inhibitory(idx)) incoming[fill[synapses.get_target(idx)]++] = idx;
+    }
+    
+    pre_decay = decay_table(parameters.tau_plus);
+    post_decay = decay_table(parameters.tau_minus);
+}
+
+void SynapticPlasticity::reset(const PlasticityParameters& values, const SynapseMatrix& synapses) {
+    validate(values);
+    parameters = values;
+    build_index(synapses);
+    
+    const int n = synapses.get_neuron_count();
+    pre_traces.assign(synapses.get_synapse_count(), Trace{0.0f, 0});
+    post_traces.assign(n, Trace{0.0f, 0});
+    spike_counts.assign(n, 0);
+}
+
+void SynapticPlasticity::clear() {
+    incoming_offsets.clear();
+    incoming.clear();
+    pre_traces.clear();
+    post_traces.clear();
+    spike_counts.clear();
+    pre_decay.clear();
+    post_decay.clear();
+}
+
+void SynapticPlasticity::update(int timestep, const std::vector<IndexedSignal>& arrivals,
+                                const std::vector<int>& fired, const std::vector<int>& forced,
+                                SynapseMatrix& synapses, std::vector<InputChange>* changes) {
+    // depression: transmitted presynaptic arrivals after postsynaptic spikes
+    for (const IndexedSignal& signal : arrivals) {
+        const int idx = signal.synapse;
+        if (synapses.is_inhibitory(idx)) continue;
+        const int target = synapses.get_target(idx);
+        const float post = decayed(post_traces[target], timestep, post_decay);
+        if (post > 0.0f) {
+            const float change = synapses.adjust_weight(idx, -parameters.a_minus * post);
+            if (changes && change != 0.0f) changes->push_back(InputChange{target, change});
+        }
+        bump(pre_traces[idx], timestep, pre_decay);
+    }
+    
+    // potentiation: postsynaptic spikes after presynaptic arrivals
+    for (int neuron_id : fired) {
+        potentiate(timestep, neuron_id, synapses, changes);
+        spike_counts[neuron_id]++;
+    }
+    for (int neuron_id : forced) {
+        potentiate(timestep, neuron_id, synapses, changes);
+    }
+    
+    if (parameters.scaling_interval > 0 && (timestep + 1) % parameters.scaling_interval == 0) {
+        scale(synapses, changes);
+    }
+}
+
+void SynapticPlasticity::potentiate(int timestep, int neuron_id, SynapseMatrix& synapses,
+                                    std::vector<InputChange>* changes) {
+    float total = 0.0f;
+    for (int k = incoming_offsets[neuron_id]; k < incoming_offsets[neuron_id + 1]; ++k) {
+        const int idx = incoming[k];
+        const float pre = decayed(pre_traces[idx], timestep, pre_decay);
+        if (pre > 0.0f) total += synapses.adjust_weight(idx, parameters.a_plus * pre);
+    }
+    if (changes && total != 0.0f) changes->push_back(InputChange{neuron_id, total});
+    bump(post_traces[neuron_id], timestep, post_decay);
+}
+
+void SynapticPlasticity::scale(SynapseMatrix& synapses, std::vector<InputChange>* changes) {
+    const int n = static_cast<int>(spike_counts.size());
+    for (int neuron_id = 0; neuron_id < n; ++neuron_id) {
+        const float rate = static_cast<float>(spike_counts[neuron_id]) / parameters.scaling_interval;
+        const float error = std::clamp((parameters.target_rate - rate) / parameters.target_rate, -1.0f, 1.0f);
+        spike_counts[neuron_id] = 0;
+        if (error == 0.0f) continue;
+        
+        // multiplicative, so the relative strengths learned by STDP are kept
+        const float factor = parameters.scaling_rate * error;
+        float total = 0.0f;
+        for (int k = incoming_offsets[neuron_id]; k < incoming_offsets[neuron_id + 1]; ++k) {
+            const int idx = incoming[k];
+            total += synapses.adjust_weight(idx, synapses.get_weight(idx) * factor);
+        }
+        if (changes && total != 0.0f) changes->push_back(InputChange{neuron_id, total});
+    }
+}
+
+void SynapticPlasticity::save(CheckpointWriter& writer) const {
+    writer.write(parameters);
+    writer.write_vector(pre_traces);
+    writer.write_vector(post_traces);
+    writer.write_vector(spike_counts);
+}
+
+void SynapticPlasticity::load(CheckpointReader& reader, const SynapseMatrix& synapses) {
+    parameters = reader.read<PlasticityParameters>();
+    reader.read_vector(pre_traces);
+    reader.read_vector(post_traces);
+    reader.read_vector(spike_counts);
+    build_index(synapses);
+}
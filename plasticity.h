@@ -0,0 +1,85 @@
+#ifndef PLASTICITY_H
+#define PLASTICITY_H
+
+#include <vector>
+#include "synapse_matrix.h"
+#include "spike_queue.h"
+#include "checkpoint.h"
+
+struct PlasticityParameters {
+    // pair-based STDP on excitatory synapses, weights in mV
+    float a_plus = 0.001f;   // potentiation per pairing with a presynaptic arrival just before
+    float a_minus = 0.00105f;// depression per pairing with a postsynaptic spike just before
+    float tau_plus = 20.0f;  // ms, decay of the presynaptic trace
+    float tau_minus = 20.0f; // ms, decay of the postsynaptic trace
+    // homeostatic scaling of each neuron's excitatory inputs toward a target rate
+    float target_rate = 0.01f;   // spikes per timestep (10 Hz)
+    float scaling_rate = 0.1f;   // largest relative weight change per scaling
+    int scaling_interval = 1000; // timesteps between scalings; 0 disables scaling
+};
+
+// a trace and the timestep it was last updated at, kept together so a lookup is one access
+struct Trace {
+    float value;
+    int timestep;
+};
+
+// one change to the summed static input of a neuron, caused by a weight change
+struct InputChange {
+    int neuron;
+    float change;
+};
+
+// STDP and synaptic scaling on the weights of a SynapseMatrix. each synapse keeps a
+// presynaptic trace that is bumped when a spike arrives, after the synapse's own delay,
+// and each neuron a postsynaptic trace bumped when it fires. traces are decayed lazily
+// from the timestep they were last touched, so a timestep only costs work for the
+// arrivals and spikes it had, and the weight updates of a timestep are applied together
+// in one pass after the neurons have been updated. inhibitory synapses are not plastic
+class SynapticPlasticity {
+private:
+    PlasticityParameters parameters;
+    
+    // excitatory synapses by target: those of neuron i span [incoming_offsets[i], incoming_offsets[i+1])
+    std::vector<int> incoming_offsets;
+    std::vector<int> incoming;
+    
+    std::vector<Trace> pre_traces;  // per synapse
+    std::vector<Trace> post_traces; // per neuron
+    std::vector<int> spike_counts; // evoked spikes per neuron since the last scaling
+    
+    // decay factor after i timesteps; traces older than the table are 0
+    std::vector<float> pre_decay;
+    std::vector<float> post_decay;
+    
+    void build_index(const SynapseMatrix& synapses);
+    void potentiate(int timestep, int neuron_id, SynapseMatrix& synapses, std::vector<InputChange>* changes);
+    void scale(SynapseMatrix& synapses, std::vector<InputChange>* changes);
+
+public:
+    SynapticPlasticity() = default;
+    
+    // start with empty traces on the synapses of a built network; throws
+    // std::invalid_argument on invalid parameters
+    void reset(const PlasticityParameters& values, const SynapseMatrix& synapses);
+    void clear();
+    inline bool enabled() const { return !incoming_offsets.empty(); }
+    inline const PlasticityParameters& get_parameters() const { return parameters; }
+    
+    // the batched update of one timestep: depression for every arrival that transmitted
+    // (taking the postsynaptic spikes up to the previous timestep), then potentiation for
+    // every spike, evoked by input (fired) or forced by stimulation (forced). an arrival in the
+    // same timestep as a postsynaptic spike counts as preceding it. only evoked spikes
+    // count toward the scaling rate, since scaling inputs cannot change forced ones.
+    // the change to each target's summed input is appended to changes, unless it is null
+    void update(int timestep, const std::vector<IndexedSignal>& arrivals, const std::vector<int>& fired,
+                const std::vector<int>& forced, SynapseMatrix& synapses, std::vector<InputChange>* changes);
+    
+    // traces and counts; the index is rebuilt from synapses
+    void save(CheckpointWriter& writer) const;
+    void load(CheckpointReader& reader, const SynapseMatrix& synapses);
+    
+    static void validate(const PlasticityParameters& values);
+};
+
+#endif
@@ -0,0 +1,64 @@
+import numpy as np
+
+# level-of-detail reductions for plotting long recordings. a figure column is at most
+# a few thousand pixels wide, so drawing more points than that only costs time and memory
+
+ENVELOPE_COLUMNS = 2000
+# raster bins about the size of a scattered spike marker in the analysis figure
+RASTER_COLUMNS = 500
+RASTER_ROWS = 100
+
+
+def envelope(y, columns=ENVELOPE_COLUMNS):
+    # min/max envelope of y (samples along axis 0) over `columns` runs of consecutive
+    # samples. returns (sample indices, values) with the minimum and maximum of each run in
+    # the order they occur, so a line through them covers the same pixels as one through
+    # every sample. series of up to 2 x columns samples are returned whole
+    y = np.asarray(y)
+    count = len(y)
+    if count <= 2 * columns:
+        indices = np.arange(count)
+        if y.ndim > 1:
+            indices = np.broadcast_to(indices[:, None], y.shape)
+        return indices, y
+    
+    run = -(-count // columns)
+    columns = -(-count // run)
+    # the last run is padded with its final sample
+    padded = np.pad(y, [(0, columns * run - count)] + [(0, 0)] * (y.ndim - 1), mode='edge')
+    runs = padded.reshape((columns, run) + y.shape[1:])
+    low = runs.argmin(axis=1)
+    high = runs.argmax(axis=1)
+    first = np.minimum(low, high)
+    second = np.maximum(low, high)
+    
+    starts = (np.arange(columns) * run).reshape((columns,) + (1,) * (y.ndim - 1))
+    indices = np.stack([starts + first, starts + second], axis=1).reshape((2 * columns,) + y.shape[1:])
+    indices = np.minimum(indices, count - 1)
+    return indices, np.take_along_axis(y, indices, axis=0) if y.ndim > 1 else y[indices]
+
+
+def distinct_points(values, columns=ENVELOPE_COLUMNS):
+    # scatter points of an integer series (e.g. spikes per timestep) with each value drawn
+    # once per run of samples instead of once per sample. returns (x, y), x being the
+    # centre of the run
+    values = np.asarray(values)
+    count = len(values)
+    if count <= 2 * columns:
+        return np.arange(count), values
+    
+    run = -(-count // columns)
+    runs = np.arange(count) // run
+    offset = values.min()
+    span = int(values.max() - offset) + 1
+    keys = np.unique(runs * span + (values - offset))
+    return (keys // span) * run + (run - 1) / 2, keys % span + offset
+
+
+def raster_density(spike_times, spike_neurons, timesteps, neuron_count,
+                   columns=RASTER_COLUMNS, rows=RASTER_ROWS):
+    # spike counts on a (neuron bins x timestep bins) grid covering timesteps [0, timesteps)
+    # and neuron ids [-0.5, neuron_count - 0.5). with fewer neurons than rows each neuron
+    # falls in one thin band, much as a scattered raster draws it
+    return np.histogram2d(spike_neurons, spike_times, bins=[rows, min(timesteps, columns)],
+                          range=[[-0.5, neuron_count - 0.5], [0, timesteps]])[0]
@@ -1,12 +1,121 @@
 #include <pybind11/pybind11.h>
 #include <pybind11/stl.h>
+#include <pybind11/numpy.h>
+#include <pybind11/functional.h>
 #include "neuron_simulator.h"
+#include <algorithm>
+#include <numeric>
 
 namespace py = pybind11;
 
+namespace {
+
+// read-only NumPy view of a recording buffer; owner keeps the buffer alive
+template <typename T>
+py::array_t<T> recording_view(const std::vector<T>& buffer, std::vector<py::ssize_t> shape, py::handle owner) {
+    py::array_t<T> view(shape, buffer.data(), owner);
+    view.attr("flags").attr("writeable") = false;
+    return view;
+}
+
+} // namespace
+
 PYBIND11_MODULE(neuron_simulator, m) {
     m.doc() = "Neural Network Simulator with Metabolic Dysfunction";
     
+    py::enum_<SimulationEngine>(m, "SimulationEngine")
+        .value("OBJECT", SimulationEngine::OBJECT)
+        .value("SOA", SimulationEngine::SOA);
+    
+    py::enum_<SynapticIntegration>(m, "SynapticIntegration")
+        .value("STATIC", SynapticIntegration::STATIC)
+        .value("EVENT_DRIVEN", SynapticIntegration::EVENT_DRIVEN);
+    
+    py::enum_<NeuronModel>(m, "NeuronModel")
+        .value("LEGACY", NeuronModel::LEGACY)
+        .value("LIF", NeuronModel::LIF)
+        .value("IZHIKEVICH", NeuronModel::IZHIKEVICH)
+        .value("ADEX", NeuronModel::ADEX);
+    
+    py::class_<LifParameters>(m, "LifParameters")
+        .def(py::init<>())
+        .def_readwrite("tau_m", &LifParameters::tau_m)
+        .def_readwrite("v_reset", &LifParameters::v_reset)
+        .def_readwrite("refractory_ms", &LifParameters::refractory_ms)
+        .def_readwrite("input_gain", &LifParameters::input_gain);
+    
+    py::class_<IzhikevichParameters>(m, "IzhikevichParameters")
+        .def(py::init<>())
+        .def_readwrite("a", &IzhikevichParameters::a)
+        .def_readwrite("b", &IzhikevichParameters::b)
+        .def_readwrite("c", &IzhikevichParameters::c)
+        .def_readwrite("d", &IzhikevichParameters::d)
+        .def_readwrite("v_peak", &IzhikevichParameters::v_peak)
+        .def_readwrite("input_gain", &IzhikevichParameters::input_gain);
+    
+    py::class_<AdExParameters>(m, "AdExParameters")
+        .def(py::init<>())
+        .def_readwrite("c_m", &AdExParameters::c_m)
+        .def_readwrite("g_l", &AdExParameters::g_l)
+        .def_readwrite("e_l", &AdExParameters::e_l)
+        .def_readwrite("v_t", &AdExParameters::v_t)
+        .def_readwrite("delta_t", &AdExParameters::delta_t)
+        .def_readwrite("tau_w", &AdExParameters::tau_w)
+        .def_readwrite("a", &AdExParameters::a)
+        .def_readwrite("b", &AdExParameters::b)
+        .def_readwrite("v_reset", &AdExParameters::v_reset)
+        .def_readwrite("v_peak", &AdExParameters::v_peak)
+        .def_readwrite("input_gain", &AdExParameters::input_gain);
+    
+    py::class_<PlasticityParameters>(m, "PlasticityParameters")
+        .def(py::init<>())
+        .def_readwrite("a_plus", &PlasticityParameters::a_plus)
+        .def_readwrite("a_minus", &PlasticityParameters::a_minus)
+        .def_readwrite("tau_plus", &PlasticityParameters::tau_plus)
+        .def_readwrite("tau_minus", &PlasticityParameters::tau_minus)
+        .def_readwrite("target_rate", &PlasticityParameters::target_rate)
+        .def_readwrite("scaling_rate", &PlasticityParameters::scaling_rate)
+        .def_readwrite("scaling_interval", &PlasticityParameters::scaling_interval);
+    
+    py::class_<DynamicsModel>(m, "DynamicsModel")
+        .def(py::init<>())
+        .def(py::init([](NeuronModel model) {
+                 DynamicsModel dynamics;
+                 dynamics.model = model;
+                 return dynamics;
+             }),
+             py::arg("model"))
+        .def_readwrite("model", &DynamicsModel::model)
+        .def_readwrite("lif", &DynamicsModel::lif)
+        .def_readwrite("izhikevich", &DynamicsModel::izhikevich)
+        .def_readwrite("adex", &DynamicsModel::adex);
+    
+    py::class_<NeuronGroup>(m, "NeuronGroup")
+        .def_readonly("begin", &NeuronGroup::begin)
+        .def_readonly("end", &NeuronGroup::end)
+        .def_readonly("dynamics", &NeuronGroup::dynamics);
+    
+    py::class_<PopulationSpec>(m, "PopulationSpec")
+        .def(py::init<>())
+        .def_readwrite("pyramidal_count", &PopulationSpec::pyramidal_count)
+        .def_readwrite("interneuron_count", &PopulationSpec::interneuron_count)
+        .def_readwrite("purkinje_count", &PopulationSpec::purkinje_count)
+        .def_readwrite("motor_count", &PopulationSpec::motor_count)
+        .def_readwrite("sensory_count", &PopulationSpec::sensory_count)
+        .def_readwrite("connection_density", &PopulationSpec::connection_density)
+        .def_readwrite("pyramidal_dynamics", &PopulationSpec::pyramidal_dynamics)
+        .def_readwrite("interneuron_dynamics", &PopulationSpec::interneuron_dynamics)
+        .def_readwrite("purkinje_dynamics", &PopulationSpec::purkinje_dynamics)
+        .def_readwrite("motor_dynamics", &PopulationSpec::motor_dynamics)
+        .def_readwrite("sensory_dynamics", &PopulationSpec::sensory_dynamics)
+        .def("total_size", &PopulationSpec::total_size,
+             "Total number of neurons in the population")
+        .def("scaled_to", &PopulationSpec::scaled_to,
+             "Copy of this spec with the same type proportions scaled to total_size neurons",
+             py::arg("total_size"))
+        .def("neuron_groups", &PopulationSpec::neuron_groups,
+             "Contiguous neuron id ranges of the non-empty types, in type order, with their dynamics");
+    
     py::class_<MetabolicCondition>(m, "MetabolicCondition")
         .def(py::init<>())
         .def_readwrite("name", &MetabolicCondition::name)
@@ -25,28 +134,343 @@ PYBIND11_MODULE(neuron_simulator, m) {
         .def_readwrite("burst_coefficient", &StabilityMetrics::burst_coefficient)
         .def_readwrite("synchrony_index", &StabilityMetrics::synchrony_index)
         .def_readwrite("entropy", &StabilityMetrics::entropy)
+        .def_readwrite("lyapunov_exponent", &StabilityMetrics::lyapunov_exponent)
         .def_readwrite("homeostatic_deviation", &StabilityMetrics::homeostatic_deviation)
         .def_readwrite("network_coherence", &StabilityMetrics::network_coherence)
         .def_readwrite("critical_branching_ratio", &StabilityMetrics::critical_branching_ratio);
     
-    py::class_<SimulationData>(m, "SimulationData")
+    py::class_<SimulationData, std::shared_ptr<SimulationData>>(m, "SimulationData")
         .def(py::init<>())
-        .def_readwrite("membrane_potentials", &SimulationData::membrane_potentials)
-        .def_readwrite("spike_events", &SimulationData::spike_events)
-        .def_readwrite("network_activity", &SimulationData::network_activity)
-        .def_readwrite("total_timesteps", &SimulationData::total_timesteps)
-        .def_readwrite("total_spikes", &SimulationData::total_spikes);
+        .def_property_readonly("membrane_potentials", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.membrane_potentials,
+                                  {static_cast<py::ssize_t>(data.recorded_timesteps.size()),
+                                   static_cast<py::ssize_t>(data.recorded_neurons.size())}, self);
+        }, "Membrane potentials as a float32 array of shape (recorded timesteps, recorded neurons), without copying")
+        .def_property_readonly("recorded_timesteps", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.recorded_timesteps, {static_cast<py::ssize_t>(data.recorded_timesteps.size())}, self);
+        }, "Timestep of each membrane_potentials row and network_activity entry as an int32 array")
+        .def_property_readonly("recorded_neurons", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.recorded_neurons, {static_cast<py::ssize_t>(data.recorded_neurons.size())}, self);
+        }, "Neuron id of each membrane_potentials column as an int32 array")
+        .def_property_readonly("spike_times", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.spike_times, {static_cast<py::ssize_t>(data.spike_times.size())}, self);
+        }, "Timestep of each recorded spike as an int32 array")
+        .def_property_readonly("spike_neurons", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.spike_neurons, {static_cast<py::ssize_t>(data.spike_neurons.size())}, self);
+        }, "Neuron id of each recorded spike as an int32 array, parallel to spike_times")
+        .def_property_readonly("spikes_per_timestep", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.spikes_per_timestep, {static_cast<py::ssize_t>(data.spikes_per_timestep.size())}, self);
+        }, "Number of spikes at each timestep from first_timestep on, as an int32 array")
+        .def_property_readonly("network_activity", [](py::object self) {
+            const SimulationData& data = self.cast<const SimulationData&>();
+            return recording_view(data.network_activity, {static_cast<py::ssize_t>(data.network_activity.size())}, self);
+        }, "Mean membrane potential at each recorded timestep as a float32 array")
+        .def_readonly("neuron_count", &SimulationData::neuron_count)
+        .def_readonly("first_timestep", &SimulationData::first_timestep)
+        .def_readonly("total_timesteps", &SimulationData::total_timesteps)
+        .def_readonly("total_spikes", &SimulationData::total_spikes)
+        .def_static("from_arrays",
+                    [](std::vector<int> spike_times, std::vector<int> spike_neurons,
+                       std::vector<int> spikes_per_timestep, py::object membrane_potentials,
+                       std::vector<float> network_activity, int neuron_count) {
+                        auto data = std::make_shared<SimulationData>();
+                        if (spike_times.size() != spike_neurons.size()) {
+                            throw std::invalid_argument("spike_times and spike_neurons must have the same length");
+                        }
+                        if (!std::is_sorted(spike_times.begin(), spike_times.end())) {
+                            throw std::invalid_argument("spike_times must be in time order");
+                        }
+                        size_t rows = 0, columns = 0;
+                        if (!membrane_potentials.is_none()) {
+                            auto potentials = py::array_t<float, py::array::c_style | py::array::forcecast>::ensure(
+                                membrane_potentials);
+                            if (!potentials || potentials.ndim() != 2) {
+                                throw std::invalid_argument("membrane_potentials must be a 2-d array");
+                            }
+                            rows = potentials.shape(0);
+                            columns = potentials.shape(1);
+                            data->membrane_potentials.assign(potentials.data(), potentials.data() + potentials.size());
+                            for (size_t t = 0; t < rows; ++t) data->recorded_timesteps.push_back(static_cast<int>(t));
+                            for (size_t i = 0; i < columns; ++i) data->recorded_neurons.push_back(static_cast<int>(i));
+                            if (network_activity.empty()) {
+                                // as recorded: the mean potential of each row
+                                for (size_t t = 0; t < rows; ++t) {
+                                    const float* row = data->membrane_potentials.data() + t * columns;
+                                    network_activity.push_back(std::accumulate(row, row + columns, 0.0f) / columns);
+                                }
+                            }
+                        }
+                        const int highest = spike_neurons.empty() ? -1
+                            : *std::max_element(spike_neurons.begin(), spike_neurons.end());
+                        if (neuron_count < 0) {
+                            neuron_count = std::max(highest + 1, static_cast<int>(columns));
+                        }
+                        if (highest >= neuron_count || (!spike_neurons.empty() &&
+                            *std::min_element(spike_neurons.begin(), spike_neurons.end()) < 0)) {
+                            throw std::invalid_argument("spike_neurons must be in [0, neuron_count)");
+                        }
+                        data->neuron_count = neuron_count;
+                        data->total_timesteps = static_cast<int>(std::max({spikes_per_timestep.size(), rows,
+                                                                           network_activity.size()}));
+                        data->total_spikes = static_cast<int>(spike_times.size());
+                        data->spike_times = std::move(spike_times);
+                        data->spike_neurons = std::move(spike_neurons);
+                        data->spikes_per_timestep = std::move(spikes_per_timestep);
+                        data->network_activity = std::move(network_activity);
+                        return data;
+                    },
+                    "Recordings built from arrays, e.g. to compute metrics of data recorded elsewhere; "
+                    "membrane_potentials has one row per timestep and one column per neuron, and "
+                    "network_activity defaults to its row means",
+                    py::arg("spike_times") = std::vector<int>(), py::arg("spike_neurons") = std::vector<int>(),
+                    py::arg("spikes_per_timestep") = std::vector<int>(), py::arg("membrane_potentials") = py::none(),
+                    py::arg("network_activity") = std::vector<float>(), py::arg("neuron_count") = -1);
     
-    py::class_<NeuronSimulator>(m, "NeuronSimulator")
+    py::enum_<EventType>(m, "EventType")
+        .value("RUN_START", EventType::RUN_START)
+        .value("RUN_RESUMED", EventType::RUN_RESUMED)
+        .value("DYSFUNCTION_ONSET", EventType::DYSFUNCTION_ONSET)
+        .value("REDUCED_EXCITABILITY", EventType::REDUCED_EXCITABILITY)
+        .value("DEPOLARIZATION_BLOCK", EventType::DEPOLARIZATION_BLOCK)
+        .value("HYPERGLYCEMIC_BURST", EventType::HYPERGLYCEMIC_BURST)
+        .value("HYPOXIC_CASCADE", EventType::HYPOXIC_CASCADE);
+    
+    py::enum_<LogLevel>(m, "LogLevel")
+        .value("OFF", LogLevel::OFF)
+        .value("RUN", LogLevel::RUN)
+        .value("CONDITION", LogLevel::CONDITION)
+        .value("NEURON", LogLevel::NEURON);
+    
+    // arrays view the EventLog they are read from, which keeps its buffers alive
+    py::class_<EventLog>(m, "EventLog")
+        .def_property_readonly("level", &EventLog::get_level)
+        .def_property_readonly("timesteps", [](py::object self) {
+            const std::vector<int32_t>& values = self.cast<const EventLog&>().get_timesteps();
+            return recording_view(values, {static_cast<py::ssize_t>(values.size())}, self);
+        }, "int32 timestep of each event")
+        .def_property_readonly("neurons", [](py::object self) {
+            const std::vector<int32_t>& values = self.cast<const EventLog&>().get_neurons();
+            return recording_view(values, {static_cast<py::ssize_t>(values.size())}, self);
+        }, "int32 neuron of each event, -1 for network-wide events")
+        .def_property_readonly("types", [](py::object self) {
+            const std::vector<int32_t>& values = self.cast<const EventLog&>().get_types();
+            return recording_view(values, {static_cast<py::ssize_t>(values.size())}, self);
+        }, "int32 EventType value of each event")
+        .def("count", &EventLog::count, "Number of recorded events of a type", py::arg("type"))
+        .def("__len__", &EventLog::size);
+    
+    py::class_<LyapunovParameters>(m, "LyapunovParameters")
         .def(py::init<>())
+        .def_readwrite("embedding_dimension", &LyapunovParameters::embedding_dimension)
+        .def_readwrite("lag", &LyapunovParameters::lag)
+        .def_readwrite("min_separation", &LyapunovParameters::min_separation)
+        .def_readwrite("horizon", &LyapunovParameters::horizon)
+        .def_readwrite("fit_begin", &LyapunovParameters::fit_begin)
+        .def_readwrite("fit_end", &LyapunovParameters::fit_end);
+    
+    py::class_<BatchResult>(m, "BatchResult")
+        .def_readonly("condition", &BatchResult::condition)
+        .def_readonly("seed", &BatchResult::seed)
+        .def_readonly("max_timesteps", &BatchResult::max_timesteps)
+        .def_readonly("metrics", &BatchResult::metrics)
+        .def_property_readonly("data", [](const BatchResult& result) { return result.data; },
+                               "Recordings of the run; arrays view them without copying")
+        .def_property_readonly("baseline", [](const BatchResult& result) { return result.baseline; },
+                               "Forked runs only: recordings before the fork, shared by the runs of the same seed")
+        .def_readonly("events", &BatchResult::events);
+    
+    m.def("compute_stability_metrics", &compute_stability_metrics,
+          "Stability metrics of recordings, as calculate_stability_metrics() computes them for a run",
+          py::arg("data"), py::arg("lyapunov") = LyapunovParameters());
+    
+    m.def("join_recordings",
+          [](const SimulationData& first, const SimulationData& second) {
+              return std::make_shared<SimulationData>(join_recordings(first, second));
+          },
+          "Join the recordings of a run split at a timestep, e.g. a forked run's baseline and data",
+          py::arg("first"), py::arg("second"));
+    
+    py::class_<PerfCounters>(m, "PerfCounters")
+        .def_readonly("run_seconds", &PerfCounters::run_seconds)
+        .def_readonly("build_seconds", &PerfCounters::build_seconds)
+        .def_readonly("delivery_seconds", &PerfCounters::delivery_seconds)
+        .def_readonly("stimulation_seconds", &PerfCounters::stimulation_seconds)
+        .def_readonly("update_seconds", &PerfCounters::update_seconds)
+        .def_readonly("plasticity_seconds", &PerfCounters::plasticity_seconds)
+        .def_readonly("recording_seconds", &PerfCounters::recording_seconds)
+        .def_readonly("export_seconds", &PerfCounters::export_seconds)
+        .def_readonly("timesteps", &PerfCounters::timesteps)
+        .def_readonly("spikes", &PerfCounters::spikes)
+        .def_readonly("propagation_events", &PerfCounters::propagation_events)
+        .def_readonly("scheduled_events", &PerfCounters::scheduled_events)
+        .def_readonly("max_queue_depth", &PerfCounters::max_queue_depth)
+        .def_readonly("buffer_allocations", &PerfCounters::buffer_allocations)
+        .def_readonly("export_bytes", &PerfCounters::export_bytes)
+        .def("to_dict", [](const PerfCounters& perf) {
+            py::dict counters;
+            counters["run_seconds"] = perf.run_seconds;
+            counters["build_seconds"] = perf.build_seconds;
+            counters["delivery_seconds"] = perf.delivery_seconds;
+            counters["stimulation_seconds"] = perf.stimulation_seconds;
+            counters["update_seconds"] = perf.update_seconds;
+            counters["plasticity_seconds"] = perf.plasticity_seconds;
+            counters["recording_seconds"] = perf.recording_seconds;
+            counters["export_seconds"] = perf.export_seconds;
+            counters["timesteps"] = perf.timesteps;
+            counters["spikes"] = perf.spikes;
+            counters["propagation_events"] = perf.propagation_events;
+            counters["scheduled_events"] = perf.scheduled_events;
+            counters["max_queue_depth"] = perf.max_queue_depth;
+            counters["buffer_allocations"] = perf.buffer_allocations;
+            counters["export_bytes"] = perf.export_bytes;
+            return counters;
+        }, "All counters as a dict");
+    
+    py::class_<RecordingOptions>(m, "RecordingOptions")
+        .def(py::init<>())
+        .def_readwrite("decimation", &RecordingOptions::decimation)
+        .def_readwrite("neurons", &RecordingOptions::neurons)
+        .def_readwrite("spikes_only", &RecordingOptions::spikes_only)
+        .def_readwrite("chunk_timesteps", &RecordingOptions::chunk_timesteps)
+        .def_readwrite("output_prefix", &RecordingOptions::output_prefix);
+    
+    // simulators share no state, so separate instances can run in parallel threads;
+    // a single instance must not be used from two threads at once, except for polling
+    // get_running_metrics() during a run
+    py::class_<NeuronSimulator>(m, "NeuronSimulator")
+        .def(py::init<const PopulationSpec&, uint64_t>(),
+             py::arg("spec") = PopulationSpec(), py::arg("seed") = RandomGenerator::DEFAULT_SEED)
+        .def("set_population_spec", &NeuronSimulator::set_population_spec,
+             "Set network size and composition used by the next simulation run",
+             py::arg("spec"))
+        .def("get_population_spec", &NeuronSimulator::get_population_spec,
+             "Get network size and composition")
+        .def("get_neuron_count", &NeuronSimulator::get_neuron_count,
+             "Get total number of neurons in the network")
+        .def("set_engine", &NeuronSimulator::set_engine,
+             "Select the simulation engine used by the next run",
+             py::arg("engine"))
+        .def("get_engine", &NeuronSimulator::get_engine,
+             "Get the selected simulation engine")
+        .def("set_seed", &NeuronSimulator::set_seed,
+             "Set the random seed; every run restarts from it, so equal seeds give identical runs",
+             py::arg("seed"))
+        .def("get_seed", &NeuronSimulator::get_seed,
+             "Get the random seed")
+        .def("set_synaptic_integration", &NeuronSimulator::set_synaptic_integration,
+             "Select static or event-driven synaptic input (event-driven requires the SOA engine)",
+             py::arg("mode"))
+        .def("get_synaptic_integration", &NeuronSimulator::get_synaptic_integration,
+             "Get the selected synaptic input model")
+        .def("set_metabolic_model", &NeuronSimulator::set_metabolic_model,
+             "Model metabolic runs with per-neuron ATP, ion pump and neurotransmitter state (requires the SOA engine)",
+             py::arg("enabled"))
+        .def("get_metabolic_model", &NeuronSimulator::get_metabolic_model,
+             "Whether metabolic runs use the metabolic state model")
+        .def("get_atp_levels", [](const NeuronSimulator& simulator) {
+            const std::vector<float>& levels = simulator.get_atp_levels();
+            return py::array_t<float>(levels.size(), levels.data());
+        }, "Per-neuron ATP level (0-1) at the end of the last metabolic run, as a float32 array")
+        .def("get_ion_pump_levels", [](const NeuronSimulator& simulator) {
+            const std::vector<float>& levels = simulator.get_ion_pump_levels();
+            return py::array_t<float>(levels.size(), levels.data());
+        }, "Per-neuron ion pump function (0-1) at the end of the last metabolic run, as a float32 array")
+        .def("get_transmitter_levels", [](const NeuronSimulator& simulator) {
+            const std::vector<float>& levels = simulator.get_transmitter_levels();
+            return py::array_t<float>(levels.size(), levels.data());
+        }, "Per-neuron neurotransmitter pool (0-1) at the end of the last metabolic run, as a float32 array")
+        .def("set_plasticity", &NeuronSimulator::set_plasticity,
+             "Apply STDP and homeostatic scaling to excitatory weights during runs (requires the SOA engine)",
+             py::arg("enabled"))
+        .def("get_plasticity", &NeuronSimulator::get_plasticity,
+             "Whether runs apply synaptic plasticity")
+        .def("set_plasticity_parameters", &NeuronSimulator::set_plasticity_parameters,
+             "Set the STDP and homeostatic scaling parameters for the next run",
+             py::arg("parameters"))
+        .def("get_plasticity_parameters", &NeuronSimulator::get_plasticity_parameters,
+             "Get the plasticity parameters")
+        .def("get_synaptic_weights", [](const NeuronSimulator& simulator) {
+            const std::vector<float>& weights = simulator.get_synaptic_weights();
+            return py::array_t<float>(weights.size(), weights.data());
+        }, "Weight (mV, magnitude) of every synapse of the SOA network in CSR order, as a float32 array")
+        .def("set_recording_options", &NeuronSimulator::set_recording_options,
+             "Configure decimation, recorded neurons, spikes-only mode and streaming for the next run",
+             py::arg("options"))
+        .def("get_recording_options", &NeuronSimulator::get_recording_options,
+             "Get the recording configuration")
+        // the std::function wrapper re-acquires the GIL for each call, so the callback
+        // also works from runs that have released it
+        .def("set_recording_callback", &NeuronSimulator::set_recording_callback,
+             "Stream recordings to callback(chunk) as SimulationData chunks during the run; None disables",
+             py::arg("callback"))
+        .def("set_online_metrics", &NeuronSimulator::set_online_metrics,
+             "Accumulate stability metrics while runs execute, without recorded traces",
+             py::arg("enabled"))
+        .def("get_online_metrics", &NeuronSimulator::get_online_metrics,
+             "Whether stability metrics are accumulated during runs")
+        .def("get_running_metrics", &NeuronSimulator::get_running_metrics,
+             "Stability metrics accumulated so far; may be polled from another thread during a run "
+             "(network_coherence and lyapunov_exponent need the full trace and stay 0)")
+        .def("get_running_timesteps", &NeuronSimulator::get_running_timesteps,
+             "Timesteps accumulated into the running metrics so far")
+        .def("set_profiling", &NeuronSimulator::set_profiling,
+             "Time each phase of a run and count propagation events, queue depth and buffer allocations",
+             py::arg("enabled"))
+        .def("get_profiling", &NeuronSimulator::get_profiling,
+             "Whether runs are profiled")
+        .def("get_perf_counters", &NeuronSimulator::get_perf_counters,
+             "Phase timings and event counts of the last run, and of exports since")
+        .def("set_log_level", &NeuronSimulator::set_log_level,
+             "Choose which events runs record into the event log (default CONDITION)",
+             py::arg("level"))
+        .def("get_log_level", &NeuronSimulator::get_log_level,
+             "Get the event log level")
+        .def("get_events", &NeuronSimulator::get_events,
+             "Copy of the event log of the last run, with timesteps, neurons and types as int32 arrays")
         .def("run_standard_simulation", &NeuronSimulator::run_standard_simulation,
-             "Run standard neural network simulation",
-             py::arg("max_timesteps") = 5000)
+             "Run standard neural network simulation; releases the GIL while running",
+             py::arg("max_timesteps") = 5000, py::call_guard<py::gil_scoped_release>())
         .def("run_metabolic_dysfunction_simulation", &NeuronSimulator::run_metabolic_dysfunction_simulation,
-             "Run simulation with metabolic dysfunction",
-             py::arg("condition"), py::arg("max_timesteps") = 3000)
+             "Run simulation with metabolic dysfunction; releases the GIL while running",
+             py::arg("condition"), py::arg("max_timesteps") = 3000, py::call_guard<py::gil_scoped_release>())
         .def("run_metabolic_dysfunction_studies", &NeuronSimulator::run_metabolic_dysfunction_studies,
-             "Run comprehensive metabolic dysfunction studies")
+             "Run comprehensive metabolic dysfunction studies",
+             py::call_guard<py::gil_scoped_release>())
+        .def("run_metabolic_dysfunction_batch", &NeuronSimulator::run_metabolic_dysfunction_batch,
+             "Run every condition with every seed on a pool of native threads and return one BatchResult per run, "
+             "ordered by condition, then seed; max_timesteps holds one entry per condition or a single entry",
+             py::arg("conditions"), py::arg("seeds"), py::arg("max_timesteps") = std::vector<int>{3000},
+             py::arg("workers") = 0, py::call_guard<py::gil_scoped_release>())
+        .def("run_metabolic_dysfunction_fork", &NeuronSimulator::run_metabolic_dysfunction_fork,
+             "Same runs and results as run_metabolic_dysfunction_batch, but the baseline before the earliest onset "
+             "is simulated once per seed and shared; requires the SOA engine",
+             py::arg("conditions"), py::arg("seeds"), py::arg("max_timesteps") = std::vector<int>{3000},
+             py::arg("workers") = 0, py::call_guard<py::gil_scoped_release>())
+        .def("save_checkpoint", &NeuronSimulator::save_checkpoint,
+             "Write the complete state of the current SOA run to a binary checkpoint file",
+             py::arg("path"), py::call_guard<py::gil_scoped_release>())
+        .def("load_checkpoint", &NeuronSimulator::load_checkpoint,
+             "Restore a checkpoint (network, random generator, recorder position); continue with a resume_* method",
+             py::arg("path"), py::call_guard<py::gil_scoped_release>())
+        .def("set_checkpointing", &NeuronSimulator::set_checkpointing,
+             "Write a checkpoint to path every interval timesteps of a run (SOA engine); 0 disables",
+             py::arg("path"), py::arg("interval"))
+        .def("get_checkpoint_interval", &NeuronSimulator::get_checkpoint_interval,
+             "Get the periodic checkpoint interval in timesteps")
+        .def("get_timestep", &NeuronSimulator::get_timestep,
+             "Get the next timestep of the current run")
+        .def("resume_standard_simulation", &NeuronSimulator::resume_standard_simulation,
+             "Continue the current run as a standard simulation up to max_timesteps; releases the GIL while running",
+             py::arg("max_timesteps") = 5000, py::call_guard<py::gil_scoped_release>())
+        .def("resume_metabolic_dysfunction_simulation", &NeuronSimulator::resume_metabolic_dysfunction_simulation,
+             "Continue the current run with a metabolic condition up to max_timesteps; releases the GIL while running",
+             py::arg("condition"), py::arg("max_timesteps") = 3000, py::call_guard<py::gil_scoped_release>())
         .def("create_hypoglycemia", &NeuronSimulator::create_hypoglycemia,
              "Create hypoglycemia metabolic condition")
         .def("create_diabetes_ketoacidosis", &NeuronSimulator::create_diabetes_ketoacidosis,
@@ -55,13 +479,25 @@ PYBIND11_MODULE(neuron_simulator, m) {
              "Create hypoxia metabolic condition")
         .def("create_mitochondrial_dysfunction", &NeuronSimulator::create_mitochondrial_dysfunction,
              "Create mitochondrial dysfunction metabolic condition")
-        .def("get_simulation_data", &NeuronSimulator::get_simulation_data,
-             "Get simulation data")
+        .def("get_simulation_data", [](const NeuronSimulator& simulator) {
+            // shared with the simulator until its next run, as const data: every field and
+            // array of SimulationData is exposed read-only
+            return simulator.get_simulation_data_ptr();
+        }, "Get simulation data of the last run; its arrays view the recorded buffers without copying")
+        .def("set_lyapunov_parameters", &NeuronSimulator::set_lyapunov_parameters,
+             "Set the embedding dimension, lag, neighbour separation and fit range of the lyapunov estimate",
+             py::arg("parameters"))
+        .def("get_lyapunov_parameters", &NeuronSimulator::get_lyapunov_parameters,
+             "Get the lyapunov estimate parameters")
         .def("calculate_stability_metrics", &NeuronSimulator::calculate_stability_metrics,
-             "Calculate stability metrics")
+             "Calculate stability metrics",
+             py::call_guard<py::gil_scoped_release>())
         .def("generate_python_visualization", &NeuronSimulator::generate_python_visualization,
              "Generate Python visualization script")
         .def("export_csv_data", &NeuronSimulator::export_csv_data,
              "Export simulation data to CSV files",
-             py::arg("prefix") = "");
+             py::arg("prefix") = "", py::call_guard<py::gil_scoped_release>())
+        .def("export_binary_data", &NeuronSimulator::export_binary_data,
+             "Export simulation data to .npy files that can be memory-mapped with np.load(mmap_mode='r')",
+             py::arg("prefix") = "", py::call_guard<py::gil_scoped_release>());
 }
\ No newline at end of file
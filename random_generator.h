@@ -0,0 +1,60 @@
+#ifndef RANDOM_GENERATOR_H
+#define RANDOM_GENERATOR_H
+
+#include <cstdint>
+
+// PCG32 (permuted congruential generator, XSH-RR variant). small, fast and
+// seedable; each simulator owns one, so runs are reproducible and independent
+// simulators can run in separate threads without sharing state.
+class RandomGenerator {
+private:
+    uint64_t state;
+    uint64_t increment;
+
+public:
+    static constexpr uint64_t DEFAULT_SEED = 5489u;
+    
+    explicit RandomGenerator(uint64_t seed = DEFAULT_SEED, uint64_t stream = 0) { reseed(seed, stream); }
+    
+    // distinct streams give independent sequences for the same seed
+    inline void reseed(uint64_t seed, uint64_t stream = 0) {
+        state = 0u;
+        increment = (stream << 1u) | 1u;
+        next_uint();
+        state += seed;
+        next_uint();
+    }
+    
+    inline uint32_t next_uint() {
+        uint64_t old_state = state;
+        state = old_state * 6364136223846793005ULL + increment;
+        uint32_t xorshifted = static_cast<uint32_t>(((old_state >> 18u) ^ old_state) >> 27u);
+        uint32_t rotation = static_cast<uint32_t>(old_state >> 59u);
+        return (xorshifted >> rotation) | (xorshifted << ((32u - rotation) & 31u));
+    }
+    
+    // uniform integer in [0, bound), without modulo bias
+    inline int next_int(int bound) {
+        uint32_t range = static_cast<uint32_t>(bound);
+        uint32_t threshold = (0u - range) % range;
+        for (;;) {
+            uint32_t value = next_uint();
+            if (value >= threshold) return static_cast<int>(value % range);
+        }
+    }
+    
+    // uniform float in [0, 1)
+    inline float next_float() {
+        return static_cast<float>(next_uint() >> 8) * (1.0f / 16777216.0f);
+    }
+    
+    // raw state, for saving and restoring a generator mid-sequence
+    inline uint64_t get_state() const { return state; }
+    inline uint64_t get_increment() const { return increment; }
+    inline void set_state(uint64_t new_state, uint64_t new_increment) {
+        state = new_state;
+        increment = new_increment | 1u;
+    }
+};
+
+#endif
@@ -0,0 +1,335 @@
+#include "recorder.h"
+#include <algorithm>
+#include <numeric>
+#include <stdexcept>
+
+namespace {
+
+void reserve_buffers(SimulationData& data, int timesteps, const RecordingOptions& options) {
+    if (timesteps <= 0) return;
+    if (!options.spikes_only) {
+        size_t rows = (timesteps + options.decimation - 1) / options.decimation;
+        data.membrane_potentials.reserve(rows * data.recorded_neurons.size());
+        data.recorded_timesteps.reserve(rows);
+        data.network_activity.reserve(rows);
+    }
+    data.spikes_per_timestep.reserve(timesteps);
+}
+
+} // namespace
+
+Recorder::Recorder() : data(std::make_shared<SimulationData>()), run_timesteps(0), run_spikes(0) {}
+
+void Recorder::set_options(const RecordingOptions& new_options) {
+    if (new_options.decimation < 1) {
+        throw std::invalid_argument("RecordingOptions: decimation must be at least 1");
+    }
+    if (new_options.chunk_timesteps < 1) {
+        throw std::invalid_argument("RecordingOptions: chunk_timesteps must be at least 1");
+    }
+    options = new_options;
+}
+
+size_t Recorder::get_buffer_capacity() const {
+    return data->membrane_potentials.capacity() + data->recorded_timesteps.capacity() +
+           data->spike_times.capacity() + data->spike_neurons.capacity() +
+           data->spikes_per_timestep.capacity() + data->network_activity.capacity();
+}
+
+void Recorder::begin(int neuron_count, int max_timesteps) {
+    for (int neuron_id : options.neurons) {
+        if (neuron_id < 0 || neuron_id >= neuron_count) {
+            throw std::out_of_range("RecordingOptions: recorded neuron id out of range");
+        }
+    }
+    close_output_files();
+    journal.close();
+    
+    // replace rather than clear, so arrays handed out for the previous run keep their data
+    data = std::make_shared<SimulationData>();
+    data->neuron_count = neuron_count;
+    if (options.neurons.empty()) {
+        data->recorded_neurons.resize(neuron_count);
+        std::iota(data->recorded_neurons.begin(), data->recorded_neurons.end(), 0);
+    } else {
+        data->recorded_neurons = options.neurons;
+    }
+    run_timesteps = 0;
+    run_spikes = 0;
+    
+    // a streamed run only ever holds one chunk
+    reserve_buffers(*data, is_streaming() ? options.chunk_timesteps : max_timesteps, options);
+    if (!options.output_prefix.empty()) {
+        open_output_files();
+    }
+}
+
+void Recorder::continue_from(const Recorder& previous, int max_timesteps) {
+    close_output_files();
+    journal.close();
+    data = std::make_shared<SimulationData>();
+    data->neuron_count = previous.data->neuron_count;
+    data->recorded_neurons = previous.data->recorded_neurons;
+    run_timesteps = previous.run_timesteps;
+    run_spikes = previous.run_spikes;
+    data->first_timestep = run_timesteps;
+    reserve_buffers(*data, is_streaming() ? options.chunk_timesteps : max_timesteps - run_timesteps, options);
+}
+
+void Recorder::record_potentials(int timestep, const float* potentials, float network_activity) {
+    const std::vector<int>& columns = data->recorded_neurons;
+    std::vector<float>& recorded = data->membrane_potentials;
+    const size_t row = recorded.size();
+    recorded.resize(row + columns.size());
+    float* out = recorded.data() + row;
+    
+    if (options.neurons.empty()) {
+        std::copy(potentials, potentials + columns.size(), out);
+    } else {
+        for (size_t c = 0; c < columns.size(); ++c) {
+            out[c] = potentials[columns[c]];
+        }
+    }
+    data->recorded_timesteps.push_back(timestep);
+    data->network_activity.push_back(network_activity);
+}
+
+void Recorder::record_spike(int timestep, int neuron_id) {
+    data->spike_times.push_back(timestep);
+    data->spike_neurons.push_back(neuron_id);
+}
+
+void Recorder::end_timestep(int spike_count) {
+    data->spikes_per_timestep.push_back(spike_count);
+    run_timesteps++;
+    run_spikes += spike_count;
+    
+    if (is_streaming() && static_cast<int>(data->spikes_per_timestep.size()) >= options.chunk_timesteps) {
+        flush();
+    }
+}
+
+void Recorder::flush() {
+    SimulationData& chunk = *data;
+    chunk.total_timesteps = static_cast<int>(chunk.spikes_per_timestep.size());
+    chunk.total_spikes = static_cast<int>(chunk.spike_times.size());
+    const int next_first_timestep = chunk.first_timestep + chunk.total_timesteps;
+    
+    if (membrane_file.is_open()) {
+        membrane_file.append(chunk.membrane_potentials.data(), chunk.membrane_potentials.size());
+        recorded_timesteps_file.append(chunk.recorded_timesteps.data(), chunk.recorded_timesteps.size());
+        spike_times_file.append(chunk.spike_times.data(), chunk.spike_times.size());
+        spike_neurons_file.append(chunk.spike_neurons.data(), chunk.spike_neurons.size());
+        spikes_per_timestep_file.append(chunk.spikes_per_timestep.data(), chunk.spikes_per_timestep.size());
+        network_activity_file.append(chunk.network_activity.data(), chunk.network_activity.size());
+    }
+    
+    if (callback) {
+        // the callback keeps the chunk, so continue in fresh buffers
+        std::shared_ptr<SimulationData> flushed = data;
+        data = std::make_shared<SimulationData>();
+        data->neuron_count = flushed->neuron_count;
+        data->recorded_neurons = flushed->recorded_neurons;
+        data->first_timestep = next_first_timestep;
+        reserve_buffers(*data, options.chunk_timesteps, options);
+        callback(flushed);
+    } else {
+        // clear() keeps the capacity, so steady-state streaming does not allocate
+        chunk.membrane_potentials.clear();
+        chunk.recorded_timesteps.clear();
+        chunk.spike_times.clear();
+        chunk.spike_neurons.clear();
+        chunk.spikes_per_timestep.clear();
+        chunk.network_activity.clear();
+        chunk.first_timestep = next_first_timestep;
+    }
+}
+
+void Recorder::finish() {
+    if (is_streaming()) {
+        if (!data->spikes_per_timestep.empty()) {
+            flush();
+        }
+        close_output_files();
+        // only the run totals remain; the recordings went to the sinks
+        data->first_timestep = 0;
+    }
+    data->total_timesteps = run_timesteps;
+    data->total_spikes = run_spikes;
+}
+
+SimulationData join_recordings(const SimulationData& first, const SimulationData& second) {
+    SimulationData joined = first;
+    auto append = [](auto& to, const auto& from) { to.insert(to.end(), from.begin(), from.end()); };
+    append(joined.membrane_potentials, second.membrane_potentials);
+    append(joined.recorded_timesteps, second.recorded_timesteps);
+    append(joined.spike_times, second.spike_times);
+    append(joined.spike_neurons, second.spike_neurons);
+    append(joined.spikes_per_timestep, second.spikes_per_timestep);
+    append(joined.network_activity, second.network_activity);
+    joined.total_timesteps = second.total_timesteps;
+    joined.total_spikes = second.total_spikes;
+    return joined;
+}
+
+void Recorder::open_output_files() {
+    const std::string& prefix = options.output_prefix;
+    write_npy(prefix + "recorded_neurons.npy", "i4", data->recorded_neurons.data(), sizeof(int),
+              {data->recorded_neurons.size()});
+    
+    bool opened = membrane_file.open(prefix + "membrane_potentials.npy", "f4", sizeof(float),
+                                     data->recorded_neurons.size());
+    opened = recorded_timesteps_file.open(prefix + "recorded_timesteps.npy", "i4", sizeof(int)) && opened;
+    opened = spike_times_file.open(prefix + "spike_times.npy", "i4", sizeof(int)) && opened;
+    opened = spike_neurons_file.open(prefix + "spike_neurons.npy", "i4", sizeof(int)) && opened;
+    opened = spikes_per_timestep_file.open(prefix + "spikes_per_timestep.npy", "i4", sizeof(int)) && opened;
+    opened = network_activity_file.open(prefix + "network_activity.npy", "f4", sizeof(float)) && opened;
+    if (!opened) {
+        close_output_files();
+        throw std::runtime_error("Recorder: cannot open output files with prefix '" + prefix + "'");
+    }
+}
+
+void Recorder::reopen_output_files(const std::vector<uint64_t>& rows) {
+    const std::string& prefix = options.output_prefix;
+    const size_t width = data->recorded_neurons.size();
+    bool opened = rows.size() == 6;
+    opened = opened && membrane_file.reopen(prefix + "membrane_potentials.npy", "f4", sizeof(float), width, rows[0]);
+    opened = opened && recorded_timesteps_file.reopen(prefix + "recorded_timesteps.npy", "i4", sizeof(int), 0, rows[1]);
+    opened = opened && spike_times_file.reopen(prefix + "spike_times.npy", "i4", sizeof(int), 0, rows[2]);
+    opened = opened && spike_neurons_file.reopen(prefix + "spike_neurons.npy", "i4", sizeof(int), 0, rows[3]);
+    opened = opened && spikes_per_timestep_file.reopen(prefix + "spikes_per_timestep.npy", "i4", sizeof(int), 0, rows[4]);
+    opened = opened && network_activity_file.reopen(prefix + "network_activity.npy", "f4", sizeof(float), 0, rows[5]);
+    if (!opened) {
+        close_output_files();
+        throw std::runtime_error("Recorder: cannot continue output files with prefix '" + prefix + "'");
+    }
+}
+
+void Recorder::close_output_files() {
+    membrane_file.close();
+    recorded_timesteps_file.close();
+    spike_times_file.close();
+    spike_neurons_file.close();
+    spikes_per_timestep_file.close();
+    network_activity_file.close();
+}
+
+void Recorder::save(CheckpointWriter& writer, const std::string& journal_path) {
+    if (is_streaming() && !data->spikes_per_timestep.empty()) {
+        flush();
+    }
+    writer.write(options.decimation);
+    writer.write_vector(options.neurons);
+    writer.write(options.spikes_only);
+    writer.write(options.chunk_timesteps);
+    writer.write_string(options.output_prefix);
+    writer.write(run_timesteps);
+    writer.write(run_spikes);
+    writer.write_vector(data->recorded_neurons);
+    writer.write(data->neuron_count);
+    writer.write(data->first_timestep);
+    
+    const bool journaling = !journal_path.empty() && !is_streaming();
+    writer.write(journaling);
+    if (journaling) {
+        if (journal.get_filename() != journal_path) {
+            journal.start(journal_path);
+            journaled.assign(6, 0);
+        }
+        journal.append(data->membrane_potentials, journaled[0]);
+        journal.append(data->recorded_timesteps, journaled[1]);
+        journal.append(data->spike_times, journaled[2]);
+        journal.append(data->spike_neurons, journaled[3]);
+        journal.append(data->spikes_per_timestep, journaled[4]);
+        journal.append(data->network_activity, journaled[5]);
+        journaled = {data->membrane_potentials.size(), data->recorded_timesteps.size(), data->spike_times.size(),
+                     data->spike_neurons.size(), data->spikes_per_timestep.size(), data->network_activity.size()};
+        writer.write(journal.commit());
+        writer.write_vector(journaled);
+    } else {
+        // empty for a streamed run, whose chunk was flushed above
+        writer.write_vector(data->membrane_potentials);
+        writer.write_vector(data->recorded_timesteps);
+        writer.write_vector(data->spike_times);
+        writer.write_vector(data->spike_neurons);
+        writer.write_vector(data->spikes_per_timestep);
+        writer.write_vector(data->network_activity);
+    }
+    
+    // the files hold everything up to the current chunk
+    NpyStreamWriter* files[] = {&membrane_file, &recorded_timesteps_file, &spike_times_file,
+                                &spike_neurons_file, &spikes_per_timestep_file, &network_activity_file};
+    std::vector<uint64_t> rows;
+    for (NpyStreamWriter* file : files) {
+        file->flush();
+        rows.push_back(file->get_rows());
+    }
+    writer.write_vector(rows);
+}
+
+void Recorder::load(CheckpointReader& reader, const std::string& journal_path) {
+    close_output_files();
+    journal.close();
+    RecordingOptions saved;
+    saved.decimation = reader.read<int>();
+    reader.read_vector(saved.neurons);
+    saved.spikes_only = reader.read<bool>();
+    saved.chunk_timesteps = reader.read<int>();
+    saved.output_prefix = reader.read_string();
+    set_options(saved);
+    run_timesteps = reader.read<int>();
+    run_spikes = reader.read<int>();
+    
+    data = std::make_shared<SimulationData>();
+    reader.read_vector(data->recorded_neurons);
+    data->neuron_count = reader.read<int>();
+    data->first_timestep = reader.read<int>();
+    
+    if (reader.read<bool>()) {
+        const uint64_t journal_length = reader.read<uint64_t>();
+        reader.read_vector(journaled);
+        load_journal(journal_path);
+        // the next journaled save continues this journal
+        journal.resume(journal_path, journal_length);
+    } else {
+        reader.read_vector(data->membrane_potentials);
+        reader.read_vector(data->recorded_timesteps);
+        reader.read_vector(data->spike_times);
+        reader.read_vector(data->spike_neurons);
+        reader.read_vector(data->spikes_per_timestep);
+        reader.read_vector(data->network_activity);
+    }
+    
+    std::vector<uint64_t> rows;
+    reader.read_vector(rows);
+    if (is_streaming()) {
+        // finish() resets the chunk position of a streamed run
+        data->first_timestep = run_timesteps - static_cast<int>(data->spikes_per_timestep.size());
+    }
+    if (!options.output_prefix.empty()) {
+        reopen_output_files(rows);
+    }
+}
+
+void Recorder::load_journal(const std::string& journal_path) {
+    if (journaled.size() != 6) {
+        throw std::runtime_error("Checkpoint: recording journal position is inconsistent");
+    }
+    CheckpointReader reader(journal_path);
+    SimulationData& loaded = *data;
+    while (loaded.spikes_per_timestep.size() < journaled[4]) {
+        reader.read_append(loaded.membrane_potentials);
+        reader.read_append(loaded.recorded_timesteps);
+        reader.read_append(loaded.spike_times);
+        reader.read_append(loaded.spike_neurons);
+        reader.read_append(loaded.spikes_per_timestep);
+        reader.read_append(loaded.network_activity);
+    }
+    const std::vector<uint64_t> sizes = {
+        loaded.membrane_potentials.size(), loaded.recorded_timesteps.size(), loaded.spike_times.size(),
+        loaded.spike_neurons.size(), loaded.spikes_per_timestep.size(), loaded.network_activity.size()};
+    if (sizes != journaled) {
+        throw std::runtime_error("Checkpoint: '" + journal_path + "' does not match its checkpoint");
+    }
+}
@@ -0,0 +1,115 @@
+#ifndef RECORDER_H
+#define RECORDER_H
+
+#include <vector>
+#include <string>
+#include <memory>
+#include <functional>
+#include "npy_writer.h"
+#include "checkpoint.h"
+
+// recordings of one run (or of one chunk of a streamed run), kept in contiguous buffers
+// so they can be handed to NumPy without copying
+struct SimulationData {
+    std::vector<float> membrane_potentials; // row-major, one row per recorded timestep, one column per recorded neuron
+    std::vector<int> recorded_timesteps;    // timestep of each membrane_potentials row
+    std::vector<int> recorded_neurons;      // neuron id of each membrane_potentials column
+    std::vector<int> spike_times;           // timestep of each spike, in recording order
+    std::vector<int> spike_neurons;         // neuron id of each spike, parallel to spike_times
+    std::vector<int> spikes_per_timestep;   // one entry per timestep from first_timestep on
+    std::vector<float> network_activity;    // mean membrane potential at each recorded timestep
+    int neuron_count = 0;
+    int first_timestep = 0;
+    int total_timesteps = 0;
+    int total_spikes = 0;
+};
+
+struct RecordingOptions {
+    int decimation = 1;           // record membrane potentials and network activity every n-th timestep
+    std::vector<int> neurons;     // neurons whose membrane potentials are recorded; empty records all
+    bool spikes_only = false;     // record spikes only, no membrane potentials or network activity
+    int chunk_timesteps = 1000;   // timesteps buffered between flushes when streaming
+    std::string output_prefix;    // if set, stream chunks into .npy files with this prefix
+};
+
+// receives each flushed chunk; the chunk is not reused by the recorder afterwards
+using RecordingCallback = std::function<void(std::shared_ptr<SimulationData>)>;
+
+// collects the recordings of a run. without a sink everything stays in memory; with an
+// output prefix or a callback, fixed-size chunks are flushed as the run progresses so
+// memory use does not grow with the run length
+class Recorder {
+private:
+    RecordingOptions options;
+    RecordingCallback callback;
+    std::shared_ptr<SimulationData> data;
+    int run_timesteps;
+    int run_spikes;
+    
+    // streamed output files, same layout as NeuronSimulator::export_binary_data()
+    NpyStreamWriter membrane_file;
+    NpyStreamWriter recorded_timesteps_file;
+    NpyStreamWriter spike_times_file;
+    NpyStreamWriter spike_neurons_file;
+    NpyStreamWriter spikes_per_timestep_file;
+    NpyStreamWriter network_activity_file;
+    
+    // in-memory recordings already in the checkpoint journal, elements per array
+    CheckpointJournal journal;
+    std::vector<uint64_t> journaled;
+    
+    void open_output_files();
+    void reopen_output_files(const std::vector<uint64_t>& rows);
+    void close_output_files();
+    void flush();
+    // recordings up to the journaled sizes from the journal of a checkpoint
+    void load_journal(const std::string& journal_path);
+
+public:
+    Recorder();
+    
+    void set_options(const RecordingOptions& new_options);
+    const RecordingOptions& get_options() const { return options; }
+    void set_callback(RecordingCallback new_callback) { callback = std::move(new_callback); }
+    bool is_streaming() const { return callback || !options.output_prefix.empty(); }
+    // whether the data keeps every spike and every potential of the whole network
+    bool keeps_full_trace() const {
+        return !is_streaming() && !options.spikes_only && options.decimation == 1 && options.neurons.empty();
+    }
+    
+    // start a new recording; data handed out for an earlier run stays valid
+    void begin(int neuron_count, int max_timesteps);
+    // start a new recording that continues the run of previous from where it stopped:
+    // the new data starts at its next timestep, and the run totals carry on. output
+    // files are not continued
+    void continue_from(const Recorder& previous, int max_timesteps);
+    
+    inline bool wants_potentials(int timestep) const {
+        return !options.spikes_only && timestep % options.decimation == 0;
+    }
+    // potentials holds the whole network, indexed by neuron id
+    void record_potentials(int timestep, const float* potentials, float network_activity);
+    void record_spike(int timestep, int neuron_id);
+    void end_timestep(int spike_count);
+    // flush what is left and set the run totals
+    void finish();
+    
+    // options, position and recordings of the current run, for checkpoints. a streamed
+    // run flushes its current chunk first, so only its position is saved, and continues
+    // its output files from there. in-memory recordings are saved whole, or with a
+    // journal_path only what was added since the last save with the same journal_path,
+    // appended to that journal
+    void save(CheckpointWriter& writer, const std::string& journal_path = "");
+    // journal_path is where the recordings of a journaled save are read from
+    void load(CheckpointReader& reader, const std::string& journal_path = "");
+    
+    std::shared_ptr<SimulationData> get_data() const { return data; }
+    // elements the recording buffers can hold without reallocating
+    size_t get_buffer_capacity() const;
+};
+
+// recordings of a run split at a timestep (e.g. a forked run's baseline and its
+// continuation) joined into one; the totals are those of second
+SimulationData join_recordings(const SimulationData& first, const SimulationData& second);
+
+#endif
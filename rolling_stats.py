@@ -0,0 +1,80 @@
+import numpy as np
+
+# sliding-window statistics in O(T) from cumulative sums. entry k of each result
+# describes the window x[k:k + window], so results have len(x) - window + 1 entries
+# (none if the series is shorter than the window)
+
+
+def _window_sums(x, window):
+    # sums over every window along axis 0, from one cumulative sum
+    cumulative = np.cumsum(x, axis=0, dtype=np.float64)
+    cumulative = np.concatenate([np.zeros((1,) + cumulative.shape[1:]), cumulative])
+    return cumulative[window:] - cumulative[:-window]
+
+
+def _check_window(x, window):
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    return len(x) >= window
+
+
+def rolling_mean(x, window):
+    x = np.asarray(x, dtype=np.float64)
+    if not _check_window(x, window):
+        return np.empty(0)
+    return _window_sums(x, window) / window
+
+
+def rolling_variance(x, window):
+    # population variance of each window; the series is centred first so the
+    # sums of squares do not cancel catastrophically
+    x = np.asarray(x, dtype=np.float64)
+    if not _check_window(x, window):
+        return np.empty(0)
+    x = x - x.mean()
+    mean = _window_sums(x, window) / window
+    return np.maximum(_window_sums(x * x, window) / window - mean * mean, 0.0)
+
+
+def rolling_correlation(x, window):
+    # mean pairwise correlation between the columns of x (timesteps x series) in each
+    # window. pairs with a constant series in a window are left out of that window's
+    # mean; windows without any defined pair are NaN
+    x = np.asarray(x, dtype=np.float64)
+    if not _check_window(x, window):
+        return np.empty(0)
+    x = x - x.mean(axis=0)
+    columns = x.shape[1]
+    sums = _window_sums(x, window)
+    variances = _window_sums(x * x, window) / window - (sums / window) ** 2
+    # a window of constant values can come out slightly non-zero from rounding
+    variances[variances <= 1e-12 * np.maximum(x.var(axis=0), np.finfo(float).tiny)] = 0.0
+    
+    total = np.zeros(len(sums))
+    pairs = np.zeros(len(sums))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for i in range(columns):
+            for j in range(i + 1, columns):
+                covariance = _window_sums(x[:, i] * x[:, j], window) / window - sums[:, i] * sums[:, j] / window ** 2
+                correlation = covariance / np.sqrt(variances[:, i] * variances[:, j])
+                defined = np.isfinite(correlation)
+                total[defined] += correlation[defined]
+                pairs += defined
+        return np.where(pairs > 0, total / pairs, np.nan)
+
+
+def mean_pairwise_correlation(x):
+    # mean of the upper triangle of np.corrcoef(x.T) in O(T x N) time, without forming
+    # the N x N correlation matrix: for standardized columns z_i,
+    # var(sum z_i) = N + sum over pairs i != j of corr(i, j).
+    # constant columns have no defined correlation and are left out
+    x = np.asarray(x, dtype=np.float64)
+    if len(x) < 2:
+        return np.nan
+    std = x.std(axis=0)
+    varying = std > 0
+    count = int(varying.sum())
+    if count < 2:
+        return np.nan
+    z = (x[:, varying] - x[:, varying].mean(axis=0)) / std[varying]
+    return (np.var(z.sum(axis=1)) - count) / (count * (count - 1))
@@ -0,0 +1,13 @@
+import numpy as np
+
+RECORDINGS = ['membrane_potentials', 'recorded_timesteps', 'recorded_neurons', 'spike_times', 'spike_neurons',
+              'network_activity', 'spikes_per_timestep']
+
+
+def load_simulation_data(prefix=""):
+    # memory-map the .npy files written by NeuronSimulator.export_binary_data() or streamed
+    # during a run with RecordingOptions.output_prefix; nothing is parsed, and array pages are only read from disk when accessed
+    data = {}
+    for name in RECORDINGS:
+        data[name] = np.load(f'{prefix}{name}.npy', mmap_mode='r')
+    return data
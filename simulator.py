@@ -2,7 +2,7 @@ import neuron_simulator
 import sys
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
+from simulation_io import load_simulation_data
 
 def print_menu():
     print("=== Enhanced Human Neuron Network Simulation ===")
@@ -13,44 +13,46 @@ def print_menu():
     print("4. Exit")
 
 
-def generate_visualization(csv_prefix=""):
+def generate_visualization(data_prefix=""):
 
     try:
-        membrane_data = pd.read_csv(f'{csv_prefix}membrane_potentials.csv')
-        spike_data = pd.read_csv(f'{csv_prefix}spike_raster.csv')
-        activity_data = pd.read_csv(f'{csv_prefix}activity_summary.csv')
+        data = load_simulation_data(data_prefix)
+        membrane_potentials = data['membrane_potentials']
+        # membrane potentials and network activity may be decimated
+        timesteps = data['recorded_timesteps']
+        recorded_neurons = data['recorded_neurons']
         
         fig, axes = plt.subplots(2, 2, figsize=(15, 10))
         fig.suptitle('Neural Network Simulation Results')
         
         # membrane potentials
-        for i in range(min(5, len(membrane_data.columns)-1)):
-            axes[0,0].plot(membrane_data.iloc[:, i+1], alpha=0.7, label=f'Neuron {i}')
+        for i in range(min(5, membrane_potentials.shape[1])):
+            axes[0,0].plot(timesteps, membrane_potentials[:, i], alpha=0.7, label=f'Neuron {recorded_neurons[i]}')
         axes[0,0].set_title('Membrane Potentials')
         axes[0,0].set_ylabel('Potential (mV)')
         axes[0,0].legend()
         
         # spike raster
-        if len(spike_data) > 0:
-            axes[0,1].scatter(spike_data['Timestep'], spike_data['Neuron_ID'], s=1, alpha=0.6)
+        if len(data['spike_times']) > 0:
+            axes[0,1].scatter(data['spike_times'], data['spike_neurons'], s=1, alpha=0.6)
             axes[0,1].set_title('Spike Raster')
             axes[0,1].set_ylabel('Neuron ID')
         
         # network activity
-        axes[1,0].plot(activity_data['Timestep'], activity_data['Average_Potential'])
+        axes[1,0].plot(timesteps, data['network_activity'])
         axes[1,0].set_title('Network Activity')
         axes[1,0].set_ylabel('Average Potential (mV)')
         axes[1,0].set_xlabel('Timestep')
         
         # spike rate
-        axes[1,1].plot(activity_data['Timestep'], activity_data['Spike_Count'])
+        axes[1,1].plot(np.arange(len(data['spikes_per_timestep'])), data['spikes_per_timestep'])
         axes[1,1].set_title('Spike Rate')
         axes[1,1].set_ylabel('Spikes per Timestep')
         axes[1,1].set_xlabel('Timestep')
         
         plt.tight_layout()
         
-        output_filename = f'{csv_prefix}simulation_results.png' if csv_prefix else 'simulation_results.png'
+        output_filename = f'{data_prefix}simulation_results.png' if data_prefix else 'simulation_results.png'
         plt.savefig(output_filename, dpi=300)
         print(f"Visualization saved as: {output_filename}")
         
@@ -58,7 +60,7 @@ def generate_visualization(csv_prefix=""):
         
     except FileNotFoundError as e:
         print(f'Error: {e}')
-        print('Make sure to export CSV data first.')
+        print('Make sure to export simulation data first.')
     except Exception as e:
         print(f'Error creating visualization: {e}')
 
@@ -67,7 +69,7 @@ def run_standard_simulation():
     
     simulator = neuron_simulator.NeuronSimulator()
     simulator.run_standard_simulation(5000)
-    simulator.export_csv_data()
+    simulator.export_binary_data()
     metrics = simulator.calculate_stability_metrics()
     data = simulator.get_simulation_data()
     
@@ -135,7 +137,7 @@ def run_single_condition():
     simulator.run_metabolic_dysfunction_simulation(condition, 3000)
     
     safe_name = condition.name.replace(' ', '_').replace('(', '_').replace(')', '_')
-    simulator.export_csv_data(f"{safe_name}_")
+    simulator.export_binary_data(f"{safe_name}_")
     metrics = simulator.calculate_stability_metrics()
     data = simulator.get_simulation_data()
     
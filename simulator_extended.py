@@ -1,14 +1,17 @@
 import neuron_simulator
+import os
 import warnings
-import random
 import numpy as np
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-from scipy import signal
-from scipy.stats import entropy
+from concurrent.futures import ThreadPoolExecutor
+from parameter_sweep import grid_points, run_sweep
+from analysis_pipeline import (calculate_advanced_metrics, draw_analysis, figure_path, load_analysis,
+                               render_run, render_runs)
 
-random.seed(43)
+SEED = 43  # seed of every simulator run, for reproducible results
+PROGRESSION_CHECKPOINT = "Progressive_checkpoint.bin"
+PROGRESSION_CHECKPOINT_INTERVAL = 10000
 warnings.filterwarnings('ignore')
 
 plt.style.use('seaborn-v0_8-darkgrid')
@@ -24,7 +27,8 @@ def print_menu():
     print("4. Single Condition Test")
     print("5. Comparative Analysis")
     print("6. Long-term Progression Study")
-    print("7. Exit")
+    print("7. Parameter Sweep")
+    print("8. Exit")
 
 
 def create_mental_health_conditions():
@@ -123,189 +127,33 @@ def create_mental_health_conditions():
     return conditions
 
 
-def calculate_advanced_metrics(membrane_data, spike_data, activity_data):
-    metrics = {}
-    
-    # Convert membrane potentials to numpy array
-    potentials = membrane_data.iloc[:, 1:].values
-    
-    # Network synchronization
-    correlations = np.corrcoef(potentials.T)
-    metrics['synchronization'] = np.mean(correlations[np.triu_indices_from(correlations, k=1)])
-    
-    # Oscillatory activity (simulate different frequency bands)
-    if len(activity_data) > 100:
-        signal_data = activity_data['Average_Potential'].values
-        
-        # Gamma band (30-100 Hz simulation)
-        gamma_power = np.var(signal_data[::2] - signal_data[1::2])
-        metrics['gamma_power'] = gamma_power
-        
-        # Beta band (13-30 Hz simulation)
-        beta_signal = signal_data[::4]
-        metrics['beta_power'] = np.var(beta_signal) if len(beta_signal) > 10 else 0
-        
-        # Alpha band (8-13 Hz simulation)
-        alpha_signal = signal_data[::8]
-        metrics['alpha_power'] = np.var(alpha_signal) if len(alpha_signal) > 10 else 0
-    
-    # Neural complexity (approximate entropy)
-    if len(activity_data) > 50:
-        signal_data = activity_data['Average_Potential'].values
-        # Discretize signal for entropy calculation
-        bins = np.linspace(signal_data.min(), signal_data.max(), 10)
-        digitized = np.digitize(signal_data, bins)
-        metrics['neural_entropy'] = entropy(np.bincount(digitized))
-    
-    # Spike irregularity
-    if len(spike_data) > 0:
-        spike_times = spike_data.groupby('Neuron_ID')['Timestep'].apply(list)
-        isis = []  # Inter-spike intervals
-        for neuron_spikes in spike_times:
-            if len(neuron_spikes) > 1:
-                isis.extend(np.diff(neuron_spikes))
-        if isis:
-            metrics['spike_irregularity'] = np.std(isis) / np.mean(isis) if np.mean(isis) > 0 else 0
-        else:
-            metrics['spike_irregularity'] = 0
-    
-    # Burst detection
-    if len(spike_data) > 0:
-        spike_counts = spike_data.groupby('Timestep').size()
-        threshold = spike_counts.mean() + 2 * spike_counts.std()
-        burst_events = spike_counts[spike_counts > threshold]
-        metrics['burst_frequency'] = len(burst_events) / len(spike_counts)
-    else:
-        metrics['burst_frequency'] = 0
-    
-    return metrics
-
-
-def generate_visualization(csv_prefix="", condition_name="Standard"):
+def generate_visualization(data_prefix="", condition_name="Standard", show=True):
+    # saves the analysis figure as {data_prefix}network_analysis.png and returns the
+    # metrics; show=False renders headless without opening a window
     try:
-        membrane_data = pd.read_csv(f'{csv_prefix}membrane_potentials.csv')
-        spike_data = pd.read_csv(f'{csv_prefix}spike_raster.csv')
-        activity_data = pd.read_csv(f'{csv_prefix}activity_summary.csv')
-        
-        metrics = calculate_advanced_metrics(membrane_data, spike_data, activity_data)
-        fig = plt.figure(figsize=(20, 12))
-        gs = fig.add_gridspec(3, 4, hspace=0.3, wspace=0.3)
-        fig.suptitle(f'Neural Network Analysis: {condition_name}', fontsize=16, fontweight='bold')
-        
-        # Membrane Potentials
-        ax1 = fig.add_subplot(gs[0, 0])
-        colors = plt.cm.viridis(np.linspace(0, 1, min(10, len(membrane_data.columns)-1)))
-        for i in range(min(10, len(membrane_data.columns)-1)):
-            ax1.plot(membrane_data.iloc[:, i+1], alpha=0.7, color=colors[i], linewidth=1.5)
-        ax1.set_title('Membrane Potentials (Sample Neurons)', fontweight='bold')
-        ax1.set_ylabel('Potential (mV)')
-        ax1.set_facecolor('white')
-        ax1.grid(False)
-        
-        # Spike Raster
-        ax2 = fig.add_subplot(gs[0, 1])
-        if len(spike_data) > 0:
-            scatter = ax2.scatter(spike_data['Timestep'], spike_data['Neuron_ID'], 
-                               s=0.5, alpha=0.6, c=spike_data['Timestep'], cmap='plasma')
-            ax2.set_title('Spike Raster Plot', fontweight='bold')
-            ax2.set_ylabel('Neuron ID')
-            plt.colorbar(scatter, ax=ax2, label='Time')
+        if show:
+            data, metrics, series = load_analysis(data_prefix)
+            fig = plt.figure(figsize=(20, 12))
+            draw_analysis(fig, data, series, condition_name)
+            output_path = figure_path(data_prefix)
+            fig.savefig(output_path, dpi=150)
         else:
-            ax2.text(0.5, 0.5, 'No Spikes Detected', ha='center', va='center', transform=ax2.transAxes)
-            ax2.set_title('Spike Raster Plot', fontweight='bold')
-        ax2.set_facecolor('white')
-        ax2.grid(False)
-        
-        # Network Activity
-        ax3 = fig.add_subplot(gs[0, 2])
-        ax3.plot(activity_data['Timestep'], activity_data['Average_Potential'], 
-                color='darkblue', linewidth=2)
-        ax3.set_title('Network Activity', fontweight='bold')
-        ax3.set_ylabel('Average Potential (mV)')
-        ax3.set_facecolor('white')
-        ax3.grid(False)
-        
-        # Spike Rate
-        ax4 = fig.add_subplot(gs[0, 3])
-        ax4.scatter(activity_data['Timestep'], activity_data['Spike_Count'], 
-                   color='red', s=4, alpha=0.8)
-        ax4.set_title('Spike Rate', fontweight='bold')
-        ax4.set_ylabel('Spikes per Timestep')
-        ax4.set_xlabel('Timestep')
-        ax4.set_facecolor('white')
-        ax4.grid(False)
-        
-        # Frequency Analysis
-        ax5 = fig.add_subplot(gs[1, 0])
-        if len(activity_data) > 100:
-            signal_data = activity_data['Average_Potential'].values
-            freqs, psd = signal.periodogram(signal_data, fs=10.0)  # Assume 10 Hz sampling
-            ax5.semilogy(freqs, psd, color='purple', linewidth=2)
-            ax5.set_title('Power Spectral Density', fontweight='bold')
-            ax5.set_xlabel('Frequency (Hz)')
-            ax5.set_ylabel('Power')
-            ax5.set_facecolor('white')
-            ax5.grid(False)
-        
-        # Synchronization Analysis
-        ax6 = fig.add_subplot(gs[1, 1])
-        if len(membrane_data.columns) > 3:
-            # Calculate rolling correlation between neurons
-            potentials = membrane_data.iloc[:, 1:6].values  # First 5 neurons
-            correlations = []
-            window = 100
-            for i in range(window, len(potentials)):
-                corr_matrix = np.corrcoef(potentials[i-window:i].T)
-                correlations.append(np.mean(corr_matrix[np.triu_indices_from(corr_matrix, k=1)]))
-            
-            ax6.plot(range(window, len(potentials)), correlations, color='orange', linewidth=2)
-            ax6.set_title('Network Synchronization', fontweight='bold')
-            ax6.set_ylabel('Correlation Coefficient')
-            ax6.set_xlabel('Timestep')
-            ax6.set_facecolor('white')
-            ax6.grid(False)
-        
-        # Membrane Potential Distribution
-        ax9 = fig.add_subplot(gs[1, 2])
-        all_potentials = membrane_data.iloc[:, 1:].values.flatten()
-        ax9.hist(all_potentials, bins=50, alpha=0.7, color='skyblue', edgecolor='black')
-        ax9.set_title('Membrane Potential Distribution', fontweight='bold')
-        ax9.set_xlabel('Potential (mV)')
-        ax9.set_ylabel('Frequency')
-        ax9.set_facecolor('white')
-        ax9.grid(False)
-        
-        # Stability Analysis
-        ax11 = fig.add_subplot(gs[1, 3])
-        if len(activity_data) > 50:
-            # Calculate running variance as stability measure
-            signal_data = activity_data['Average_Potential'].values
-            window = 50
-            running_var = []
-            for i in range(window, len(signal_data)):
-                running_var.append(np.var(signal_data[i-window:i]))
-            
-            ax11.plot(range(window, len(signal_data)), running_var, color='brown', linewidth=2)
-            ax11.set_title('Network Stability', fontweight='bold')
-            ax11.set_ylabel('Running Variance')
-            ax11.set_xlabel('Timestep')
-            ax11.set_facecolor('white')
-            ax11.grid(False)
-        
-        plt.tight_layout()
-        plt.show()
+            output_path, metrics = render_run(data_prefix, condition_name)
+        print(f"Visualization saved as: {output_path}")
+        if show:
+            plt.show()
         return metrics
-        
+    
     except FileNotFoundError as e:
         print(f'Error: {e}')
-        print('Make sure to export CSV data first.')
+        print('Make sure to export simulation data first.')
         return {}
     except Exception as e:
         print(f'Error creating enhanced visualization: {e}')
         return {}
 
 
-def get_clinical_interpretation(metrics, condition_name, activity_data):
+def get_clinical_interpretation(metrics, condition_name, data):
     interpretation = f"CLINICAL ANALYSIS:\n{condition_name}\n\n"
     
     # Synchronization interpretation
@@ -334,9 +182,9 @@ def get_clinical_interpretation(metrics, condition_name, activity_data):
         interpretation += "Normal burst activity\n\n"
     
     # Overall spike rate
-    if len(activity_data) > 0:
-        total_spikes = activity_data['Spike_Count'].sum()
-        total_time = len(activity_data)
+    if len(data['spikes_per_timestep']) > 0:
+        total_spikes = data['spikes_per_timestep'].sum()
+        total_time = len(data['spikes_per_timestep'])
         spike_rate = total_spikes / total_time if total_time > 0 else 0
         
         if spike_rate < 0.1:
@@ -351,9 +199,9 @@ def get_clinical_interpretation(metrics, condition_name, activity_data):
 
 def run_standard_simulation():
     print("Running standard neural network simulation...")
-    simulator = neuron_simulator.NeuronSimulator()
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
     simulator.run_standard_simulation(8000)
-    simulator.export_csv_data()
+    simulator.export_binary_data()
     metrics = simulator.calculate_stability_metrics()
     data = simulator.get_simulation_data()
     print(f"\nSimulation Complete:")
@@ -371,64 +219,87 @@ def run_standard_simulation():
 
 def run_metabolic_studies():
     print("Running comprehensive metabolic dysfunction studies...")
-    simulator = neuron_simulator.NeuronSimulator()
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
     simulator.run_metabolic_dysfunction_studies()
     print("Metabolic studies complete!")
     print("Generating comparative visualizations...")
     conditions = ['Severe_Hypoglycemia_', 'Diabetic_Ketoacidosis_', 'Cerebral_Hypoxia_', 'Mitochondrial_Dysfunction_']
     condition_names = ['Severe Hypoglycemia', 'Diabetic Ketoacidosis', 'Cerebral Hypoxia', 'Mitochondrial Dysfunction']
-    for condition_prefix, condition_name in zip(conditions, condition_names):
-        try:
-            print(f"Analyzing {condition_name}...")
-            generate_visualization(condition_prefix, condition_name)
-        except Exception as e:
-            print(f"Could not generate visualization for {condition_name}: {e}")
+    try:
+        # rendered headless and in parallel; the figures are saved, not shown
+        for output_path, _ in render_runs(zip(conditions, condition_names)).values():
+            print(f"Visualization saved as: {output_path}")
+    except Exception as e:
+        print(f"Could not generate visualizations: {e}")
+
+
+def simulate_condition(condition, timesteps, prefix):
+    # one simulator per call; simulations release the GIL, so calls from
+    # different threads run in parallel
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
+    simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
+    simulator.export_binary_data(prefix)
+    return simulator.calculate_stability_metrics(), simulator.get_simulation_data()
 
 
 def run_mental_health_studies():
     print("Running comprehensive mental health studies...")
     conditions = create_mental_health_conditions()
-    simulator = neuron_simulator.NeuronSimulator()
     results = {}
+    futures = {}
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for condition_key, condition in conditions.items():
+            print(f"Starting {condition.name} simulation...")
+            
+            if 'bipolar' in condition_key:
+                timesteps = 200000  # Need longer for mood cycles
+            elif condition.progressive:
+                timesteps = 150000  # Longer for progressive conditions
+            else:
+                timesteps = 100000
+            
+            safe_name = condition.name.replace(' ', '_').replace('(', '').replace(')', '')
+            futures[condition_key] = executor.submit(simulate_condition, condition, timesteps, f"{safe_name}_")
+    
+    # results are reported in order once all runs are done
+    prefixes = {}
     for condition_key, condition in conditions.items():
-        print(f"\nRunning {condition.name} simulation...")
-        
-        if 'bipolar' in condition_key:
-            timesteps = 200000  # Need longer for mood cycles
-        elif condition.progressive:
-            timesteps = 150000  # Longer for progressive conditions
-        else:
-            timesteps = 100000
-        
         try:
-            simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
+            metrics, data = futures[condition_key].result()
             safe_name = condition.name.replace(' ', '_').replace('(', '').replace(')', '')
-            simulator.export_csv_data(f"{safe_name}_")
-            metrics = simulator.calculate_stability_metrics()
-            data = simulator.get_simulation_data()
-            print(f"=== {condition.name} Results ===")
+            print(f"\n=== {condition.name} Results ===")
             print(f"Total spikes: {data.total_spikes}")
             print(f"Spike rate: {data.total_spikes / data.total_timesteps:.3f}")
             print(f"Coefficient of variation: {metrics.coefficient_of_variation:.3f}")
             print(f"Synchrony index: {metrics.synchrony_index:.3f}")
             print(f"Homeostatic deviation: {metrics.homeostatic_deviation:.1f} mV")
-            enhanced_metrics = generate_visualization(f"{safe_name}_", condition.name)
+            prefixes[condition_key] = f"{safe_name}_"
             results[condition_key] = {
                 'metrics': metrics,
                 'data': data,
-                'enhanced_metrics': enhanced_metrics,
                 'condition': condition
             }
         except Exception as e:
             print(f"Error simulating {condition.name}: {e}")
     
+    # figures are rendered headless and in parallel, and saved rather than shown
+    print("\nGenerating visualizations...")
+    try:
+        rendered = render_runs((prefixes[key], conditions[key].name) for key in prefixes)
+        for condition_key, prefix in prefixes.items():
+            output_path, enhanced_metrics = rendered[prefix]
+            results[condition_key]['enhanced_metrics'] = enhanced_metrics
+            print(f"Visualization saved as: {output_path}")
+    except Exception as e:
+        print(f"Could not generate visualizations: {e}")
+    
     if results:
-        generate_comparative_analysis(results)
+        generate_comparative_analysis(results, show=False)
     
     return results
 
 
-def generate_comparative_analysis(results):
+def generate_comparative_analysis(results, show=True):
     print("\nGenerating comparative analysis...")
     condition_names = []
     spike_rates = []
@@ -484,13 +355,16 @@ def generate_comparative_analysis(results):
     plt.tight_layout()
     plt.savefig('mental_health_comparative_analysis.png', dpi=300, bbox_inches='tight')
     print("Comparative analysis saved as: mental_health_comparative_analysis.png")
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close(fig)
 
 
 def run_single_condition():
     print("Available conditions:")
     print("1. Severe Hypoglycemia")
-    print("2. Diabetic Ketoacidosis") 
+    print("2. Diabetic Ketoacidosis")
     print("3. Cerebral Hypoxia")
     print("4. Mitochondrial Dysfunction")
     print("5. Major Depression")
@@ -502,7 +376,7 @@ def run_single_condition():
     print("11. PTSD")
     
     choice = input("Enter choice (1-11): ")
-    simulator = neuron_simulator.NeuronSimulator()
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
     condition = None
     condition_name = ""
     
@@ -558,7 +432,7 @@ def run_single_condition():
         conditions = create_mental_health_conditions()
         condition_map = {
             "5": "depression",
-            "6": "bipolar_manic", 
+            "6": "bipolar_manic",
             "7": "bipolar_depressive",
             "8": "schizophrenia",
             "9": "anxiety",
@@ -578,7 +452,7 @@ def run_single_condition():
     
     try:
         simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
-        simulator.export_csv_data(f"{condition_name}_")
+        simulator.export_binary_data(f"{condition_name}_")
         metrics = simulator.calculate_stability_metrics()
         data = simulator.get_simulation_data()
         print(f"\n=== {condition.name} Results ===")
@@ -603,37 +477,41 @@ def run_comparative_analysis():
     # Select a subset of conditions for comparison
     conditions_to_compare = [
         ("depression", "Major Depression"),
-        ("bipolar_manic", "Bipolar (Manic)"), 
+        ("bipolar_manic", "Bipolar (Manic)"),
         ("anxiety", "Anxiety Disorder"),
         ("schizophrenia", "Schizophrenia")
     ]
     
-    simulator = neuron_simulator.NeuronSimulator()
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
     mental_conditions = create_mental_health_conditions()
     results = {}
-
-    # Add normal baseline
-    print("Running baseline normal simulation...")
-    simulator.run_standard_simulation(8000)
-    simulator.export_csv_data("Normal_")
-    baseline_metrics = simulator.calculate_stability_metrics()
-    baseline_data = simulator.get_simulation_data()
-    results['normal'] = {
-        'metrics': baseline_metrics,
-        'data': baseline_data,
-        'condition': type('obj', (object,), {'name': 'Normal'})()
-    }
+    
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        futures = {}
+        for condition_key, display_name in conditions_to_compare:
+            print(f"Starting {display_name} simulation...")
+            condition = mental_conditions[condition_key]
+            timesteps = 100000
+            safe_name = display_name.replace(' ', '_').replace('(', '').replace(')', '')
+            futures[condition_key] = executor.submit(simulate_condition, condition, timesteps, f"{safe_name}_")
+        
+        # Add normal baseline, simulated here while the conditions run in the pool
+        print("Running baseline normal simulation...")
+        simulator.run_standard_simulation(8000)
+        simulator.export_binary_data("Normal_")
+        baseline_metrics = simulator.calculate_stability_metrics()
+        baseline_data = simulator.get_simulation_data()
+        results['normal'] = {
+            'metrics': baseline_metrics,
+            'data': baseline_data,
+            'condition': type('obj', (object,), {'name': 'Normal'})()
+        }
     
     for condition_key, display_name in conditions_to_compare:
-        print(f"Running {display_name} simulation...")
+        print(f"{display_name} results:")
         condition = mental_conditions[condition_key]
-        timesteps = 100000
         try:
-            simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
-            safe_name = display_name.replace(' ', '_').replace('(', '').replace(')', '')
-            simulator.export_csv_data(f"{safe_name}_")
-            metrics = simulator.calculate_stability_metrics()
-            data = simulator.get_simulation_data()
+            metrics, data = futures[condition_key].result()
             results[condition_key] = {
                 'metrics': metrics,
                 'data': data,
@@ -665,14 +543,25 @@ def run_progression_study():
     condition.oxidative_stress = 0.3  # Will increase over time
     condition.progressive = True
     condition.onset_timestep = 10000
-    simulator = neuron_simulator.NeuronSimulator()
+    simulator = neuron_simulator.NeuronSimulator(seed=SEED)
+    # same dynamics as the default engine, and checkpoints need it
+    simulator.set_engine(neuron_simulator.SimulationEngine.SOA)
     
     timesteps = 100000
     print(f"Running {timesteps} timestep simulation (this may take a while)...")
     
     try:
-        simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
-        simulator.export_csv_data("Progressive_")
+        # an interrupted study continues from its last checkpoint
+        if os.path.exists(PROGRESSION_CHECKPOINT):
+            simulator.load_checkpoint(PROGRESSION_CHECKPOINT)
+            simulator.set_checkpointing(PROGRESSION_CHECKPOINT, PROGRESSION_CHECKPOINT_INTERVAL)
+            simulator.resume_metabolic_dysfunction_simulation(condition, timesteps)
+        else:
+            simulator.set_checkpointing(PROGRESSION_CHECKPOINT, PROGRESSION_CHECKPOINT_INTERVAL)
+            simulator.run_metabolic_dysfunction_simulation(condition, timesteps)
+        os.remove(PROGRESSION_CHECKPOINT)
+        os.remove(PROGRESSION_CHECKPOINT + ".recording")
+        simulator.export_binary_data("Progressive_")
         metrics = simulator.calculate_stability_metrics()
         data = simulator.get_simulation_data()
         print(f"\n=== Progressive Neurodegeneration Results ===")
@@ -688,13 +577,35 @@ def run_progression_study():
         return {}
 
 
+def run_parameter_sweep():
+    print("Running parameter sweep around Major Depression...")
+    print("Completed runs are kept in parameter_sweep_results.jsonl; rerun to resume an interrupted sweep.")
+    
+    base = create_mental_health_conditions()['depression']
+    points = grid_points({
+        'neurotransmitter_synthesis': [0.2, 0.4, 0.6, 0.8],
+        'atp_efficiency': [0.4, 0.6, 0.8],
+        'oxidative_stress': [0.2, 0.4, 0.6]
+    })
+    table = run_sweep(base, points, seeds=[SEED], max_timesteps=20000,
+                      analysis=calculate_advanced_metrics,
+                      results_path='parameter_sweep_results.jsonl')
+    
+    print("\nMost synchronized parameter sets:")
+    for i in np.argsort(table['synchrony_index'])[::-1][:5]:
+        print(f"  synthesis={table['neurotransmitter_synthesis'][i]:.1f}, "
+              f"ATP={table['atp_efficiency'][i]:.1f}, stress={table['oxidative_stress'][i]:.1f}: "
+              f"synchrony={table['synchrony_index'][i]:.3f}, spike rate={table['spike_rate'][i]:.3f}")
+    return table
+
+
 def main():
     print("This simulator models human neurons with metabolic and mental health conditions.")
     print()
     
     while True:
         print_menu()
-        choice = input("\nEnter your choice (1-7): ")
+        choice = input("\nEnter your choice (1-8): ")
         
         if choice == '1':
             run_standard_simulation()
@@ -709,6 +620,8 @@ def main():
         elif choice == '6':
             run_progression_study()
         elif choice == '7':
+            run_parameter_sweep()
+        elif choice == '8':
             print("Exiting simulator. Thank you!")
             break
         else:
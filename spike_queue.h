@@ -0,0 +1,103 @@
+#ifndef SPIKE_QUEUE_H
+#define SPIKE_QUEUE_H
+
+#include <vector>
+#include <algorithm>
+#include <stdexcept>
+#include "checkpoint.h"
+
+class Synapse;
+
+// an action potential travelling to one synapse of the object model
+struct SynapticSignal {
+    Synapse* synapse;
+    float amplitude;
+};
+
+// an action potential travelling to one entry of a SynapseMatrix
+struct IndexedSignal {
+    int synapse;
+    float amplitude;
+};
+
+// ring buffer of pending spike deliveries, bucketed by delivery timestep.
+// events are delivered in the order they were scheduled, and every delay is at
+// least one timestep, so delivering a bucket can never feed back into itself.
+template <typename Event>
+class SpikeQueue {
+private:
+    std::vector<std::vector<Event>> buckets;
+    int current_step;
+    size_t pending_count;
+    
+    void grow(int min_size) {
+        int old_size = static_cast<int>(buckets.size());
+        int new_size = std::max(min_size, 2 * old_size);
+        std::vector<std::vector<Event>> resized(new_size);
+        for (int offset = 0; offset < old_size; ++offset) {
+            int step = current_step + offset;
+            resized[step % new_size].swap(buckets[step % old_size]);
+        }
+        buckets.swap(resized);
+    }
+
+public:
+    explicit SpikeQueue(int capacity = 2) : buckets(capacity), current_step(0), pending_count(0) {}
+    
+    // drop all pending events; capacity should exceed the longest delay
+    void reset(int capacity) {
+        buckets.assign(std::max(capacity, 2), std::vector<Event>());
+        current_step = 0;
+        pending_count = 0;
+    }
+    
+    // move the queue to the given timestep; must not skip over pending events
+    inline void advance_to(int timestep) { current_step = timestep; }
+    inline int get_current_step() const { return current_step; }
+    
+    // deliver event after delay timesteps (delay >= 1)
+    inline void schedule(int delay, const Event& event) {
+        if (delay < 1) {
+            throw std::invalid_argument("SpikeQueue: delay must be at least one timestep");
+        }
+        if (delay >= static_cast<int>(buckets.size())) {
+            grow(delay + 1);
+        }
+        buckets[(current_step + delay) % buckets.size()].push_back(event);
+        pending_count++;
+    }
+    
+    // move the events due at the current timestep into out, in scheduling order
+    inline void take_due(std::vector<Event>& out) {
+        out.clear();
+        out.swap(buckets[current_step % buckets.size()]);
+        pending_count -= out.size();
+    }
+    
+    inline size_t get_pending_count() const { return pending_count; }
+    // elements the buckets can hold without reallocating
+    inline size_t get_buffer_capacity() const {
+        size_t capacity = 0;
+        for (const std::vector<Event>& bucket : buckets) capacity += bucket.capacity();
+        return capacity;
+    }
+    inline int get_capacity() const { return static_cast<int>(buckets.size()); }
+    
+    // pending events and position, for checkpoints
+    void save(CheckpointWriter& writer) const {
+        writer.write(current_step);
+        writer.write<uint64_t>(buckets.size());
+        for (const std::vector<Event>& bucket : buckets) writer.write_vector(bucket);
+    }
+    void load(CheckpointReader& reader) {
+        current_step = reader.read<int>();
+        buckets.assign(std::max<uint64_t>(reader.read<uint64_t>(), 2), std::vector<Event>());
+        pending_count = 0;
+        for (std::vector<Event>& bucket : buckets) {
+            reader.read_vector(bucket);
+            pending_count += bucket.size();
+        }
+    }
+};
+
+#endif
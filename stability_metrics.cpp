@@ -0,0 +1,375 @@
+#include "stability_metrics.h"
+#include <vector>
+#include <algorithm>
+#include <numeric>
+#include <cmath>
+#include <cstdlib>
+#include <limits>
+#include <stdexcept>
+
+namespace {
+
+const float RESTING_POTENTIAL = -65.0f;
+// states compared per direction when searching a nearest neighbour for the lyapunov
+// estimate; bounds the cost on long, slowly varying series
+const int MAX_NEIGHBOUR_CANDIDATES = 128;
+
+// coefficient of variation of all inter-spike intervals. spikes are recorded in time
+// order, so the previous spike of each neuron is all that is needed
+void interval_metrics(const SimulationData& data, StabilityMetrics& metrics) {
+    std::vector<int> last_spike(data.neuron_count, -1);
+    double sum = 0.0, sum_squares = 0.0;
+    size_t count = 0;
+    
+    for (size_t k = 0; k < data.spike_times.size(); ++k) {
+        const int neuron_id = data.spike_neurons[k];
+        const int time = data.spike_times[k];
+        if (last_spike[neuron_id] >= 0) {
+            const double interval = time - last_spike[neuron_id];
+            sum += interval;
+            sum_squares += interval * interval;
+            count++;
+        }
+        last_spike[neuron_id] = time;
+    }
+    
+    if (count > 0) {
+        const double mean = sum / count;
+        const double variance = std::max(0.0, sum_squares / count - mean * mean);
+        metrics.coefficient_of_variation = mean > 0.0 ? static_cast<float>(std::sqrt(variance) / mean) : 0.0f;
+    }
+}
+
+// burstiness, entropy and branching ratio of the population spike count series
+void spike_count_metrics(const SimulationData& data, StabilityMetrics& metrics) {
+    const std::vector<int>& counts = data.spikes_per_timestep;
+    if (counts.empty()) return;
+    
+    double sum = 0.0, sum_squares = 0.0;
+    double ancestors = 0.0, descendants = 0.0;
+    std::vector<size_t> histogram;
+    for (size_t t = 0; t < counts.size(); ++t) {
+        const int count = counts[t];
+        sum += count;
+        sum_squares += static_cast<double>(count) * count;
+        if (static_cast<size_t>(count) >= histogram.size()) histogram.resize(count + 1, 0);
+        histogram[count]++;
+        if (count > 0 && t + 1 < counts.size()) {
+            ancestors += count;
+            descendants += counts[t + 1];
+        }
+    }
+    
+    const double mean = sum / counts.size();
+    const double variance = std::max(0.0, sum_squares / counts.size() - mean * mean);
+    metrics.burst_coefficient = mean > 0.0 ? static_cast<float>(variance / mean) : 0.0f;
+    metrics.critical_branching_ratio = ancestors > 0.0 ? static_cast<float>(descendants / ancestors) : 0.0f;
+    
+    double entropy = 0.0;
+    for (size_t occurrences : histogram) {
+        if (occurrences == 0) continue;
+        const double p = static_cast<double>(occurrences) / counts.size();
+        entropy -= p * std::log2(p);
+    }
+    metrics.entropy = static_cast<float>(entropy);
+}
+
+// synchrony (Golomb's chi) and mean pairwise correlation of the recorded potentials.
+// the mean of all pairwise correlations follows from the variance of the sum of the
+// standardized traces, var(sum z_i) = K + sum over pairs i != j of corr(i, j), so no
+// K x K correlation matrix is formed
+void potential_metrics(const SimulationData& data, StabilityMetrics& metrics) {
+    const size_t columns = data.recorded_neurons.size();
+    const size_t rows = data.recorded_timesteps.size();
+    if (rows < 2 || columns == 0) return;
+    const float* potentials = data.membrane_potentials.data();
+    
+    std::vector<double> column_sum(columns, 0.0), column_squares(columns, 0.0);
+    double mean_sum = 0.0, mean_squares = 0.0;
+    for (size_t t = 0; t < rows; ++t) {
+        const float* row = potentials + t * columns;
+        double row_sum = 0.0;
+        for (size_t i = 0; i < columns; ++i) {
+            const double value = row[i];
+            column_sum[i] += value;
+            column_squares[i] += value * value;
+            row_sum += value;
+        }
+        const double row_mean = row_sum / columns;
+        mean_sum += row_mean;
+        mean_squares += row_mean * row_mean;
+    }
+    
+    std::vector<double> column_mean(columns), inverse_std(columns, 0.0);
+    double mean_variance = 0.0;
+    size_t varying_columns = 0;
+    for (size_t i = 0; i < columns; ++i) {
+        column_mean[i] = column_sum[i] / rows;
+        const double variance = std::max(0.0, column_squares[i] / rows - column_mean[i] * column_mean[i]);
+        mean_variance += variance;
+        if (variance > 0.0) {
+            inverse_std[i] = 1.0 / std::sqrt(variance);
+            varying_columns++;
+        }
+    }
+    mean_variance /= columns;
+    
+    const double population_mean = mean_sum / rows;
+    const double population_variance = std::max(0.0, mean_squares / rows - population_mean * population_mean);
+    if (mean_variance > 0.0) {
+        metrics.synchrony_index = static_cast<float>(std::sqrt(population_variance / mean_variance));
+    }
+    
+    // neurons whose potential never changes have no defined correlation and are left out
+    if (varying_columns < 2) return;
+    double standardized_squares = 0.0;
+    for (size_t t = 0; t < rows; ++t) {
+        const float* row = potentials + t * columns;
+        double standardized_sum = 0.0;
+        for (size_t i = 0; i < columns; ++i) {
+            standardized_sum += (row[i] - column_mean[i]) * inverse_std[i];
+        }
+        standardized_squares += standardized_sum * standardized_sum;
+    }
+    const double k = static_cast<double>(varying_columns);
+    metrics.network_coherence = static_cast<float>((standardized_squares / rows - k) / (k * (k - 1.0)));
+}
+
+// homeostatic deviation of the network activity
+void activity_metrics(const SimulationData& data, StabilityMetrics& metrics) {
+    const std::vector<float>& activity = data.network_activity;
+    if (activity.empty()) return;
+    
+    const double mean_activity = std::accumulate(activity.begin(), activity.end(), 0.0) / activity.size();
+    metrics.homeostatic_deviation = static_cast<float>(std::abs(mean_activity - RESTING_POTENTIAL));
+}
+
+// largest-lyapunov-exponent estimate from the network activity (Rosenstein's method).
+// the series is embedded with time delays, each embedded state is paired with its
+// nearest neighbour that is not close in time, and the log distance of each pair is
+// followed for horizon samples. the exponent is the least-squares slope of the mean
+// log distance over the fit range. pairs with zero distance carry no information, so
+// a constant or strictly quantized series gives no estimate and leaves the exponent at 0
+void lyapunov_metrics(const SimulationData& data, const LyapunovParameters& parameters,
+                      StabilityMetrics& metrics) {
+    const std::vector<float>& activity = data.network_activity;
+    const int dimension = parameters.embedding_dimension;
+    const int lag = parameters.lag;
+    const int horizon = parameters.horizon;
+    // each embedded state needs its own span plus horizon successors
+    const int states = static_cast<int>(activity.size()) - (dimension - 1) * lag - horizon;
+    if (states < 2) return;
+    
+    auto distance = [&](int a, int b) {
+        double squares = 0.0;
+        for (int d = 0; d < dimension; ++d) {
+            const double difference = activity[a + d * lag] - activity[b + d * lag];
+            squares += difference * difference;
+        }
+        return std::sqrt(squares);
+    };
+    
+    // states ordered by their first coordinate: its difference bounds the distance, so
+    // the search outwards from a state can stop once it exceeds the nearest found so far
+    std::vector<int> order(states);
+    std::iota(order.begin(), order.end(), 0);
+    std::sort(order.begin(), order.end(), [&](int a, int b) { return activity[a] < activity[b]; });
+    
+    std::vector<double> log_sum(horizon + 1, 0.0);
+    std::vector<size_t> log_count(horizon + 1, 0);
+    for (int p = 0; p < states; ++p) {
+        const int i = order[p];
+        int neighbour = -1;
+        double nearest = std::numeric_limits<double>::infinity();
+        for (int direction : {-1, 1}) {
+            int scanned = 0;
+            for (int q = p + direction; q >= 0 && q < states && scanned < MAX_NEIGHBOUR_CANDIDATES;
+                 q += direction, ++scanned) {
+                const int j = order[q];
+                if (std::abs(activity[j] - activity[i]) >= nearest) break;
+                if (std::abs(i - j) <= parameters.min_separation) continue;
+                const double d = distance(i, j);
+                if (d > 0.0 && d < nearest) {
+                    neighbour = j;
+                    nearest = d;
+                }
+            }
+        }
+        if (neighbour < 0) continue;
+        
+        for (int k = 0; k <= horizon; ++k) {
+            const double d = distance(i + k, neighbour + k);
+            if (d <= 0.0) continue;
+            log_sum[k] += std::log(d);
+            log_count[k]++;
+        }
+    }
+    
+    double sum_k = 0.0, sum_y = 0.0, sum_kk = 0.0, sum_ky = 0.0;
+    int points = 0;
+    for (int k = parameters.fit_begin; k <= parameters.fit_end; ++k) {
+        if (log_count[k] == 0) continue;
+        const double y = log_sum[k] / log_count[k];
+        sum_k += k;
+        sum_y += y;
+        sum_kk += static_cast<double>(k) * k;
+        sum_ky += k * y;
+        points++;
+    }
+    if (points < 2) return;
+    const double denominator = points * sum_kk - sum_k * sum_k;
+    metrics.lyapunov_exponent = static_cast<float>((points * sum_ky - sum_k * sum_y) / denominator);
+}
+
+} // namespace
+
+void validate_lyapunov_parameters(const LyapunovParameters& parameters) {
+    if (parameters.embedding_dimension < 1 || parameters.lag < 1) {
+        throw std::invalid_argument("embedding dimension and lag must be at least 1");
+    }
+    if (parameters.min_separation < 0 || parameters.horizon < 1) {
+        throw std::invalid_argument("neighbour separation must be non-negative and the horizon at least 1");
+    }
+    if (parameters.fit_begin < 0 || parameters.fit_end <= parameters.fit_begin || parameters.fit_end > parameters.horizon) {
+        throw std::invalid_argument("the lyapunov fit range must satisfy 0 <= fit_begin < fit_end <= horizon");
+    }
+}
+
+StabilityMetrics compute_stability_metrics(const SimulationData& data, const LyapunovParameters& lyapunov) {
+    validate_lyapunov_parameters(lyapunov);
+    StabilityMetrics metrics;
+    interval_metrics(data, metrics);
+    spike_count_metrics(data, metrics);
+    potential_metrics(data, metrics);
+    activity_metrics(data, metrics);
+    lyapunov_metrics(data, lyapunov, metrics);
+    return metrics;
+}
+
+OnlineMetrics::OnlineMetrics()
+    : previous_count(0), ancestors(0.0), descendants(0.0), pending_timestep(0) {}
+
+void OnlineMetrics::begin(int neuron_count) {
+    std::lock_guard<std::mutex> guard(lock);
+    last_spike.assign(neuron_count, -1);
+    intervals = RunningStats();
+    spike_counts = RunningStats();
+    count_histogram.clear();
+    previous_count = 0;
+    ancestors = 0.0;
+    descendants = 0.0;
+    activity = RunningStats();
+    neuron_potentials.assign(neuron_count, RunningStats());
+    pending_spikes.clear();
+}
+
+void OnlineMetrics::record_potentials(const float* potentials, float network_activity) {
+    std::lock_guard<std::mutex> guard(lock);
+    activity.add(network_activity);
+    for (size_t i = 0; i < neuron_potentials.size(); ++i) {
+        neuron_potentials[i].add(potentials[i]);
+    }
+}
+
+void OnlineMetrics::end_timestep(int spike_count) {
+    std::lock_guard<std::mutex> guard(lock);
+    for (int neuron_id : pending_spikes) {
+        if (last_spike[neuron_id] >= 0) {
+            intervals.add(pending_timestep - last_spike[neuron_id]);
+        }
+        last_spike[neuron_id] = pending_timestep;
+    }
+    pending_spikes.clear();
+    
+    spike_counts.add(spike_count);
+    if (static_cast<size_t>(spike_count) >= count_histogram.size()) count_histogram.resize(spike_count + 1, 0);
+    count_histogram[spike_count]++;
+    if (previous_count > 0) {
+        ancestors += previous_count;
+        descendants += spike_count;
+    }
+    previous_count = spike_count;
+}
+
+StabilityMetrics OnlineMetrics::snapshot() const {
+    std::lock_guard<std::mutex> guard(lock);
+    StabilityMetrics metrics;
+    
+    if (intervals.count > 0 && intervals.mean > 0.0) {
+        metrics.coefficient_of_variation = static_cast<float>(std::sqrt(intervals.variance()) / intervals.mean);
+    }
+    if (spike_counts.count > 0) {
+        if (spike_counts.mean > 0.0) {
+            metrics.burst_coefficient = static_cast<float>(spike_counts.variance() / spike_counts.mean);
+        }
+        double entropy = 0.0;
+        for (long long occurrences : count_histogram) {
+            if (occurrences == 0) continue;
+            const double p = static_cast<double>(occurrences) / spike_counts.count;
+            entropy -= p * std::log2(p);
+        }
+        metrics.entropy = static_cast<float>(entropy);
+    }
+    if (ancestors > 0.0) {
+        metrics.critical_branching_ratio = static_cast<float>(descendants / ancestors);
+    }
+    
+    if (activity.count > 0) {
+        metrics.homeostatic_deviation = static_cast<float>(std::abs(activity.mean - RESTING_POTENTIAL));
+        double mean_variance = 0.0;
+        for (const RunningStats& neuron : neuron_potentials) {
+            mean_variance += neuron.variance();
+        }
+        mean_variance /= neuron_potentials.size();
+        if (activity.count > 1 && mean_variance > 0.0) {
+            metrics.synchrony_index = static_cast<float>(std::sqrt(activity.variance() / mean_variance));
+        }
+    }
+    return metrics;
+}
+
+long long OnlineMetrics::get_timesteps() const {
+    std::lock_guard<std::mutex> guard(lock);
+    return spike_counts.count;
+}
+
+void OnlineMetrics::copy_from(const OnlineMetrics& other) {
+    std::scoped_lock guard(lock, other.lock);
+    last_spike = other.last_spike;
+    intervals = other.intervals;
+    spike_counts = other.spike_counts;
+    count_histogram = other.count_histogram;
+    previous_count = other.previous_count;
+    ancestors = other.ancestors;
+    descendants = other.descendants;
+    activity = other.activity;
+    neuron_potentials = other.neuron_potentials;
+    pending_spikes.clear();
+}
+
+void OnlineMetrics::save(CheckpointWriter& writer) const {
+    std::lock_guard<std::mutex> guard(lock);
+    writer.write_vector(last_spike);
+    writer.write(intervals);
+    writer.write(spike_counts);
+    writer.write_vector(count_histogram);
+    writer.write(previous_count);
+    writer.write(ancestors);
+    writer.write(descendants);
+    writer.write(activity);
+    writer.write_vector(neuron_potentials);
+}
+
+void OnlineMetrics::load(CheckpointReader& reader) {
+    std::lock_guard<std::mutex> guard(lock);
+    reader.read_vector(last_spike);
+    intervals = reader.read<RunningStats>();
+    spike_counts = reader.read<RunningStats>();
+    reader.read_vector(count_histogram);
+    previous_count = reader.read<int>();
+    ancestors = reader.read<double>();
+    descendants = reader.read<double>();
+    activity = reader.read<RunningStats>();
+    reader.read_vector(neuron_potentials);
+    pending_spikes.clear();
+}
@@ -0,0 +1,101 @@
+#ifndef STABILITY_METRICS_H
+#define STABILITY_METRICS_H
+
+#include "recorder.h"
+#include "checkpoint.h"
+#include <vector>
+#include <mutex>
+
+struct StabilityMetrics {
+    float coefficient_of_variation = 0.0f; // std / mean of all inter-spike intervals
+    float burst_coefficient = 0.0f;        // Fano factor (variance / mean) of spikes per timestep
+    float synchrony_index = 0.0f;          // chi: std of the mean potential / rms of single-neuron stds
+    float entropy = 0.0f;                  // Shannon entropy (bits) of the spikes-per-timestep distribution
+    float lyapunov_exponent = 0.0f;        // largest lyapunov exponent of the network activity, per sample
+    float homeostatic_deviation = 0.0f;    // |mean network activity - resting potential| in mV
+    float network_coherence = 0.0f;        // mean pairwise correlation of recorded membrane potentials
+    float critical_branching_ratio = 0.0f; // spikes following an active timestep per spike in it
+};
+
+// Rosenstein estimate of the largest lyapunov exponent: the network activity is embedded
+// in embedding_dimension coordinates lag samples apart, nearest neighbours must be more
+// than min_separation samples apart in time, pairs are followed for horizon samples,
+// and the exponent is the slope of the mean log distance over [fit_begin, fit_end],
+// which should cover the linear region before the divergence saturates
+struct LyapunovParameters {
+    int embedding_dimension = 5;
+    int lag = 1;
+    int min_separation = 10;
+    int horizon = 20;
+    int fit_begin = 0;
+    int fit_end = 10;
+};
+
+// throws std::invalid_argument on an impossible embedding or fit range
+void validate_lyapunov_parameters(const LyapunovParameters& parameters);
+
+// all metrics from one pass over the spikes and two over the membrane potentials
+// (O(spikes + neurons + timesteps x recorded neurons)), plus the nearest-neighbour
+// search of the lyapunov estimate. metrics that need data the recording left out, such
+// as potentials in spikes-only mode, stay at zero
+StabilityMetrics compute_stability_metrics(const SimulationData& data,
+                                           const LyapunovParameters& lyapunov = LyapunovParameters());
+
+// mean and variance updated one sample at a time (Welford's method)
+struct RunningStats {
+    long long count = 0;
+    double mean = 0.0;
+    double m2 = 0.0;
+    
+    inline void add(double value) {
+        count++;
+        const double delta = value - mean;
+        mean += delta / count;
+        m2 += delta * (value - mean);
+    }
+    inline double variance() const { return count > 0 ? m2 / count : 0.0; }
+};
+
+// the metrics of compute_stability_metrics(), accumulated while a run executes, so they
+// need no stored traces. potentials are folded in every timestep regardless of recording
+// decimation or neuron subsets. network_coherence and lyapunov_exponent need the whole
+// trace and stay at zero. snapshot() may be called from another thread during a run
+class OnlineMetrics {
+private:
+    mutable std::mutex lock;
+    std::vector<int> last_spike;
+    RunningStats intervals;
+    RunningStats spike_counts;
+    std::vector<long long> count_histogram;
+    int previous_count;
+    double ancestors;
+    double descendants;
+    RunningStats activity;
+    std::vector<RunningStats> neuron_potentials;
+    // spikes of the current timestep, folded in at end_timestep(); only the simulation
+    // thread touches this
+    std::vector<int> pending_spikes;
+    int pending_timestep;
+
+public:
+    OnlineMetrics();
+    
+    void begin(int neuron_count);
+    void record_potentials(const float* potentials, float network_activity);
+    inline void record_spike(int timestep, int neuron_id) {
+        pending_timestep = timestep;
+        pending_spikes.push_back(neuron_id);
+    }
+    void end_timestep(int spike_count);
+    
+    StabilityMetrics snapshot() const;
+    long long get_timesteps() const;
+    
+    // take over the accumulated state of other, e.g. for a forked run
+    void copy_from(const OnlineMetrics& other);
+    // accumulated state, for checkpoints
+    void save(CheckpointWriter& writer) const;
+    void load(CheckpointReader& reader);
+};
+
+#endif
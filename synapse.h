@@ -1,6 +1,8 @@
 #ifndef SYNAPSE_H
 #define SYNAPSE_H
 
+#include <vector>
+
 class Dendrite;
 
 class Synapse {
@@ -8,10 +10,10 @@ private:
     float weight;           // synaptic strength in mV (EPSP/IPSP amplitude)
     float threshold;        // activation threshold in mV
     bool is_inhibitory;     // true for inhibitory, false for excitatory
-    Dendrite** connections; // array of connected dendrites
-    int connection_count;   // number of connected dendrites
+    std::vector<Dendrite*> connections; // connected dendrites
     int max_connections;    // maximum allowed connections
-    
+    int delay;              // transmission delay in timesteps
+
 public:
     // constructor with biologically plausable default values
     explicit Synapse(float w = 1.0f, float t = -50.0f, bool inhibit = false, int max_conn = 1);
@@ -30,6 +32,8 @@ public:
     bool connect_to_dendrite(Dendrite* dendrite);
     bool disconnect_from_dendrite(Dendrite* dendrite);
     void disconnect_all();
+    // drop a dendrite that is being destroyed, without calling back into it
+    void forget_dendrite(Dendrite* dendrite);
     void propagate_signal(float signal_strength);
     
     // weight management - clamp to realistic EPSP/IPSP range
@@ -42,7 +46,10 @@ public:
     inline float get_weight() const { return weight; }
     inline float get_threshold() const { return threshold; }
     inline bool is_inhibitory_synapse() const { return is_inhibitory; }
-    inline int get_connection_count() const { return connection_count; }
+    inline int get_connection_count() const { return static_cast<int>(connections.size()); }
+    inline Dendrite* get_connection(int idx) const { return connections[idx]; }
+    inline int get_delay() const { return delay; }
+    inline void set_delay(int steps) { delay = steps < 1 ? 1 : steps; }
     
     virtual ~Synapse();
 };
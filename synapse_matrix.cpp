@@ -0,0 +1,71 @@
+#include "synapse_matrix.h"
+#include "neuron.h"
+#include "axon.h"
+#include "synapse.h"
+#include "dendrite.h"
+#include <unordered_map>
+
+void SynapseMatrix::clear() {
+    row_offsets.clear();
+    targets.clear();
+    weights.clear();
+    inhibitory.clear();
+    thresholds.clear();
+    delays.clear();
+    max_delay = 1;
+}
+
+void SynapseMatrix::build_from_neurons(const std::vector<Neuron*>& neurons) {
+    clear();
+    const int n = static_cast<int>(neurons.size());
+    
+    std::unordered_map<const Neuron*, int> neuron_index;
+    neuron_index.reserve(n);
+    for (int i = 0; i < n; ++i) {
+        neuron_index[neurons[i]] = i;
+    }
+    
+    row_offsets.resize(n + 1, 0);
+    for (int i = 0; i < n; ++i) {
+        // flatten axon -> synapse -> dendrite -> parent neuron, preserving axon order
+        row_offsets[i] = static_cast<int>(targets.size());
+        const Axon* axon = neurons[i]->get_axon();
+        for (int s = 0; axon != nullptr && s < axon->get_synapse_count(); ++s) {
+            const Synapse* synapse = axon->get_output_synapse(s);
+            if (synapse == nullptr) continue;
+            for (int c = 0; c < synapse->get_connection_count(); ++c) {
+                const Dendrite* dendrite = synapse->get_connection(c);
+                if (dendrite == nullptr) continue;
+                auto target = neuron_index.find(dendrite->get_parent_neuron());
+                if (target == neuron_index.end()) continue;
+                targets.push_back(target->second);
+                weights.push_back(synapse->get_weight());
+                inhibitory.push_back(synapse->is_inhibitory_synapse() ? 1 : 0);
+                thresholds.push_back(synapse->get_threshold());
+                delays.push_back(synapse->get_delay());
+                if (synapse->get_delay() > max_delay) max_delay = synapse->get_delay();
+            }
+        }
+    }
+    row_offsets[n] = static_cast<int>(targets.size());
+}
+
+void SynapseMatrix::save(CheckpointWriter& writer) const {
+    writer.write_vector(row_offsets);
+    writer.write_vector(targets);
+    writer.write_vector(weights);
+    writer.write_vector(inhibitory);
+    writer.write_vector(thresholds);
+    writer.write_vector(delays);
+    writer.write(max_delay);
+}
+
+void SynapseMatrix::load(CheckpointReader& reader) {
+    reader.read_vector(row_offsets);
+    reader.read_vector(targets);
+    reader.read_vector(weights);
+    reader.read_vector(inhibitory);
+    reader.read_vector(thresholds);
+    reader.read_vector(delays);
+    max_delay = reader.read<int>();
+}
@@ -0,0 +1,66 @@
+#ifndef SYNAPSE_MATRIX_H
+#define SYNAPSE_MATRIX_H
+
+#include <vector>
+#include "checkpoint.h"
+
+class Neuron;
+
+// compressed sparse row connectivity: row i holds the outgoing synapses of neuron i
+// in axon order. weights are stored as magnitudes with the excitatory/inhibitory
+// sign kept separately, so inputs can be accumulated into separate channels.
+class SynapseMatrix {
+private:
+    std::vector<int> row_offsets;          // row i spans [row_offsets[i], row_offsets[i+1])
+    std::vector<int> targets;              // postsynaptic neuron id
+    std::vector<float> weights;            // EPSP/IPSP amplitude in mV (always positive)
+    std::vector<unsigned char> inhibitory; // 1 for inhibitory synapses
+    std::vector<float> thresholds;         // synaptic transmission threshold in mV
+    std::vector<int> delays;               // transmission delay in timesteps
+    int max_delay;
+
+public:
+    SynapseMatrix() : max_delay(1) {}
+    
+    // compile the synapses built through Neuron::connect_to_neuron()
+    void build_from_neurons(const std::vector<Neuron*>& neurons);
+    void clear();
+    void save(CheckpointWriter& writer) const;
+    void load(CheckpointReader& reader);
+    
+    inline int get_neuron_count() const { return row_offsets.empty() ? 0 : static_cast<int>(row_offsets.size()) - 1; }
+    inline int get_synapse_count() const { return static_cast<int>(targets.size()); }
+    inline int row_begin(int row) const { return row_offsets[row]; }
+    inline int row_end(int row) const { return row_offsets[row + 1]; }
+    
+    inline int get_target(int idx) const { return targets[idx]; }
+    inline float get_weight(int idx) const { return weights[idx]; }
+    inline const std::vector<float>& get_weights() const { return weights; }
+    inline bool is_inhibitory(int idx) const { return inhibitory[idx] != 0; }
+    inline float get_threshold(int idx) const { return thresholds[idx]; }
+    inline int get_delay(int idx) const { return delays[idx]; }
+    inline int get_max_delay() const { return max_delay; }
+    
+    // same clamping as Synapse::adjust_weight(); returns the change actually made
+    inline float adjust_weight(int idx, float delta) {
+        const float previous = weights[idx];
+        float weight = previous + delta;
+        if (weight > 10.0f) weight = 10.0f;
+        else if (weight < 0.1f) weight = 0.1f;
+        weights[idx] = weight;
+        return weight - previous;
+    }
+    
+    // same sign convention as Synapse::get_synaptic_contribution()
+    inline float get_contribution(int idx) const {
+        return inhibitory[idx] ? -weights[idx] : weights[idx];
+    }
+    
+    // same test as Synapse::transmit()
+    inline bool transmits(int idx, float amplitude) const {
+        float new_potential = amplitude + get_contribution(idx);
+        return new_potential >= thresholds[idx];
+    }
+};
+
+#endif
@@ -0,0 +1,137 @@
+import os
+import numpy as np
+import pytest
+
+import analysis_pipeline
+from simulation_io import RECORDINGS
+
+
+def export(prefix, seed=0, timesteps=300, neurons=8):
+    # recordings laid out as NeuronSimulator.export_binary_data() writes them
+    rng = np.random.default_rng(seed)
+    potentials = -65.0 + np.cumsum(rng.normal(size=(timesteps, neurons)), axis=0).astype(np.float32)
+    spikes = rng.random((timesteps, neurons)) < 0.05
+    spike_times, spike_neurons = np.nonzero(spikes)
+    arrays = {
+        'membrane_potentials': potentials,
+        'recorded_timesteps': np.arange(timesteps, dtype=np.int32),
+        'recorded_neurons': np.arange(neurons, dtype=np.int32),
+        'spike_times': spike_times.astype(np.int32),
+        'spike_neurons': spike_neurons.astype(np.int32),
+        'network_activity': potentials.mean(axis=1),
+        'spikes_per_timestep': spikes.sum(axis=1).astype(np.int32),
+    }
+    for name in RECORDINGS:
+        np.save(f'{prefix}{name}.npy', arrays[name])
+
+
+@pytest.fixture
+def run(tmp_path, monkeypatch):
+    prefix = str(tmp_path / 'hypoxia_')
+    export(prefix)
+    calls = {'metrics': 0, 'hash': 0}
+    calculate = analysis_pipeline.calculate_advanced_metrics
+    content_hash = analysis_pipeline.content_hash
+    
+    def counted_metrics(*args, **kwargs):
+        calls['metrics'] += 1
+        return calculate(*args, **kwargs)
+    
+    def counted_hash(*args, **kwargs):
+        calls['hash'] += 1
+        return content_hash(*args, **kwargs)
+    
+    monkeypatch.setattr(analysis_pipeline, 'calculate_advanced_metrics', counted_metrics)
+    monkeypatch.setattr(analysis_pipeline, 'content_hash', counted_hash)
+    return prefix, str(tmp_path / 'cache'), calls
+
+
+def entries(cache_dir):
+    return sorted(name for name in os.listdir(cache_dir) if name.endswith('.npz'))
+
+
+def test_cache_is_reused_for_unchanged_recordings(run):
+    prefix, cache_dir, calls = run
+    _, metrics, series = analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 1, 'hash': 1}
+    written = entries(cache_dir)
+    assert len(written) == 1
+    
+    _, cached_metrics, cached_series = analysis_pipeline.load_analysis(prefix, cache_dir)
+    # neither recomputed nor rehashed
+    assert calls == {'metrics': 1, 'hash': 1}
+    assert entries(cache_dir) == written
+    assert cached_metrics == pytest.approx(metrics, nan_ok=True)
+    assert set(cached_series) == set(series)
+    for name in series:
+        np.testing.assert_array_equal(cached_series[name], series[name], err_msg=name)
+
+
+def test_cache_entries_stay_in_the_cache_directory(run, tmp_path):
+    prefix, cache_dir, _ = run
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    recordings = {f'hypoxia_{name}.npy' for name in RECORDINGS}
+    assert set(os.listdir(tmp_path)) == recordings | {'cache'}
+    assert len(entries(cache_dir)) == 1
+
+
+def test_cache_matches_uncached_analysis(run):
+    prefix, cache_dir, _ = run
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    _, cached, _ = analysis_pipeline.load_analysis(prefix, cache_dir)
+    _, uncached, _ = analysis_pipeline.load_analysis(prefix, None)
+    assert cached == pytest.approx(uncached, nan_ok=True)
+
+
+def test_re_export_rewrites_the_cache_entry(run):
+    prefix, cache_dir, calls = run
+    _, metrics, _ = analysis_pipeline.load_analysis(prefix, cache_dir)
+    written = entries(cache_dir)
+    
+    export(prefix, seed=1)
+    _, new_metrics, _ = analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 2, 'hash': 2}
+    assert new_metrics != metrics
+    # the entry of the earlier recordings is replaced
+    assert len(entries(cache_dir)) == 1
+    assert entries(cache_dir) != written
+    
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 2, 'hash': 2}
+
+
+def test_same_size_re_export_is_detected_by_mtime(run):
+    prefix, cache_dir, calls = run
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    path = f'{prefix}network_activity.npy'
+    size, modified = os.path.getsize(path), os.stat(path).st_mtime_ns
+    activity = np.load(path)
+    np.save(path, activity + 1.0)
+    os.utime(path, ns=(modified + 10 ** 9, modified + 10 ** 9))
+    assert os.path.getsize(path) == size
+    
+    _, metrics, _ = analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 2, 'hash': 2}
+    assert len(entries(cache_dir)) == 1
+
+
+def test_touched_recordings_are_rehashed_but_reuse_the_cache(run):
+    prefix, cache_dir, calls = run
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    path = f'{prefix}spike_times.npy'
+    modified = os.stat(path).st_mtime_ns
+    os.utime(path, ns=(modified + 10 ** 9, modified + 10 ** 9))
+    
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 1, 'hash': 2}
+    # the new signature is stored, so the next load needs no hash
+    analysis_pipeline.load_analysis(prefix, cache_dir)
+    assert calls == {'metrics': 1, 'hash': 2}
+
+
+def test_cache_can_be_disabled(run, tmp_path):
+    prefix, cache_dir, calls = run
+    analysis_pipeline.load_analysis(prefix, None)
+    analysis_pipeline.load_analysis(prefix, None)
+    assert calls == {'metrics': 2, 'hash': 0}
+    assert not os.path.exists(cache_dir)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+METRICS = ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy', 'lyapunov_exponent',
+           'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']
+RECORDINGS = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity']
+SPEC = ns.PopulationSpec().scaled_to(100)
+SEEDS = [1, 2]
+
+
+def conditions():
+    simulator = ns.NeuronSimulator()
+    return [simulator.create_hypoglycemia(), simulator.create_hypoxia()]
+
+
+def assert_same_run(result, data, metrics):
+    assert result.data.total_spikes == data.total_spikes
+    assert result.data.total_timesteps == data.total_timesteps
+    for name in RECORDINGS:
+        np.testing.assert_array_equal(getattr(result.data, name), getattr(data, name), err_msg=name)
+    for name in METRICS:
+        np.testing.assert_equal(getattr(result.metrics, name), getattr(metrics, name), err_msg=name)
+
+
+@pytest.mark.parametrize("engine", [ns.SimulationEngine.OBJECT, ns.SimulationEngine.SOA])
+def test_batch_matches_single_runs(engine):
+    simulator = ns.NeuronSimulator(SPEC)
+    simulator.set_engine(engine)
+    results = simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [1500], 2)
+    
+    # ordered by condition, then seed
+    expected = [(condition.name, seed) for condition in conditions() for seed in SEEDS]
+    assert [(result.condition.name, result.seed) for result in results] == expected
+    for result in results:
+        single = ns.NeuronSimulator(SPEC, seed=result.seed)
+        single.set_engine(engine)
+        single.run_metabolic_dysfunction_simulation(result.condition, 1500)
+        assert single.get_simulation_data().total_spikes > 0
+        assert_same_run(result, single.get_simulation_data(), single.calculate_stability_metrics())
+
+
+def test_batch_results_do_not_depend_on_the_worker_count():
+    simulator = ns.NeuronSimulator(SPEC)
+    serial = simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [1000], 1)
+    parallel = simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [1000], 4)
+    for first, second in zip(serial, parallel):
+        assert_same_run(first, second.data, second.metrics)
+
+
+def test_batch_takes_one_length_per_condition():
+    simulator = ns.NeuronSimulator(SPEC)
+    results = simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [600, 900], 2)
+    assert [result.data.total_timesteps for result in results] == [600, 600, 900, 900]
+    with pytest.raises(ValueError):
+        simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [600, 900, 1200], 2)
@@ -0,0 +1,127 @@
+import os
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+RECORDINGS = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity',
+              'recorded_timesteps']
+METRICS = ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy',
+           'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']
+LENGTH = 3000
+
+
+def simulator(**options):
+    result = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(60), seed=5)
+    result.set_engine(ns.SimulationEngine.SOA)
+    result.set_online_metrics(True)
+    result.set_metabolic_model(True)
+    result.set_plasticity(True)
+    if options:
+        recording = ns.RecordingOptions()
+        for name, value in options.items():
+            setattr(recording, name, value)
+        result.set_recording_options(recording)
+    return result
+
+
+def condition():
+    return ns.NeuronSimulator().create_hypoxia()
+
+
+@pytest.fixture(scope='module')
+def reference():
+    result = simulator()
+    result.run_metabolic_dysfunction_simulation(condition(), LENGTH)
+    assert result.get_simulation_data().total_spikes > 0
+    return result
+
+
+def assert_same_state(resumed, reference):
+    data, expected = resumed.get_simulation_data(), reference.get_simulation_data()
+    assert data.total_spikes == expected.total_spikes
+    assert data.total_timesteps == expected.total_timesteps
+    for name in RECORDINGS:
+        np.testing.assert_array_equal(getattr(data, name), getattr(expected, name), err_msg=name)
+    for name in METRICS:
+        np.testing.assert_equal(getattr(resumed.get_running_metrics(), name),
+                                getattr(reference.get_running_metrics(), name), err_msg=name)
+    np.testing.assert_array_equal(resumed.get_synaptic_weights(), reference.get_synaptic_weights())
+    np.testing.assert_array_equal(resumed.get_atp_levels(), reference.get_atp_levels())
+
+
+def test_resume_matches_uninterrupted_run(tmp_path, reference):
+    path = str(tmp_path / 'run.bin')
+    interrupted = simulator()
+    interrupted.run_metabolic_dysfunction_simulation(condition(), 1200)
+    interrupted.save_checkpoint(path)
+    
+    resumed = ns.NeuronSimulator()
+    resumed.load_checkpoint(path)
+    assert resumed.get_timestep() == 1200
+    resumed.resume_metabolic_dysfunction_simulation(condition(), LENGTH)
+    assert_same_state(resumed, reference)
+
+
+def test_checkpoint_can_be_resumed_twice(tmp_path, reference):
+    path = str(tmp_path / 'run.bin')
+    interrupted = simulator()
+    interrupted.run_metabolic_dysfunction_simulation(condition(), 800)
+    interrupted.save_checkpoint(path)
+    for _ in range(2):
+        resumed = ns.NeuronSimulator()
+        resumed.load_checkpoint(path)
+        resumed.resume_metabolic_dysfunction_simulation(condition(), LENGTH)
+        assert_same_state(resumed, reference)
+
+
+def test_periodic_checkpoints_journal_the_recording(tmp_path, reference):
+    path = str(tmp_path / 'run.bin')
+    crashed = simulator()
+    crashed.set_checkpointing(path, 500)
+    # stops 250 timesteps after its last checkpoint, as a crash would
+    crashed.run_metabolic_dysfunction_simulation(condition(), 1750)
+    checkpoint_size = os.path.getsize(path)
+    journal_size = os.path.getsize(path + '.recording')
+    
+    resumed = ns.NeuronSimulator()
+    resumed.load_checkpoint(path)
+    assert resumed.get_timestep() == 1500
+    resumed.set_checkpointing(path, 500)
+    resumed.resume_metabolic_dysfunction_simulation(condition(), LENGTH)
+    assert_same_state(resumed, reference)
+    # the recording went to the journal, which the resumed run continued
+    assert os.path.getsize(path) < 2 * checkpoint_size
+    assert os.path.getsize(path + '.recording') > journal_size
+    
+    final = ns.NeuronSimulator()
+    final.load_checkpoint(path)
+    assert final.get_timestep() == LENGTH
+    for name in RECORDINGS:
+        np.testing.assert_array_equal(getattr(final.get_simulation_data(), name),
+                                      getattr(reference.get_simulation_data(), name), err_msg=name)
+
+
+def test_streamed_output_continues_after_resume(tmp_path):
+    names = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity']
+    expected = simulator(output_prefix=str(tmp_path / 'expected_'), chunk_timesteps=700)
+    expected.run_metabolic_dysfunction_simulation(condition(), LENGTH)
+    
+    path = str(tmp_path / 'run.bin')
+    crashed = simulator(output_prefix=str(tmp_path / 'resumed_'), chunk_timesteps=700)
+    crashed.set_checkpointing(path, 1000)
+    crashed.run_metabolic_dysfunction_simulation(condition(), 2500)
+    assert not os.path.exists(path + '.recording')
+    resumed = ns.NeuronSimulator()
+    resumed.load_checkpoint(path)
+    resumed.resume_metabolic_dysfunction_simulation(condition(), LENGTH)
+    for name in names:
+        np.testing.assert_array_equal(np.load(tmp_path / f'resumed_{name}.npy'),
+                                      np.load(tmp_path / f'expected_{name}.npy'), err_msg=name)
+
+
+def test_checkpoints_require_the_soa_engine(tmp_path):
+    object_engine = ns.NeuronSimulator()
+    object_engine.set_checkpointing(str(tmp_path / 'run.bin'), 100)
+    with pytest.raises(ValueError):
+        object_engine.run_standard_simulation(200)
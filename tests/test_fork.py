@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+METRICS = ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy', 'lyapunov_exponent',
+           'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']
+RECORDINGS = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity',
+              'recorded_timesteps']
+SEEDS = [1, 2]
+LENGTH = 2000
+
+
+def conditions():
+    # onsets at 500, 800 and 1000
+    simulator = ns.NeuronSimulator()
+    return [simulator.create_hypoxia(), simulator.create_diabetes_ketoacidosis(), simulator.create_hypoglycemia()]
+
+
+def soa_simulator(online_metrics=False, metabolic_model=False):
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(100))
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    simulator.set_online_metrics(online_metrics)
+    simulator.set_metabolic_model(metabolic_model)
+    return simulator
+
+
+@pytest.mark.parametrize("online_metrics,metabolic_model", [(False, False), (True, True)])
+def test_fork_matches_batch(online_metrics, metabolic_model):
+    simulator = soa_simulator(online_metrics, metabolic_model)
+    forked = simulator.run_metabolic_dysfunction_fork(conditions(), SEEDS, [LENGTH], 2)
+    batch = simulator.run_metabolic_dysfunction_batch(conditions(), SEEDS, [LENGTH], 2)
+    assert len(forked) == len(batch)
+    for fork_result, batch_result in zip(forked, batch):
+        assert (fork_result.condition.name, fork_result.seed) == (batch_result.condition.name, batch_result.seed)
+        # every branch starts at the earliest onset
+        assert fork_result.baseline.total_timesteps == 500
+        assert fork_result.data.first_timestep == 500
+        joined = ns.join_recordings(fork_result.baseline, fork_result.data)
+        assert joined.total_spikes == batch_result.data.total_spikes > 0
+        for name in RECORDINGS:
+            np.testing.assert_array_equal(getattr(joined, name), getattr(batch_result.data, name), err_msg=name)
+        for name in METRICS:
+            np.testing.assert_equal(getattr(fork_result.metrics, name), getattr(batch_result.metrics, name),
+                                    err_msg=name)
+
+
+def test_fork_baseline_is_shared_per_seed():
+    forked = soa_simulator().run_metabolic_dysfunction_fork(conditions(), SEEDS, [LENGTH], 2)
+    for result in forked:
+        first = forked[SEEDS.index(result.seed)]
+        np.testing.assert_array_equal(result.baseline.spike_times, first.baseline.spike_times)
+
+
+def test_fork_requires_the_soa_engine():
+    with pytest.raises(ValueError):
+        ns.NeuronSimulator().run_metabolic_dysfunction_fork(conditions(), SEEDS, [LENGTH], 2)
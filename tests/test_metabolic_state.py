@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+CONDITIONS = ['create_hypoxia', 'create_hypoglycemia', 'create_diabetes_ketoacidosis',
+              'create_mitochondrial_dysfunction']
+MODELS = [ns.NeuronModel.IZHIKEVICH, ns.NeuronModel.ADEX]
+TYPES = ['pyramidal', 'interneuron', 'purkinje', 'motor', 'sensory']
+
+
+def spec(model, types=TYPES):
+    result = ns.PopulationSpec().scaled_to(100)
+    dynamics = ns.DynamicsModel()
+    dynamics.model = model
+    for name in types:
+        setattr(result, f'{name}_dynamics', dynamics)
+    return result
+
+
+def run(population, condition, metabolic_model=True, timesteps=2000):
+    simulator = ns.NeuronSimulator(population, seed=1)
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    simulator.set_metabolic_model(metabolic_model)
+    simulator.set_log_level(ns.LogLevel.NEURON)
+    simulator.run_metabolic_dysfunction_simulation(getattr(simulator, condition)(), timesteps)
+    return simulator
+
+
+def block_onsets(simulator):
+    events = simulator.get_events()
+    blocks = events.types == int(ns.EventType.DEPOLARIZATION_BLOCK)
+    onsets = {}
+    for timestep, neuron in zip(events.timesteps[blocks], events.neurons[blocks]):
+        onsets.setdefault(int(neuron), int(timestep))
+    return onsets
+
+
+@pytest.mark.parametrize("condition", CONDITIONS)
+@pytest.mark.parametrize("model", MODELS)
+@pytest.mark.parametrize("types", [TYPES, ['interneuron']], ids=['all', 'interneurons'])
+def test_blocked_neurons_stay_finite_and_silent(model, condition, types):
+    simulator = run(spec(model, types), condition)
+    data = simulator.get_simulation_data()
+    assert np.all(np.isfinite(data.membrane_potentials))
+    assert np.all(np.isfinite(data.network_activity))
+    assert np.isfinite(simulator.calculate_stability_metrics().homeostatic_deviation)
+    
+    onsets = block_onsets(simulator)
+    assert onsets
+    for neuron, onset in onsets.items():
+        assert not np.any((data.spike_neurons == neuron) & (data.spike_times > onset)), neuron
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_metabolic_model_reduces_activity(model):
+    modulated = run(spec(model), 'create_hypoxia').get_simulation_data()
+    unmodulated = run(spec(model), 'create_hypoxia', metabolic_model=False).get_simulation_data()
+    assert 0 < modulated.total_spikes < unmodulated.total_spikes
+
+
+def test_metabolic_state_survives_checkpoints(tmp_path):
+    path = str(tmp_path / 'run.bin')
+    reference = run(spec(ns.NeuronModel.IZHIKEVICH), 'create_hypoxia')
+    interrupted = run(spec(ns.NeuronModel.IZHIKEVICH), 'create_hypoxia', timesteps=1000)
+    interrupted.save_checkpoint(path)
+    
+    resumed = ns.NeuronSimulator()
+    resumed.load_checkpoint(path)
+    resumed.resume_metabolic_dysfunction_simulation(resumed.create_hypoxia(), 2000)
+    np.testing.assert_array_equal(resumed.get_simulation_data().membrane_potentials,
+                                  reference.get_simulation_data().membrane_potentials)
+    np.testing.assert_array_equal(resumed.get_atp_levels(), reference.get_atp_levels())
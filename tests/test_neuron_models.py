@@ -0,0 +1,91 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+MODELS = [ns.NeuronModel.LEGACY, ns.NeuronModel.LIF, ns.NeuronModel.IZHIKEVICH, ns.NeuronModel.ADEX]
+INTEGRATIONS = [ns.SynapticIntegration.STATIC, ns.SynapticIntegration.EVENT_DRIVEN]
+TYPES = ['pyramidal', 'interneuron', 'purkinje', 'motor', 'sensory']
+RECORDINGS = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity']
+
+
+def spec(dynamics, size=100):
+    result = ns.PopulationSpec().scaled_to(size)
+    for name in TYPES:
+        setattr(result, f'{name}_dynamics', dynamics)
+    return result
+
+
+def run(population, integration=ns.SynapticIntegration.STATIC, engine=ns.SimulationEngine.SOA, timesteps=1000):
+    simulator = ns.NeuronSimulator(population, seed=2)
+    simulator.set_engine(engine)
+    simulator.set_synaptic_integration(integration)
+    simulator.run_standard_simulation(timesteps)
+    return simulator.get_simulation_data()
+
+
+@pytest.mark.parametrize("integration", INTEGRATIONS)
+@pytest.mark.parametrize("model", MODELS)
+def test_models_stay_finite(model, integration):
+    data = run(spec(ns.DynamicsModel(model)), integration)
+    assert np.all(np.isfinite(data.membrane_potentials))
+    assert np.all(np.isfinite(data.network_activity))
+
+
+@pytest.mark.parametrize("model", MODELS)
+def test_models_spike_with_static_integration(model):
+    data = run(spec(ns.DynamicsModel(model)))
+    assert data.total_spikes > 0
+
+
+def test_legacy_groups_reproduce_the_object_engine():
+    dynamics = ns.DynamicsModel(ns.NeuronModel.LEGACY)
+    # parameters of the other models are ignored
+    dynamics.lif.tau_m = 5.0
+    dynamics.izhikevich.a = 0.1
+    legacy = run(spec(dynamics), timesteps=1500)
+    reference = run(ns.PopulationSpec().scaled_to(100), engine=ns.SimulationEngine.OBJECT, timesteps=1500)
+    assert reference.total_spikes > 0
+    for name in RECORDINGS:
+        np.testing.assert_array_equal(getattr(legacy, name), getattr(reference, name), err_msg=name)
+
+
+def test_mixed_models_update_their_own_groups():
+    population = ns.PopulationSpec().scaled_to(100)
+    population.interneuron_dynamics = ns.DynamicsModel(ns.NeuronModel.IZHIKEVICH)
+    population.motor_dynamics = ns.DynamicsModel(ns.NeuronModel.LIF)
+    data = run(population)
+    assert data.total_spikes > 0
+    assert np.all(np.isfinite(data.membrane_potentials))
+
+
+def test_neuron_groups_cover_the_population_in_type_order():
+    population = ns.PopulationSpec().scaled_to(100)
+    population.purkinje_count = 0
+    population.motor_dynamics = ns.DynamicsModel(ns.NeuronModel.ADEX)
+    groups = population.neuron_groups()
+    
+    # empty types have no group
+    counts = [getattr(population, f'{name}_count') for name in TYPES]
+    assert [group.end - group.begin for group in groups] == [count for count in counts if count > 0]
+    assert groups[0].begin == 0
+    assert groups[-1].end == population.total_size()
+    for previous, group in zip(groups, groups[1:]):
+        assert group.begin == previous.end
+    assert [group.dynamics.model for group in groups] == [
+        ns.NeuronModel.LEGACY, ns.NeuronModel.LEGACY, ns.NeuronModel.ADEX, ns.NeuronModel.LEGACY]
+
+
+@pytest.mark.parametrize("model,field", [('lif', 'tau_m'), ('adex', 'c_m'), ('adex', 'delta_t'), ('adex', 'tau_w')])
+def test_model_parameters_are_validated(model, field):
+    dynamics = ns.DynamicsModel()
+    parameters = getattr(dynamics, model)
+    setattr(parameters, field, 0.0)
+    setattr(dynamics, model, parameters)
+    with pytest.raises(ValueError):
+        ns.NeuronSimulator(spec(dynamics))
+
+
+def test_models_require_the_soa_engine():
+    with pytest.raises(ValueError):
+        run(spec(ns.DynamicsModel(ns.NeuronModel.LIF)), engine=ns.SimulationEngine.OBJECT)
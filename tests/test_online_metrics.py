@@ -0,0 +1,68 @@
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+ENGINES = [ns.SimulationEngine.OBJECT, ns.SimulationEngine.SOA]
+# coherence and the lyapunov exponent need the recorded trace
+ONLINE = ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy',
+          'homeostatic_deviation', 'critical_branching_ratio']
+PARTIAL = [dict(spikes_only=True), dict(decimation=5), dict(neurons=[0, 1, 2])]
+
+
+def run(engine, timesteps=1500, **options):
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(100), seed=6)
+    simulator.set_engine(engine)
+    simulator.set_online_metrics(True)
+    recording = ns.RecordingOptions()
+    for name, value in options.items():
+        setattr(recording, name, value)
+    simulator.set_recording_options(recording)
+    simulator.run_metabolic_dysfunction_simulation(simulator.create_hypoxia(), timesteps)
+    return simulator
+
+
+def assert_online_fields(metrics, expected):
+    for name in ONLINE:
+        assert getattr(metrics, name) == pytest.approx(getattr(expected, name), rel=1e-4, abs=1e-6), name
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_online_metrics_match_the_recorded_run(engine):
+    simulator = run(engine)
+    assert simulator.get_running_timesteps() == 1500
+    # with the full trace recorded, the metrics are computed from the recording
+    recorded = simulator.calculate_stability_metrics()
+    assert recorded.synchrony_index > 0
+    assert recorded.homeostatic_deviation > 0
+    assert_online_fields(simulator.get_running_metrics(), recorded)
+
+
+@pytest.mark.parametrize("options", PARTIAL, ids=['spikes_only', 'decimated', 'subset'])
+@pytest.mark.parametrize("engine", ENGINES)
+def test_partial_recordings_use_the_online_metrics(engine, options):
+    full = run(engine).calculate_stability_metrics()
+    partial = run(engine, **options)
+    metrics = partial.calculate_stability_metrics()
+    for name in ONLINE:
+        assert getattr(metrics, name) == getattr(partial.get_running_metrics(), name), name
+    assert_online_fields(metrics, full)
+
+
+def test_streamed_run_uses_the_online_metrics(tmp_path):
+    simulator = run(ns.SimulationEngine.SOA, output_prefix=str(tmp_path / 'run_'), chunk_timesteps=400)
+    metrics = simulator.calculate_stability_metrics()
+    assert metrics.synchrony_index > 0
+    assert_online_fields(metrics, run(ns.SimulationEngine.SOA).calculate_stability_metrics())
+
+
+def test_batch_and_single_run_report_the_same_metrics():
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(100))
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    simulator.set_online_metrics(True)
+    options = ns.RecordingOptions()
+    options.spikes_only = True
+    simulator.set_recording_options(options)
+    result = simulator.run_metabolic_dysfunction_batch([simulator.create_hypoxia()], [6], [1500], 1)[0]
+    single = run(ns.SimulationEngine.SOA, spikes_only=True).calculate_stability_metrics()
+    for name in ONLINE:
+        assert getattr(result.metrics, name) == getattr(single, name), name
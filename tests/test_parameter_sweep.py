@@ -0,0 +1,132 @@
+import json
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+parameter_sweep = pytest.importorskip("parameter_sweep")
+
+POINTS = [{'atp_efficiency': 0.3}, {'atp_efficiency': 0.8}]
+SEEDS = [1, 2]
+TIMESTEPS = 400
+
+
+def spec():
+    result = ns.PopulationSpec().scaled_to(60)
+    result.interneuron_dynamics = ns.DynamicsModel(ns.NeuronModel.IZHIKEVICH)
+    result.interneuron_dynamics.izhikevich.a = 0.1
+    return result
+
+
+def condition():
+    return ns.NeuronSimulator().create_hypoxia()
+
+
+def sweep(path, points=POINTS, **options):
+    settings = dict(seeds=SEEDS, max_timesteps=TIMESTEPS, spec=spec(), engine=ns.SimulationEngine.SOA,
+                    results_path=str(path), workers=1, verbose=False)
+    settings.update(options)
+    return parameter_sweep.run_sweep(settings.pop('base_condition', condition()), points, **settings)
+
+
+def lines(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def single_run(point, seed):
+    simulator = ns.NeuronSimulator(spec(), seed=seed)
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    base = condition()
+    for name, value in point.items():
+        setattr(base, name, value)
+    simulator.run_metabolic_dysfunction_simulation(base, TIMESTEPS)
+    return simulator
+
+
+def test_sweep_matches_single_runs(tmp_path):
+    table = sweep(tmp_path / 'results.jsonl')
+    assert len(table['run_key']) == len(POINTS) * len(SEEDS)
+    for i, seed in enumerate(table['seed']):
+        point = {'atp_efficiency': float(table['atp_efficiency'][i])}
+        simulator = single_run(point, int(seed))
+        # the workers build the same spec, dynamics included
+        assert table['total_spikes'][i] == simulator.get_simulation_data().total_spikes
+        metrics = simulator.calculate_stability_metrics()
+        for name in parameter_sweep.STABILITY_METRICS:
+            assert table[name][i] == pytest.approx(getattr(metrics, name)), name
+
+
+def test_results_file_starts_with_the_settings(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    sweep(path)
+    first, *rows = lines(path)
+    assert first['sweep']['engine'] == 'SOA'
+    assert first['sweep']['spec'] == parameter_sweep.spec_to_dict(spec())
+    assert first['sweep']['base_condition']['name'] == condition().name
+    assert len(rows) == len(POINTS) * len(SEEDS)
+    assert parameter_sweep.load_results(str(path)) == rows
+
+
+def test_sweep_resumes_where_it_stopped(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    complete = sweep(path)
+    # as if interrupted after its first run
+    with open(path) as f:
+        kept = f.readlines()[:2]
+    with open(path, 'w') as f:
+        f.writelines(kept)
+    
+    resumed = sweep(path)
+    assert len(lines(path)) == 1 + len(POINTS) * len(SEEDS)
+    assert sorted(resumed['run_key']) == sorted(complete['run_key'])
+    by_key = dict(zip(complete['run_key'], complete['total_spikes']))
+    assert all(by_key[key] == spikes for key, spikes in zip(resumed['run_key'], resumed['total_spikes']))
+    
+    # a finished sweep runs nothing, and new points only run themselves
+    sweep(path)
+    assert len(lines(path)) == 1 + len(POINTS) * len(SEEDS)
+    extended = sweep(path, POINTS + [{'atp_efficiency': 0.5}])
+    assert len(lines(path)) == 1 + 3 * len(SEEDS)
+    assert len(extended['run_key']) == 3 * len(SEEDS)
+
+
+def changed_base_condition():
+    result = condition()
+    result.oxidative_stress = 1.0
+    return result
+
+
+def changed_spec():
+    result = spec()
+    result.motor_dynamics = ns.DynamicsModel(ns.NeuronModel.LIF)
+    return result
+
+
+@pytest.mark.parametrize("option,value", [
+    ('base_condition', changed_base_condition),
+    ('spec', changed_spec),
+    ('engine', lambda: ns.SimulationEngine.OBJECT),
+    ('analysis', lambda: len),
+])
+def test_sweep_with_other_settings_refuses_to_resume(tmp_path, option, value):
+    path = tmp_path / 'results.jsonl'
+    sweep(path, POINTS[:1])
+    written = lines(path)
+    with pytest.raises(ValueError, match=option):
+        sweep(path, POINTS[:1], **{option: value()})
+    assert lines(path) == written
+
+
+def test_results_without_settings_are_refused(tmp_path):
+    path = tmp_path / 'results.jsonl'
+    sweep(path, POINTS[:1])
+    with open(path) as f:
+        rows = f.readlines()[1:]
+    with open(path, 'w') as f:
+        f.writelines(rows)
+    with pytest.raises(ValueError):
+        sweep(path, POINTS[:1])
+
+
+def test_unknown_condition_fields_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        sweep(tmp_path / 'results.jsonl', [{'atp': 0.5}])
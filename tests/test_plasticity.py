@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+INTEGRATIONS = [ns.SynapticIntegration.STATIC, ns.SynapticIntegration.EVENT_DRIVEN]
+SPEC = ns.PopulationSpec().scaled_to(100)
+
+
+def run(plasticity, integration=ns.SynapticIntegration.STATIC, timesteps=2000, seed=4):
+    simulator = ns.NeuronSimulator(SPEC, seed=seed)
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    simulator.set_synaptic_integration(integration)
+    simulator.set_plasticity(plasticity)
+    simulator.run_metabolic_dysfunction_simulation(simulator.create_hypoxia(), timesteps)
+    return simulator
+
+
+def test_weights_are_fixed_without_plasticity():
+    short = np.array(run(False, timesteps=10).get_synaptic_weights())
+    long = np.array(run(False).get_synaptic_weights())
+    np.testing.assert_array_equal(short, long)
+
+
+@pytest.mark.parametrize("integration", INTEGRATIONS)
+def test_plasticity_changes_weights_within_bounds(integration):
+    initial = np.array(run(False, integration).get_synaptic_weights())
+    learned = np.array(run(True, integration).get_synaptic_weights())
+    assert learned.shape == initial.shape
+    assert np.any(learned != initial)
+    assert np.all((learned >= 0.1) & (learned <= 10.0))
+
+
+@pytest.mark.parametrize("integration", INTEGRATIONS)
+def test_plasticity_is_deterministic(integration):
+    first, second = run(True, integration), run(True, integration)
+    np.testing.assert_array_equal(first.get_synaptic_weights(), second.get_synaptic_weights())
+    np.testing.assert_array_equal(first.get_simulation_data().spike_times, second.get_simulation_data().spike_times)
+
+
+def test_batch_with_plasticity_matches_single_run():
+    simulator = ns.NeuronSimulator(SPEC)
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    simulator.set_plasticity(True)
+    result = simulator.run_metabolic_dysfunction_batch([simulator.create_hypoxia()], [4], [2000], 1)[0]
+    single = run(True).get_simulation_data()
+    assert result.data.total_spikes == single.total_spikes
+    np.testing.assert_array_equal(result.data.spike_times, single.spike_times)
+
+
+def test_plasticity_parameters_are_validated():
+    simulator = ns.NeuronSimulator()
+    parameters = ns.PlasticityParameters()
+    parameters.tau_plus = 0.0
+    with pytest.raises(ValueError):
+        simulator.set_plasticity_parameters(parameters)
+
+
+def test_plasticity_requires_the_soa_engine():
+    simulator = ns.NeuronSimulator(SPEC)
+    simulator.set_plasticity(True)
+    with pytest.raises(ValueError):
+        simulator.run_standard_simulation(10)
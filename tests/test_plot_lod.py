@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from plot_lod import envelope, distinct_points, raster_density
+
+
+@pytest.fixture
+def trace():
+    rng = np.random.default_rng(0)
+    return -65.0 + np.cumsum(rng.normal(size=(10007, 3)), axis=0)
+
+
+def run_bounds(count, columns):
+    run = -(-count // columns)
+    return [(start, min(start + run, count)) for start in range(0, count, run)]
+
+
+def test_short_series_are_returned_whole(trace):
+    indices, values = envelope(trace[:100], columns=50)
+    np.testing.assert_array_equal(values, trace[:100])
+    np.testing.assert_array_equal(indices[:, 1], np.arange(100))
+
+
+@pytest.mark.parametrize("columns", [7, 100, 2000])
+def test_envelope_keeps_the_extremes_of_every_run(trace, columns):
+    indices, values = envelope(trace, columns)
+    assert indices.shape == values.shape
+    assert len(values) <= 2 * columns
+    for column in range(trace.shape[1]):
+        np.testing.assert_array_equal(values[:, column], trace[indices[:, column], column])
+        # indices never go back, so a line through the points follows the trace
+        assert np.all(np.diff(indices[:, column]) >= 0)
+        for start, end in run_bounds(len(trace), columns):
+            kept = values[(indices[:, column] >= start) & (indices[:, column] < end), column]
+            assert kept.min() == trace[start:end, column].min()
+            assert kept.max() == trace[start:end, column].max()
+
+
+def test_envelope_of_a_one_dimensional_series(trace):
+    indices, values = envelope(trace[:, 0], columns=300)
+    assert values.ndim == 1
+    np.testing.assert_array_equal(values, trace[indices, 0])
+    assert np.all(np.diff(indices) >= 0)
+    assert values.min() == trace[:, 0].min()
+    assert values.max() == trace[:, 0].max()
+    assert indices[-1] <= len(trace) - 1
+
+
+def test_distinct_points_keep_each_value_once_per_run():
+    values = np.random.default_rng(1).poisson(3.0, size=10000)
+    x, y = distinct_points(values, columns=100)
+    run = 100
+    points = set(zip(x, y))
+    assert len(points) == len(x)
+    for start in range(0, len(values), run):
+        centre = start + (run - 1) / 2
+        assert {value for position, value in points if position == centre} == set(values[start:start + run])
+
+
+def test_raster_density_counts_every_spike():
+    rng = np.random.default_rng(2)
+    times = rng.integers(0, 5000, size=3000)
+    neurons = rng.integers(0, 40, size=3000)
+    density = raster_density(times, neurons, 5000, 40)
+    assert density.shape == (100, 500)
+    assert density.sum() == 3000
+    # with fewer neurons than rows, each neuron falls in a band of its own
+    assert np.count_nonzero(density.sum(axis=1)) == 40
@@ -0,0 +1,93 @@
+import warnings
+import numpy as np
+import pytest
+
+from rolling_stats import rolling_mean, rolling_variance, rolling_correlation, mean_pairwise_correlation
+
+
+def direct_correlation(x):
+    # mean of the defined entries of the upper triangle of np.corrcoef, as the figure used
+    # to compute it for each window
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', RuntimeWarning)
+        correlations = np.corrcoef(x.T)[np.triu_indices(x.shape[1], k=1)]
+    correlations = correlations[np.isfinite(correlations)]
+    return correlations.mean() if len(correlations) else np.nan
+
+
+def windows(x, window):
+    return [x[k:k + window] for k in range(len(x) - window + 1)]
+
+
+@pytest.fixture
+def potentials():
+    rng = np.random.default_rng(0)
+    shared = np.cumsum(rng.normal(size=(400, 1)), axis=0)
+    return -65.0 + shared + rng.normal(size=(400, 6))
+
+
+@pytest.mark.parametrize("window", [1, 2, 7, 50, 400])
+def test_rolling_mean_and_variance_match_each_window(window):
+    x = np.random.default_rng(1).normal(-65.0, 3.0, size=400)
+    np.testing.assert_allclose(rolling_mean(x, window), [w.mean() for w in windows(x, window)], rtol=1e-12)
+    np.testing.assert_allclose(rolling_variance(x, window), [w.var() for w in windows(x, window)],
+                               rtol=1e-9, atol=1e-12)
+
+
+def test_rolling_variance_of_large_offsets_does_not_cancel():
+    x = 1e6 + np.random.default_rng(2).normal(size=300)
+    np.testing.assert_allclose(rolling_variance(x, 20), [w.var() for w in windows(x, 20)], rtol=1e-6)
+
+
+def test_rolling_variance_of_constant_windows_is_zero():
+    x = np.concatenate([np.full(50, -65.0), np.linspace(-65.0, -55.0, 50), np.full(50, -55.0)])
+    result = rolling_variance(x, 10)
+    assert np.all(result >= 0.0)
+    assert np.all(result[:41] == 0.0)
+    assert np.all(result[-41:] == 0.0)
+
+
+@pytest.mark.parametrize("window", [3, 20, 100])
+def test_rolling_correlation_matches_np_corrcoef(potentials, window):
+    expected = [direct_correlation(w) for w in windows(potentials, window)]
+    np.testing.assert_allclose(rolling_correlation(potentials, window), expected, rtol=1e-7, atol=1e-9)
+
+
+def test_rolling_correlation_leaves_constant_windows_out(potentials):
+    # one neuron is silent for a while, then every neuron is
+    potentials = potentials.copy()
+    potentials[100:200, 2] = -70.0
+    potentials[300:, :] = -70.0
+    result = rolling_correlation(potentials, 20)
+    expected = [direct_correlation(w) for w in windows(potentials, 20)]
+    np.testing.assert_allclose(result, expected, rtol=1e-7, atol=1e-9)
+    assert np.all(np.isnan(result[300:]))
+    assert np.all(np.isfinite(result[:281]))
+
+
+def test_series_shorter_than_the_window_give_no_entries(potentials):
+    assert len(rolling_mean(potentials[:5, 0], 10)) == 0
+    assert len(rolling_variance(potentials[:5, 0], 10)) == 0
+    assert len(rolling_correlation(potentials[:5], 10)) == 0
+    assert len(rolling_variance(potentials[:10, 0], 10)) == 1
+
+
+def test_window_must_be_positive():
+    with pytest.raises(ValueError):
+        rolling_variance(np.zeros(10), 0)
+    with pytest.raises(ValueError):
+        rolling_correlation(np.zeros((10, 2)), 0)
+
+
+def test_mean_pairwise_correlation_matches_np_corrcoef(potentials):
+    assert mean_pairwise_correlation(potentials) == pytest.approx(direct_correlation(potentials), rel=1e-12)
+    anticorrelated = np.stack([potentials[:, 0], -potentials[:, 0]], axis=1)
+    assert mean_pairwise_correlation(anticorrelated) == pytest.approx(-1.0)
+
+
+def test_mean_pairwise_correlation_leaves_constant_columns_out(potentials):
+    potentials = potentials.copy()
+    potentials[:, [1, 4]] = -70.0
+    assert mean_pairwise_correlation(potentials) == pytest.approx(direct_correlation(potentials), rel=1e-12)
+    assert np.isnan(mean_pairwise_correlation(np.full((50, 3), -70.0)))
+    assert np.isnan(mean_pairwise_correlation(potentials[:1]))
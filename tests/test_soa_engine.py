@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+CONDITIONS = [None, 'create_hypoglycemia', 'create_hypoxia', 'create_diabetes_ketoacidosis']
+RECORDINGS = ['spike_times', 'spike_neurons', 'spikes_per_timestep', 'membrane_potentials', 'network_activity']
+
+
+def run(engine, size, seed, condition, timesteps=1500):
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(size), seed=seed)
+    simulator.set_engine(engine)
+    if condition is None:
+        simulator.run_standard_simulation(timesteps)
+    else:
+        simulator.run_metabolic_dysfunction_simulation(getattr(simulator, condition)(), timesteps)
+    return simulator.get_simulation_data()
+
+
+@pytest.mark.parametrize("size,seed", [(50, 1), (200, 7)])
+@pytest.mark.parametrize("condition", CONDITIONS)
+def test_soa_engine_matches_object_engine(size, seed, condition):
+    reference = run(ns.SimulationEngine.OBJECT, size, seed, condition)
+    soa = run(ns.SimulationEngine.SOA, size, seed, condition)
+    assert reference.total_spikes > 0
+    assert soa.total_spikes == reference.total_spikes
+    for name in RECORDINGS:
+        np.testing.assert_array_equal(getattr(soa, name), getattr(reference, name), err_msg=name)
+
+
+def test_soa_engine_selection():
+    simulator = ns.NeuronSimulator()
+    assert simulator.get_engine() == ns.SimulationEngine.OBJECT
+    simulator.set_engine(ns.SimulationEngine.SOA)
+    assert simulator.get_engine() == ns.SimulationEngine.SOA
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+ENGINES = [ns.SimulationEngine.OBJECT, ns.SimulationEngine.SOA]
+
+
+def run(engine, size, timesteps, seed=3):
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(size), seed=seed)
+    simulator.set_engine(engine)
+    simulator.set_profiling(True)
+    simulator.run_standard_simulation(timesteps)
+    return simulator
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_runs_with_the_same_seed_are_identical(engine):
+    first = run(engine, 100, 1000).get_simulation_data()
+    second = run(engine, 100, 1000).get_simulation_data()
+    assert first.total_spikes > 0
+    np.testing.assert_array_equal(first.spike_times, second.spike_times)
+    np.testing.assert_array_equal(first.spike_neurons, second.spike_neurons)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_large_network_propagates_without_recursion(engine):
+    # cascades through thousands of neurons used to recurse once per synapse
+    simulator = run(engine, 5000, 50)
+    assert simulator.get_simulation_data().total_spikes > 0
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_spikes_are_delivered_through_the_queue(engine):
+    perf = run(engine, 200, 500).get_perf_counters()
+    assert perf.scheduled_events > 0
+    # deliveries still pending when the run ends are the only ones not delivered
+    assert 0 < perf.propagation_events <= perf.scheduled_events
+    assert perf.max_queue_depth > 0
@@ -0,0 +1,128 @@
+import math
+import numpy as np
+import pytest
+
+ns = pytest.importorskip("neuron_simulator")
+
+
+def metrics(lyapunov=None, **arrays):
+    data = ns.SimulationData.from_arrays(**arrays)
+    if lyapunov is None:
+        return ns.compute_stability_metrics(data)
+    return ns.compute_stability_metrics(data, lyapunov)
+
+
+def lyapunov_parameters(**fields):
+    parameters = ns.LyapunovParameters()
+    for name, value in fields.items():
+        setattr(parameters, name, value)
+    return parameters
+
+
+def test_coefficient_of_variation():
+    # intervals alternate between 1 and 3: mean 2, standard deviation 1
+    assert metrics(spike_times=[0, 1, 4, 5, 8, 9, 12], spike_neurons=[0] * 7).coefficient_of_variation == \
+        pytest.approx(0.5)
+    # regular firing, with the two neurons' spikes interleaved
+    regular = metrics(spike_times=[0, 1, 5, 6, 10, 11], spike_neurons=[0, 1, 0, 1, 0, 1])
+    assert regular.coefficient_of_variation == 0.0
+
+
+def test_spike_count_metrics():
+    # counts 1, 2, 4, 0 repeated: mean 7/4, variance 35/16
+    result = metrics(spikes_per_timestep=[1, 2, 4, 0] * 50)
+    assert result.burst_coefficient == pytest.approx(5 / 4)
+    assert result.entropy == pytest.approx(2.0)
+    # each active timestep is followed by 2, 4 and 0 spikes for 1, 2 and 4 spikes in it
+    assert result.critical_branching_ratio == pytest.approx(6 / 7)
+
+
+def test_spike_count_metrics_of_a_constant_series():
+    result = metrics(spikes_per_timestep=[3] * 100)
+    assert result.burst_coefficient == 0.0
+    assert result.entropy == 0.0
+    # the last timestep has no successor
+    assert result.critical_branching_ratio == pytest.approx(1.0)
+
+
+def test_synchrony_and_coherence_of_identical_neurons():
+    # zero mean, so the network activity is -65 mV on average
+    trace = np.tile([1.0, -1.0, 2.0, -2.0], 50)
+    result = metrics(membrane_potentials=np.stack([trace] * 3, axis=1) - 65.0)
+    assert result.synchrony_index == pytest.approx(1.0)
+    assert result.network_coherence == pytest.approx(1.0)
+    assert result.homeostatic_deviation == pytest.approx(0.0)
+
+
+def test_synchrony_and_coherence_of_opposite_neurons():
+    trace = np.tile([1.0, -1.0, 2.0, -2.0], 50)
+    result = metrics(membrane_potentials=np.stack([trace, -trace], axis=1) - 60.0)
+    assert result.synchrony_index == pytest.approx(0.0, abs=1e-4)
+    assert result.network_coherence == pytest.approx(-1.0)
+    assert result.homeostatic_deviation == pytest.approx(5.0)
+
+
+def test_constant_neurons_are_left_out_of_the_coherence():
+    trace = np.sin(np.arange(200) * 0.3)
+    potentials = np.stack([trace, trace, np.zeros_like(trace)], axis=1)
+    assert metrics(membrane_potentials=potentials).network_coherence == pytest.approx(1.0)
+
+
+def test_lyapunov_exponent_of_the_logistic_map():
+    series = [0.3]
+    for _ in range(5000):
+        series.append(4.0 * series[-1] * (1.0 - series[-1]))
+    parameters = lyapunov_parameters(horizon=10, fit_end=4)
+    assert metrics(parameters, network_activity=series).lyapunov_exponent == pytest.approx(math.log(2), abs=0.01)
+
+
+def test_lyapunov_exponent_of_regular_series():
+    sine = np.sin(np.arange(3000) * 0.1)
+    assert metrics(network_activity=sine).lyapunov_exponent == pytest.approx(0.0, abs=0.01)
+    # constant series have no neighbours at a positive distance, so no estimate
+    assert metrics(network_activity=np.full(500, -65.0)).lyapunov_exponent == 0.0
+    assert metrics(network_activity=np.zeros(10)).lyapunov_exponent == 0.0
+
+
+def test_empty_recording_gives_zero_metrics():
+    result = metrics()
+    for name in ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy',
+                 'lyapunov_exponent', 'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']:
+        assert getattr(result, name) == 0.0, name
+
+
+@pytest.mark.parametrize("fields", [dict(embedding_dimension=0), dict(lag=0), dict(min_separation=-1),
+                                    dict(horizon=0), dict(fit_begin=-1), dict(fit_begin=5, fit_end=5),
+                                    dict(fit_begin=6, fit_end=5), dict(horizon=8, fit_end=10)])
+def test_invalid_lyapunov_parameters_are_rejected(fields):
+    parameters = lyapunov_parameters(**fields)
+    simulator = ns.NeuronSimulator()
+    with pytest.raises(ValueError):
+        simulator.set_lyapunov_parameters(parameters)
+    with pytest.raises(ValueError):
+        metrics(parameters, network_activity=np.zeros(100))
+    assert simulator.get_lyapunov_parameters().horizon == ns.LyapunovParameters().horizon
+
+
+def test_recordings_are_validated():
+    with pytest.raises(ValueError):
+        ns.SimulationData.from_arrays(spike_times=[0, 1], spike_neurons=[0])
+    with pytest.raises(ValueError):
+        ns.SimulationData.from_arrays(spike_times=[2, 1], spike_neurons=[0, 0])
+    with pytest.raises(ValueError):
+        ns.SimulationData.from_arrays(spike_times=[0], spike_neurons=[3], neuron_count=2)
+    with pytest.raises(ValueError):
+        ns.SimulationData.from_arrays(membrane_potentials=np.zeros(5))
+
+
+def test_metrics_of_a_run_match_its_recording():
+    simulator = ns.NeuronSimulator(ns.PopulationSpec().scaled_to(100), seed=3)
+    simulator.run_standard_simulation(1000)
+    data = simulator.get_simulation_data()
+    rebuilt = ns.SimulationData.from_arrays(data.spike_times, data.spike_neurons, data.spikes_per_timestep,
+                                            data.membrane_potentials, data.network_activity, data.neuron_count)
+    expected = simulator.calculate_stability_metrics()
+    result = ns.compute_stability_metrics(rebuilt)
+    for name in ['coefficient_of_variation', 'burst_coefficient', 'synchrony_index', 'entropy',
+                 'lyapunov_exponent', 'homeostatic_deviation', 'network_coherence', 'critical_branching_ratio']:
+        assert getattr(result, name) == getattr(expected, name), name